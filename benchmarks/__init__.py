@@ -0,0 +1,11 @@
+"""
+Performance benchmarks for django-eav2.
+
+The suite seeds a synthetic dataset into the ``test_project`` models and times
+the EAV hot paths, recording both wall time and the number of SQL queries each
+operation executes. Run it from the repository root with::
+
+    python -m benchmarks
+
+See ``python -m benchmarks --help`` for the available options.
+"""
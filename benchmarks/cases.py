@@ -0,0 +1,219 @@
+"""
+Benchmark cases.
+
+Every case is a function decorated with :func:`~benchmarks.runner.benchmark`.
+It receives the seeded :class:`~benchmarks.data.Dataset` together with the
+primary key flavour being measured, performs any setup it needs, and returns
+the zero-argument callable that is actually timed.
+"""
+
+from __future__ import annotations
+
+from functools import reduce
+from itertools import count
+from operator import and_, or_
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.forms import modelform_factory
+from django.test.client import RequestFactory
+
+from benchmarks.data import MODELS, Dataset
+from benchmarks.runner import benchmark
+from eav.forms import BaseDynamicEntityForm
+from eav.identity import identity_map
+from eav.logic.entity_pk import get_entity_pk_type
+from eav.models import Attribute, Value
+from eav.queryset import expand_q_filters, rewrite_q_expr
+from eav.schema import schema_changed
+
+
+def _first(dataset: Dataset, kind: str):
+    return MODELS[kind].objects.get(pk=dataset.instances[kind][0].pk)
+
+
+@benchmark("read_attribute")
+def read_attribute(dataset: Dataset, kind: str):
+    """Read a single attribute through ``instance.eav.<slug>``."""
+    instance = _first(dataset, kind)
+    slug = dataset.slug(Attribute.TYPE_INT)
+    return lambda: getattr(instance.eav, slug)
+
+
+@benchmark("read_all_attributes")
+def read_all_attributes(dataset: Dataset, kind: str):
+    """Read every seeded attribute of one entity."""
+    instance = _first(dataset, kind)
+    slugs = [slug for slugs in dataset.slugs.values() for slug in slugs]
+
+    def run():
+        for slug in slugs:
+            getattr(instance.eav, slug)
+
+    return run
+
+
+@benchmark("read_loop")
+def read_loop(dataset: Dataset, kind: str):
+    """Read one attribute of 20 entities in a loop (N+1)."""
+    manager = MODELS[kind].objects
+    slug = dataset.slug(Attribute.TYPE_INT)
+    return lambda: [getattr(i.eav, slug) for i in manager.order_by("pk")[:20]]
+
+
+@benchmark("read_loop_prefetched")
+def read_loop_prefetched(dataset: Dataset, kind: str):
+    """Same loop as ``read_loop``, with the values loaded by ``prefetch_eav``."""
+    manager = MODELS[kind].objects
+    slug = dataset.slug(Attribute.TYPE_INT)
+    return lambda: [
+        getattr(i.eav, slug) for i in manager.prefetch_eav(slug).order_by("pk")[:20]
+    ]
+
+
+@benchmark("value_iteration")
+def value_iteration(dataset: Dataset, kind: str):
+    """Read 200 values loaded without ``select_related()``."""
+    queryset = (
+        Value.objects.filter(entity_ct=ContentType.objects.get_for_model(MODELS[kind]))
+        .exclude(attribute__datatype=Attribute.TYPE_OBJECT)
+        .order_by("pk")[:200]
+    )
+    # Start cold, so the query count includes loading the attributes.
+    identity_map.clear()
+    return lambda: [value.value for value in queryset.all()]
+
+
+@benchmark("entity_save")
+def entity_save(dataset: Dataset, kind: str):
+    """Change one attribute and save the entity."""
+    instance = _first(dataset, kind)
+    slug = dataset.slug(Attribute.TYPE_INT)
+    counter = iter(range(10**9))
+
+    def run():
+        setattr(instance.eav, slug, next(counter))
+        instance.save()
+
+    return run
+
+
+@benchmark("validate_attributes")
+def validate_attributes(dataset: Dataset, kind: str):
+    """Validate every attribute of one entity."""
+    instance = _first(dataset, kind)
+    return instance.eav.validate_attributes
+
+
+@benchmark("filter_single")
+def filter_single(dataset: Dataset, kind: str):
+    """Filter on one attribute and evaluate the queryset."""
+    manager = MODELS[kind].objects
+    slug = dataset.slug(Attribute.TYPE_INT)
+    return lambda: list(manager.filter(**{f"eav__{slug}__gte": 500}))
+
+
+@benchmark("filter_multi")
+def filter_multi(dataset: Dataset, kind: str):
+    """Filter on three attributes of different datatypes."""
+    manager = MODELS[kind].objects
+    lookups = {
+        f"eav__{dataset.slug(Attribute.TYPE_INT)}__gte": 200,
+        f"eav__{dataset.slug(Attribute.TYPE_BOOLEAN)}": True,
+        f"eav__{dataset.slug(Attribute.TYPE_TEXT)}__startswith": "a",
+    }
+    return lambda: list(manager.filter(**lookups))
+
+
+@benchmark("rewrite_q_expr")
+def rewrite_deep_q(dataset: Dataset, kind: str):
+    """Expand and rewrite a deep Q tree without evaluating it."""
+    model_cls = MODELS[kind]
+    int_slug = dataset.slug(Attribute.TYPE_INT)
+    float_slug = dataset.slug(Attribute.TYPE_FLOAT)
+
+    branches = [
+        Q(**{f"eav__{int_slug}": i}) & Q(**{f"eav__{float_slug}__lt": i})
+        for i in range(16)
+    ]
+    tree = reduce(or_, [reduce(and_, branches[i : i + 4]) for i in range(0, 16, 4)])
+
+    return lambda: rewrite_q_expr(model_cls, expand_q_filters(tree, model_cls))
+
+
+def _rewrite_wide_q(leaves: int):
+    def case(dataset: Dataset, kind: str):
+        model_cls = MODELS[kind]
+        int_slug = dataset.slug(Attribute.TYPE_INT)
+        text_slug = dataset.slug(Attribute.TYPE_TEXT)
+
+        # A faceted search: any of several values for each of two attributes.
+        ages = [Q(**{f"eav__{int_slug}": i}) for i in range(leaves // 2)]
+        names = [Q(**{f"eav__{text_slug}": str(i)}) for i in range(leaves // 2)]
+        tree = reduce(or_, ages) & reduce(or_, names)
+
+        # Start cold, so the query count includes compiling the lookups.
+        schema_changed()
+        return lambda: rewrite_q_expr(model_cls, expand_q_filters(tree, model_cls))
+
+    case.__doc__ = f"Expand and rewrite a generated Q tree with {leaves} leaves."
+    return case
+
+
+for _leaves in (10, 100, 1000):
+    benchmark(f"rewrite_q_tree_{_leaves}")(_rewrite_wide_q(_leaves))
+
+
+@benchmark("order_by")
+def order_by(dataset: Dataset, kind: str):
+    """Order all entities by an EAV attribute."""
+    manager = MODELS[kind].objects
+    slug = dataset.slug(Attribute.TYPE_INT)
+    return lambda: list(manager.order_by(f"eav__{slug}"))
+
+
+@benchmark("form_build")
+def form_build(dataset: Dataset, kind: str):
+    """Construct a ``BaseDynamicEntityForm`` for one entity."""
+    instance = _first(dataset, kind)
+    form_cls = modelform_factory(
+        MODELS[kind],
+        form=BaseDynamicEntityForm,
+        fields=("name",),
+    )
+    return lambda: form_cls(instance=instance)
+
+
+@benchmark("admin_change_form")
+def admin_change_form(dataset: Dataset, kind: str):
+    """Render the admin change form of one entity."""
+    instance = _first(dataset, kind)
+    model_admin = admin.site.get_model_admin(MODELS[kind])
+
+    request = RequestFactory().get("/")
+    request.user = User(username="bench", is_staff=True, is_superuser=True)
+
+    return lambda: model_admin.change_view(request, str(instance.pk)).render()
+
+
+@benchmark("save_beside_large_json")
+def save_beside_large_json(dataset: Dataset, kind: str):
+    """Read and save an attribute of an entity with a 256 KB JSON value."""
+    instance = MODELS[kind].objects.get(pk=dataset.instances[kind][-1].pk)
+    Value.objects.filter(
+        attribute__slug=dataset.slug(Attribute.TYPE_JSON),
+        entity_ct=ContentType.objects.get_for_model(instance),
+    ).filter(**{get_entity_pk_type(instance): instance.pk}).update(
+        value_json={"rows": [{"row": i, "text": "x" * 240} for i in range(1000)]},
+    )
+    slug = dataset.slug(Attribute.TYPE_INT)
+    numbers = count()
+
+    def run():
+        getattr(instance.eav, slug)
+        setattr(instance.eav, slug, next(numbers))
+        instance.save()
+
+    return run
@@ -0,0 +1,116 @@
+"""Synthetic dataset used by the benchmark cases."""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from django.contrib.contenttypes.models import ContentType
+
+from eav.logic.entity_pk import get_entity_pk_type
+from eav.logic.generate import make_sampler
+from eav.models import Attribute, EnumGroup, EnumValue, Value
+from test_project.models import Doctor, ExampleModel
+
+if TYPE_CHECKING:
+    from django.db import models
+
+#: Datatypes seeded by the benchmarks, in the order attributes are created.
+DATATYPES = (
+    Attribute.TYPE_TEXT,
+    Attribute.TYPE_FLOAT,
+    Attribute.TYPE_INT,
+    Attribute.TYPE_DATE,
+    Attribute.TYPE_BOOLEAN,
+    Attribute.TYPE_OBJECT,
+    Attribute.TYPE_ENUM,
+    Attribute.TYPE_JSON,
+    Attribute.TYPE_CSV,
+)
+
+#: Entity models keyed by the primary key flavour they exercise.
+MODELS: dict[str, type[models.Model]] = {
+    "int": ExampleModel,
+    "uuid": Doctor,
+}
+
+ENUM_CHOICES = ("red", "green", "blue", "yellow")
+
+
+@dataclass
+class Dataset:
+    """Handles to the seeded data, passed to every benchmark case."""
+
+    entities: int
+    attributes: int
+    slugs: dict[str, list[str]] = field(default_factory=dict)
+    instances: dict[str, list[models.Model]] = field(default_factory=dict)
+
+    def slug(self, datatype: str) -> str:
+        """Return the first seeded attribute slug of *datatype*."""
+        return self.slugs[datatype][0]
+
+
+def seed(entities: int, attributes: int, seed_value: int = 0) -> Dataset:
+    """
+    Create *attributes* attributes, cycling through every datatype, and
+    *entities* instances of each model in :data:`MODELS` with a value for
+    every attribute.
+
+    Values are written with ``bulk_create`` so seeding stays cheap compared
+    to the operations being measured.
+    """
+    rnd = random.Random(seed_value)  # noqa: S311
+    dataset = Dataset(entities=entities, attributes=attributes)
+
+    group = EnumGroup.objects.create(name="bench colors")
+    choices = [EnumValue.objects.create(value=c) for c in ENUM_CHOICES]
+    group.values.add(*choices)
+
+    schema = []
+    for index in range(attributes):
+        datatype = DATATYPES[index % len(DATATYPES)]
+        attribute = Attribute.objects.create(
+            name=f"{datatype} {index}",
+            slug=f"{datatype}_{index}",
+            datatype=datatype,
+            enum_group=group if datatype == Attribute.TYPE_ENUM else None,
+        )
+        dataset.slugs.setdefault(datatype, []).append(attribute.slug)
+        schema.append(attribute)
+
+    target = ExampleModel.objects.create(name="object target")
+    samplers = {
+        attribute.pk: make_sampler(attribute, rnd, choices)
+        for attribute in schema
+        if attribute.datatype != Attribute.TYPE_OBJECT
+    }
+
+    for kind, model_cls in MODELS.items():
+        instances = model_cls.objects.bulk_create(
+            [model_cls(name=f"{kind} entity {i}") for i in range(entities)],
+        )
+        dataset.instances[kind] = instances
+
+        ct = ContentType.objects.get_for_model(model_cls)
+        pk_field = get_entity_pk_type(model_cls)
+        values = []
+        for instance in instances:
+            for attribute in schema:
+                sampler = samplers.get(attribute.pk)
+                values.append(
+                    Value(
+                        entity_ct=ct,
+                        attribute=attribute,
+                        **{
+                            pk_field: instance.pk,
+                            f"value_{attribute.datatype}": (
+                                sampler() if sampler else target
+                            ),
+                        },
+                    ),
+                )
+        Value.objects.bulk_create(values, batch_size=500)
+
+    return dataset
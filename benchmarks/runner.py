@@ -0,0 +1,282 @@
+"""Benchmark registry, measurement and baseline comparison."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+#: Registered cases, in definition order.
+BENCHMARKS: dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """Register the decorated function as the benchmark case *name*."""
+
+    def _register(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return _register
+
+
+@dataclass
+class Result:
+    """Measurement of one case for one primary key flavour."""
+
+    name: str
+    queries: int
+    seconds: float
+    fetched: int = 0
+
+
+@dataclass
+class Regression:
+    """A result that is worse than its baseline on *metric*."""
+
+    name: str
+    metric: str
+    value: float
+    expected: float
+
+    def __str__(self) -> str:
+        if self.metric == "queries":
+            return f"{self.name}: {self.value} queries (baseline {self.expected})"
+        return (
+            f"{self.name}: {self.value * 1000:.2f}ms "
+            + f"(baseline {self.expected * 1000:.2f}ms)"
+        )
+
+
+def _size(cell: object) -> int:
+    if cell is None:
+        return 0
+    if isinstance(cell, str):
+        return len(cell.encode())
+    if isinstance(cell, (bytes, memoryview)):
+        return len(cell)
+    if isinstance(cell, (bool, int, float)):
+        return 8
+    return len(str(cell))
+
+
+@contextmanager
+def count_fetched_bytes():
+    """
+    Count the bytes of the rows fetched from the database in the block, an
+    estimate of the bytes transferred, yielding a list holding the total.
+    """
+    from django.db.backends.utils import CursorWrapper  # noqa: PLC0415
+
+    total = [0]
+
+    def counted(name: str, *, many: bool):
+        def fetch(self, *args):
+            result = getattr(self.cursor, name)(*args)
+            for row in result if many else [result] if result else []:
+                total[0] += sum(_size(cell) for cell in row)
+            return result
+
+        return fetch
+
+    CursorWrapper.fetchone = counted("fetchone", many=False)
+    CursorWrapper.fetchmany = counted("fetchmany", many=True)
+    CursorWrapper.fetchall = counted("fetchall", many=True)
+    try:
+        yield total
+    finally:
+        # The wrapper delegates them to the database cursor again.
+        del CursorWrapper.fetchone, CursorWrapper.fetchmany, CursorWrapper.fetchall
+
+
+def measure(func: Callable[[], object], repeat: int) -> tuple[int, float, int]:
+    """
+    Run *func* once to count its queries and the bytes they fetched, then
+    *repeat* times to time it.
+
+    Returns:
+        tuple[int, float, int]: number of queries, median wall time in
+        seconds and number of bytes fetched.
+    """
+    from django.db import connection  # noqa: PLC0415
+    from django.test.utils import CaptureQueriesContext  # noqa: PLC0415
+
+    with CaptureQueriesContext(connection) as ctx, count_fetched_bytes() as fetched:
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return len(ctx.captured_queries), statistics.median(timings), fetched[0]
+
+
+def run_benchmarks(
+    entities: int,
+    attributes: int,
+    repeat: int = 5,
+    only: list[str] | None = None,
+) -> list[Result]:
+    """
+    Seed the dataset and measure every registered case (or only the ones
+    named in *only*) against each primary key flavour.
+
+    The database must already be set up; the seeded data is left in place.
+    """
+    import benchmarks.cases  # noqa: F401, PLC0415
+    from benchmarks.data import MODELS, seed  # noqa: PLC0415
+
+    dataset = seed(entities, attributes)
+    results = []
+
+    for name, case in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        for kind in MODELS:
+            queries, seconds, fetched = measure(case(dataset, kind), repeat)
+            results.append(Result(f"{name}[{kind}]", queries, seconds, fetched))
+
+    return results
+
+
+def compare(
+    results: list[Result],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[Regression]:
+    """
+    Compare *results* against *baseline* results.
+
+    Returns:
+        list[Regression]: one entry per regression. More queries than the baseline
+        is always a regression; wall time only counts when it exceeds the
+        baseline by more than *tolerance* (a ratio, e.g. ``0.25``).
+    """
+    regressions = []
+
+    for result in results:
+        expected = baseline.get(result.name)
+        if expected is None:
+            continue
+        if result.queries > expected["queries"]:
+            regressions.append(
+                Regression(result.name, "queries", result.queries, expected["queries"]),
+            )
+        if result.seconds > expected["seconds"] * (1 + tolerance):
+            regressions.append(
+                Regression(result.name, "seconds", result.seconds, expected["seconds"]),
+            )
+
+    return regressions
+
+
+def _report(results: list[Result], baseline: dict[str, dict[str, float]]) -> str:
+    header = ("benchmark", "queries", "baseline", "ms", "base ms", "KB", "base KB")
+    lines = ["{:<32} {:>8} {:>9} {:>10} {:>10} {:>9} {:>9}".format(*header)]
+    for result in results:
+        expected = baseline.get(result.name, {})
+        base_queries = expected.get("queries", "-")
+        base_ms = f"{expected['seconds'] * 1000:.2f}" if "seconds" in expected else "-"
+        base_kb = f"{expected['fetched'] / 1024:.1f}" if "fetched" in expected else "-"
+        lines.append(
+            f"{result.name:<32} {result.queries:>8} {base_queries:>9} "
+            + f"{result.seconds * 1000:>10.2f} {base_ms:>10} "
+            + f"{result.fetched / 1024:>9.1f} {base_kb:>9}",
+        )
+    return "\n".join(lines)
+
+
+def _setup_django() -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_project.settings")
+
+    import django  # noqa: PLC0415
+
+    django.setup()
+
+    from django.db import connection  # noqa: PLC0415
+    from django.test.utils import setup_test_environment  # noqa: PLC0415
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Measure query counts, wall time and bytes fetched of EAV "
+        + "hot paths.",
+    )
+    parser.add_argument("--entities", type=int, default=100)
+    parser.add_argument("--attributes", type=int, default=18)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only",
+        action="append",
+        help="Run only the named benchmark (may be given more than once).",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the results as the new baseline instead of comparing.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed wall time slowdown relative to the baseline (ratio).",
+    )
+    parser.add_argument(
+        "--fail-on-time",
+        action="store_true",
+        help="Exit non-zero on wall time regressions, not only query counts.",
+    )
+    args = parser.parse_args(argv)
+
+    _setup_django()
+    results = run_benchmarks(args.entities, args.attributes, args.repeat, args.only)
+    config = {"entities": args.entities, "attributes": args.attributes}
+
+    if args.save_baseline:
+        payload = {
+            "config": config,
+            "results": {
+                r.name: {k: v for k, v in asdict(r).items() if k != "name"}
+                for r in results
+            },
+        }
+        args.baseline.write_text(json.dumps(payload, indent=2) + "\n")
+        sys.stdout.write(_report(results, payload["results"]) + "\n")
+        return 0
+
+    baseline: dict[str, dict[str, float]] = {}
+    if args.baseline.exists():
+        stored = json.loads(args.baseline.read_text())
+        if stored["config"] == config:
+            baseline = stored["results"]
+        else:
+            sys.stderr.write(
+                f"Baseline was recorded with {stored['config']}, ignoring it.\n",
+            )
+
+    sys.stdout.write(_report(results, baseline) + "\n")
+
+    regressions = compare(results, baseline, args.tolerance)
+    query_regressions = [r for r in regressions if r.metric == "queries"]
+    for regression in regressions:
+        sys.stderr.write(f"REGRESSION {regression}\n")
+
+    if query_regressions or (regressions and args.fail_on_time):
+        return 1
+    return 0
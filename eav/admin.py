@@ -93,7 +93,11 @@ class BaseEntityAdmin(ModelAdmin):
             A list of strings representing the slugs of EAV fields.
         """
         entity = getattr(instance, instance._eav_config_cls.eav_attr)  # noqa: SLF001
-        return list(entity.get_all_attributes().values_list("slug", flat=True))
+        # Object attributes have no form field, see BaseDynamicEntityForm.
+        attributes = entity.get_all_attributes().exclude(
+            datatype=Attribute.TYPE_OBJECT,
+        )
+        return list(attributes.values_list("slug", flat=True))
 
     def _get_eav_fieldset(self, eav_fields) -> _FIELDSET_TYPE:
         """Constructs an EAV Attributes fieldset for inclusion in admin form fieldsets.
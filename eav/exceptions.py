@@ -1,2 +1,10 @@
 class IllegalAssignmentException(Exception):  # noqa: N818
     pass
+
+
+class NPlusOneWarning(UserWarning):
+    """Issued when EAV values of many entities are loaded one at a time."""
+
+
+class NPlusOneError(Exception):
+    """Raised instead of :class:`NPlusOneWarning` when so configured."""
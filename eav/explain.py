@@ -0,0 +1,273 @@
+"""
+This module contains :meth:`~eav.queryset.EavQuerySet.explain_eav`, the report
+of how the EAV filters and orderings of a queryset were rewritten and planned.
+
+Every ``filter()`` and ``exclude()`` call of an
+:class:`~eav.queryset.EavQuerySet` records a :class:`FilterStep`: its original
+arguments, the Q-expression Django was given once the EAV lookups were expanded
+(see :func:`~eav.queryset.expand_q_filters` and
+:func:`~eav.queryset.rewrite_q_expr`), the sibling EAV lookups merged into a
+single ``pk__in`` subquery and how each of its EAV lookups was matched.
+Ordering by an EAV attribute records an :class:`OrderStep`.
+:func:`explain_eav` adds the final SQL, the database's ``EXPLAIN`` output
+and warnings about the following anti-patterns:
+
+* ``~Q(eav__...)`` inside ``filter()``, which negates value rows rather than
+  entities (see :mod:`eav.queryset`);
+* ``order_by('eav__...')``, which loads the values of every entity when it is
+  called and orders them with a ``CASE`` of one branch per entity;
+* lookups on value columns without an index.
+
+Querysets embedded in the report are shown as ``<Model subquery>`` and never
+evaluated.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Exists, Q
+from django.db.models.query import QuerySet
+
+from eav.models import Value
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@dataclass(frozen=True)
+class MergedBranch:
+    """
+    The *leaves* EAV lookups joined by *connector* that
+    :func:`~eav.queryset.rewrite_q_expr` merged into a ``pk__in`` lookup on
+    *queryset*.
+    """
+
+    connector: str
+    leaves: int
+    queryset: QuerySet = field(repr=False)
+
+
+@dataclass(frozen=True)
+class OrderStep:
+    """Ordering by the attribute *slug*, which loaded *rows* values."""
+
+    slug: str
+    rows: int
+
+
+@dataclass(frozen=True)
+class PlannedLookup:
+    """
+    The EAV lookup *key* on the *column* of the values table, matched with
+    *strategy* (see :mod:`eav.planner`), expected to match the *selectivity*
+    share of the entities (None without statistics).
+    """
+
+    key: str
+    column: str
+    strategy: str
+    selectivity: float | None = None
+
+
+@dataclass(frozen=True)
+class FilterStep:
+    """
+    A ``filter()`` or ``exclude()`` (*method*) call with *args* and *kwargs*,
+    passed to Django as *rewritten*, merging the *merged* branches and
+    matching its EAV lookups as planned in *lookups*. *cached* tells whether
+    its EAV lookups went through the filter cache (see
+    :mod:`eav.filter_cache`).
+    """
+
+    method: str
+    args: tuple
+    kwargs: dict
+    rewritten: Q = field(repr=False)
+    merged: tuple[MergedBranch, ...] = ()
+    cached: bool = False
+    lookups: tuple[PlannedLookup, ...] = ()
+
+
+@dataclass
+class EavExplanation:
+    """The report returned by :func:`explain_eav`."""
+
+    filters: list[FilterStep]
+    orderings: list[OrderStep]
+    lookups: list[PlannedLookup]
+    sql: str
+    plan: str
+    warnings: list[str]
+
+    def __str__(self) -> str:
+        lines = ["EAV filters:"]
+        for i, step in enumerate(self.filters, 1):
+            lines.append(f"  {i}. {format_call(step.method, step.args, step.kwargs)}")
+            lines.append(f"     rewritten: {format_node(step.rewritten)}")
+            lines.extend(
+                f"     merged: {branch.connector} of {branch.leaves} lookups "
+                + f"into pk__in {format_value(branch.queryset)}"
+                for branch in step.merged
+            )
+            if step.cached:
+                lines.append("     cached: yes")
+        lines.append("EAV lookups:")
+        for lookup in self.lookups:
+            selectivity = (
+                "unknown" if lookup.selectivity is None else f"{lookup.selectivity:.1%}"
+            )
+            lines.append(
+                f"  {lookup.key} on {lookup.column}: {lookup.strategy}, "
+                + f"selectivity {selectivity}",
+            )
+        lines.append("EAV orderings:")
+        lines.extend(
+            f"  eav__{ordering.slug}: {ordering.rows} values"
+            for ordering in self.orderings
+        )
+        lines.extend(["SQL:", f"  {self.sql}", "Plan:"])
+        lines.extend(f"  {line}" for line in self.plan.splitlines())
+        lines.append("Warnings:")
+        lines.extend(f"  - {warning}" for warning in self.warnings)
+        return "\n".join(lines)
+
+
+def format_value(value) -> str:
+    """Returns the repr of *value*, without evaluating querysets."""
+    if isinstance(value, QuerySet):
+        return f"<{value.model.__name__} subquery>"
+    if isinstance(value, Exists):
+        return f"EXISTS(<{value.query.model.__name__} subquery>)"
+    return repr(value)
+
+
+def format_node(node) -> str:
+    """Returns the text of *node*, a Q-expression or one of its children."""
+    if isinstance(node, Q):
+        children = ", ".join(format_node(child) for child in node.children)
+        text = f"({node.connector}: {children})"
+        return f"(NOT {text})" if node.negated else text
+    if isinstance(node, tuple):
+        key, value = node
+        return f"{key}={format_value(value)}"
+    return format_value(node)
+
+
+def format_call(method: str, args: tuple, kwargs: dict) -> str:
+    """Returns the text of the call of *method* with *args* and *kwargs*."""
+    arguments = [format_node(arg) for arg in args]
+    arguments.extend(f"{key}={format_value(value)}" for key, value in kwargs.items())
+    return f"{method}({', '.join(arguments)})"
+
+
+def leaves(nodes, *, negated=False) -> Iterator[tuple[str, object, bool]]:
+    """
+    Yields the key and value of the lookups in *nodes* and whether they are
+    under a negation.
+    """
+    for node in nodes:
+        if isinstance(node, Q):
+            yield from leaves(node.children, negated=negated or node.negated)
+        elif isinstance(node, tuple):
+            yield (*node, negated)
+
+
+def planned_lookup(key: str, value, compiled, strategy: str) -> PlannedLookup:
+    """
+    Returns the :class:`PlannedLookup` of *key*, compiled to *compiled* (see
+    :func:`~eav.queryset.compile_eav_lookup`), matching *value* with
+    *strategy*.
+    """
+    name = compiled.value_key.split("__")[0]
+    return PlannedLookup(
+        key=key,
+        column=Value._meta.get_field(name).column,  # noqa: SLF001
+        strategy=strategy,
+        selectivity=compiled.selectivity(value),
+    )
+
+
+def _negation_warnings(model_cls, step: FilterStep) -> list[str]:
+    if step.method != "filter":
+        return []
+    eav_attr = model_cls._eav_config_cls.eav_attr  # noqa: SLF001
+    keys = [
+        key
+        for key, _, negated in leaves(step.args)
+        if negated and key.split("__")[0] == eav_attr
+    ]
+    return [
+        f"filter() negates {key} per value row, not per entity: entities "
+        + f"with other values still match. Use exclude({key}=...) instead."
+        for key in dict.fromkeys(keys)
+    ]
+
+
+def _index_warnings(queryset, lookups: list[PlannedLookup]) -> list[str]:
+    if not lookups:
+        return []
+    table = Value._meta.db_table  # noqa: SLF001
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    attribute = Value._meta.get_field("attribute").column  # noqa: SLF001
+    # An index helps if it starts with the column, or the attribute and it.
+    indexed = set()
+    for constraint in constraints.values():
+        columns = constraint["columns"] or []
+        if columns and (constraint["index"] or constraint["unique"]):
+            indexed.add(columns[0])
+            if columns[0] == attribute and len(columns) > 1:
+                indexed.add(columns[1])
+
+    missing = dict.fromkeys(
+        lookup.column for lookup in lookups if lookup.column not in indexed
+    )
+    return [
+        f"No index on {table}.{column}: the lookups on it scan the values "
+        + f"of the attribute. Consider an index on ({attribute}, {column})."
+        for column in missing
+    ]
+
+
+def explain_eav(queryset, **options) -> EavExplanation:
+    """
+    Returns the :class:`EavExplanation` of *queryset*, passing *options* to
+    ``QuerySet.explain()`` (e.g. ``analyze=True`` on PostgreSQL). The
+    lookups are reported as they were planned when filtering, and the SQL and
+    plan are empty if the queryset can't match anything.
+    """
+    model_cls = queryset.model
+    filters = [step for step in queryset._eav_steps if isinstance(step, FilterStep)]  # noqa: SLF001
+    orderings = [step for step in queryset._eav_steps if isinstance(step, OrderStep)]  # noqa: SLF001
+
+    lookups = []
+    warnings = []
+    for step in filters:
+        lookups.extend(step.lookups)
+        warnings.extend(_negation_warnings(model_cls, step))
+    warnings.extend(
+        f"order_by('eav__{ordering.slug}') loaded {ordering.rows} values when "
+        + "it was called and orders with a CASE of as many branches."
+        for ordering in orderings
+    )
+    warnings.extend(_index_warnings(queryset, lookups))
+
+    try:
+        sql = str(queryset.query)
+        plan = queryset.explain(**options)
+    except EmptyResultSet:
+        sql = plan = ""
+
+    return EavExplanation(
+        filters=filters,
+        orderings=orderings,
+        lookups=lookups,
+        sql=sql,
+        plan=plan,
+        warnings=warnings,
+    )
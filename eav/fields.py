@@ -1,8 +1,17 @@
-from django.core.exceptions import ValidationError
-from django.db import models
+from __future__ import annotations
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, FullResultSet, ValidationError
+from django.db import DEFAULT_DB_ALIAS, models, router
+from django.db.models import Count
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
 from django.utils.translation import gettext_lazy as _
 
 from eav.forms import CSVFormField
+from eav.identity import identity_map
+from eav.schema import schema_cache
+from eav.settings import CSV_ITEMS
 
 
 class EavDatatypeField(models.CharField):
@@ -37,6 +46,45 @@ class EavDatatypeField(models.CharField):
             )
 
 
+class IdentityMapDescriptor(ForwardManyToOneDescriptor):
+    """
+    Resolves a foreign key through :data:`~eav.identity.identity_map` when
+    its target isn't cached on the instance yet, loading missing targets
+    from the :mod:`schema cache <eav.schema>` if it is enabled.
+    """
+
+    def get_object(self, instance):
+        model_cls = self.field.related_model
+        pk = getattr(instance, self.field.attname)
+        using = router.db_for_read(model_cls, instance=instance)
+
+        def load():
+            schema = schema_cache.get() if using == DEFAULT_DB_ALIAS else None
+            obj = schema.get(model_cls, pk) if schema else None
+            return (
+                super(IdentityMapDescriptor, self).get_object(instance)
+                if obj is None
+                else obj
+            )
+
+        return identity_map.get_or_load(model_cls, pk, load, using=using)
+
+
+class IdentityMapForeignKey(models.ForeignKey):
+    """
+    A ``ForeignKey`` resolving its target through
+    :data:`~eav.identity.identity_map`, used for the attribute, enum value
+    and interned text of :class:`~eav.models.Value`.
+    """
+
+    forward_related_accessor_class = IdentityMapDescriptor
+
+    def deconstruct(self):
+        # Only the access changes, migrations see a plain ForeignKey.
+        name, _, args, kwargs = super().deconstruct()
+        return name, "django.db.models.ForeignKey", args, kwargs
+
+
 class CSVField(models.TextField):  # (models.Field):
     description = _("A Comma-Separated-Value field.")
     default_separator = ";"
@@ -81,3 +129,153 @@ class CSVField(models.TextField):  # (models.Field):
     def value_to_string(self, obj):
         value = self.value_from_object(obj)
         return self.get_prep_value(value)
+
+
+def csv_items_enabled() -> bool:
+    """
+    Tell whether ``EAV2_CSV_ITEMS`` is set, storing the items of csv values
+    in the indexed :class:`~eav.models.CSVItem` table.
+    """
+    return getattr(settings, "EAV2_CSV_ITEMS", CSV_ITEMS)
+
+
+class CSVItemsLookup(models.Lookup):
+    """
+    Base of the membership lookups of :class:`CSVField`, matching the values
+    having all (*match_all*) or any of the items of the right-hand side.
+
+    With ``EAV2_CSV_ITEMS`` set, the items are looked up in the index of
+    :class:`~eav.models.CSVItem`. Otherwise, the items are matched between
+    the separators of the text, which scans the values.
+    """
+
+    prepare_rhs = False
+    match_all = True
+
+    def items(self) -> list[str]:
+        return list(dict.fromkeys(str(item) for item in self.rhs))
+
+    def as_sql(self, compiler, connection):
+        items = self.items()
+        if not items:
+            raise FullResultSet if self.match_all else EmptyResultSet
+        if csv_items_enabled():
+            return self.items_sql(items, compiler, connection)
+        return self.text_sql(items, compiler, connection)
+
+    def items_sql(self, items, compiler, connection):
+        matching = apps.get_model("eav", "CSVItem").objects.filter(item__in=items)
+        if self.match_all and len(items) > 1:
+            matching = (
+                matching.values("value_id")
+                .annotate(matched=Count("item", distinct=True))
+                .filter(matched=len(items))
+            )
+        query = matching.values("value_id").query
+        sql, params = query.get_compiler(connection=connection).as_sql()
+        pk = self.lhs.output_field.model._meta.pk.get_col(self.lhs.alias)  # noqa: SLF001
+        pk_sql, pk_params = compiler.compile(pk)
+        return f"{pk_sql} IN ({sql})", (*pk_params, *params)
+
+    def text_sql(self, items, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        separator = self.lhs.output_field.separator
+        like = connection.operators["contains"] % "%s"
+        conditions = []
+        params = []
+        for item in items:
+            escaped = connection.ops.prep_for_like_query(item)
+            conditions.append(
+                f"({lhs_sql} = %s OR {lhs_sql} {like} "
+                + f"OR {lhs_sql} {like} OR {lhs_sql} {like})",
+            )
+            params.extend(
+                [
+                    *lhs_params,
+                    item,
+                    *lhs_params,
+                    f"{escaped}{separator}%",
+                    *lhs_params,
+                    f"%{separator}{escaped}",
+                    *lhs_params,
+                    f"%{separator}{escaped}{separator}%",
+                ],
+            )
+        connector = " AND " if self.match_all else " OR "
+        return f"({connector.join(conditions)})", params
+
+
+@CSVField.register_lookup
+class HasLookup(CSVItemsLookup):
+    """``value_csv__has='x'``: the values having the item ``x``."""
+
+    lookup_name = "has"
+
+    def items(self) -> list[str]:
+        return [str(self.rhs)]
+
+
+@CSVField.register_lookup
+class HasAnyLookup(CSVItemsLookup):
+    """``value_csv__has_any=[...]``: the values having any of the items."""
+
+    lookup_name = "has_any"
+    match_all = False
+
+
+@CSVField.register_lookup
+class HasAllLookup(CSVItemsLookup):
+    """``value_csv__has_all=[...]``: the values having all of the items."""
+
+    lookup_name = "has_all"
+
+
+class BitmaskField(models.BigIntegerField):
+    """
+    The bitmask of the members of an :class:`~eav.models.EnumGroup` selected
+    by a *multi* attribute, see :meth:`~eav.models.EnumGroup.encode`. Has the
+    ``has``, ``has_any`` and ``has_all`` lookups, taking masks.
+    """
+
+    description = _("A bitmask of enum values.")
+
+
+class BitmaskLookup(models.Lookup):
+    """
+    Base of the lookups of :class:`BitmaskField`, matching the masks having
+    all (*match_all*) or any of the bits of the right-hand side mask.
+    """
+
+    match_all = True
+
+    def as_sql(self, compiler, connection):
+        if not self.rhs:
+            raise FullResultSet if self.match_all else EmptyResultSet
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        bits = connection.ops.combine_expression("&", [lhs_sql, rhs_sql])
+        if self.match_all:
+            return f"{bits} = {rhs_sql}", (*lhs_params, *rhs_params, *rhs_params)
+        return f"{bits} <> 0", (*lhs_params, *rhs_params)
+
+
+@BitmaskField.register_lookup
+class BitmaskHasLookup(BitmaskLookup):
+    """``value_multi__has=mask``: the masks with all the bits of ``mask``."""
+
+    lookup_name = "has"
+
+
+@BitmaskField.register_lookup
+class BitmaskHasAllLookup(BitmaskLookup):
+    """``value_multi__has_all=mask``: same as ``has``."""
+
+    lookup_name = "has_all"
+
+
+@BitmaskField.register_lookup
+class BitmaskHasAnyLookup(BitmaskLookup):
+    """``value_multi__has_any=mask``: the masks with any bit of ``mask``."""
+
+    lookup_name = "has_any"
+    match_all = False
@@ -0,0 +1,161 @@
+"""
+This module contains the optional cache of EAV filter results.
+
+Filters like ``eav__category='x', eav__active=True`` that are evaluated over
+and over against data that rarely changes can store the primary keys of the
+entities they match in a Django cache, see
+:meth:`~eav.queryset.EavQuerySet.cache_eav_filter`. Setting
+``EAV2_FILTER_CACHE`` to the alias of a cache enables it.
+
+Every entry is tagged with a version token for each attribute the filter
+depends on. Writing the values of an attribute through ``Value.save()``,
+``Value.delete()``, :meth:`Entity.save <eav.models.Entity.save>`,
+:meth:`Attribute.save_value <eav.models.Attribute.save_value>` or the
+``update()``, ``delete()``, ``bulk_create()`` and ``bulk_update()`` methods
+of ``Value`` querysets deletes the token of that attribute, which invalidates
+every entry tagged with it. Any change to the attributes or enum values
+invalidates all entries at once. Results read in a transaction are cached
+once it is committed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import uuid
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+SCHEMA_TAG_KEY = "eav:filter:schema"
+ATTRIBUTE_TAG_KEY = "eav:filter:attribute:{id}"
+RESULT_KEY = "eav:filter:{ct}:{digest}"
+
+
+class FilterCache:
+    """
+    Filter results stored in the Django cache with the *alias* given, which
+    defaults to the ``EAV2_FILTER_CACHE`` setting. Disabled if it is None.
+    """
+
+    def __init__(self, alias: str | None = None):
+        self._alias = alias
+
+    @property
+    def alias(self) -> str | None:
+        if self._alias is not None:
+            return self._alias
+        return getattr(settings, "EAV2_FILTER_CACHE", None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.alias is not None
+
+    def _tags(self, cache, attribute_ids: Iterable[int], found: dict) -> dict:
+        keys = [
+            SCHEMA_TAG_KEY,
+            *(ATTRIBUTE_TAG_KEY.format(id=pk) for pk in sorted(attribute_ids)),
+        ]
+        missing = [key for key in keys if key not in found]
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+        if missing:
+            # Another process may have added the same tag first.
+            found = {**found, **cache.get_many(missing)}
+        return {key: found.get(key) for key in keys}
+
+    def get_or_load(  # noqa: PLR0913
+        self,
+        ct_id: int,
+        predicate,
+        attribute_ids: Iterable[int],
+        load: Callable[[], Iterable],
+        *,
+        timeout=DEFAULT_TIMEOUT,
+        using: str = DEFAULT_DB_ALIAS,
+    ) -> list:
+        """
+        Return the primary keys of the entities of *ct_id* matching
+        *predicate*, a hashable description of the filter which depends on
+        the values of the attributes with *attribute_ids*. On a miss, *load*
+        is called and its result cached for *timeout* seconds. In a
+        transaction of the database *using*, it is cached once the
+        transaction is committed, since it may match values it wrote.
+        """
+        cache = caches[self.alias]
+        digest = hashlib.sha256(repr(predicate).encode()).hexdigest()
+        key = RESULT_KEY.format(ct=ct_id, digest=digest)
+        attribute_ids = list(attribute_ids)
+        tag_keys = [ATTRIBUTE_TAG_KEY.format(id=pk) for pk in attribute_ids]
+
+        found = cache.get_many([key, SCHEMA_TAG_KEY, *tag_keys])
+        # Read the tags before loading, so that a write made meanwhile
+        # invalidates the entry stored below.
+        tags = self._tags(cache, attribute_ids, found)
+        entry = found.get(key)
+        if entry is not None and entry[0] == tags:
+            return entry[1]
+
+        pks = list(load())
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(
+                lambda: cache.set(key, (tags, pks), timeout=timeout),
+                using=using,
+            )
+        else:
+            cache.set(key, (tags, pks), timeout=timeout)
+        return pks
+
+    def invalidate(
+        self,
+        attribute_ids: Iterable[int],
+        using: str = DEFAULT_DB_ALIAS,
+    ) -> None:
+        """
+        Invalidate the entries depending on the attributes with
+        *attribute_ids*, now and, in a transaction, once it is committed,
+        since other processes may cache the results they read before.
+        """
+        if not self.enabled:
+            return
+        keys = [ATTRIBUTE_TAG_KEY.format(id=pk) for pk in set(attribute_ids)]
+        if not keys:
+            return
+        cache = caches[self.alias]
+        cache.delete_many(keys)
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(lambda: cache.delete_many(keys), using=using)
+
+    def clear(self) -> None:
+        """Invalidate all entries."""
+        if self.enabled:
+            caches[self.alias].delete(SCHEMA_TAG_KEY)
+
+
+#: The filter result cache.
+filter_cache = FilterCache()
+
+
+def _schema_changed(sender, using, **kwargs):
+    if filter_cache.enabled:
+        filter_cache.clear()
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(filter_cache.clear, using=using)
+
+
+def _m2m_changed(sender, action, using, **kwargs):
+    if sender._meta.app_label == "eav" and action.startswith("post_"):  # noqa: SLF001
+        _schema_changed(sender, using)
+
+
+for _name in ("Attribute", "EnumGroup", "EnumValue"):
+    _uid = f"eav_filter_cache_{_name}"
+    post_save.connect(_schema_changed, sender=f"eav.{_name}", dispatch_uid=_uid)
+    post_delete.connect(_schema_changed, sender=f"eav.{_name}", dispatch_uid=_uid)
+m2m_changed.connect(_m2m_changed, dispatch_uid="eav_filter_cache_m2m")
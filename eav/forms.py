@@ -16,10 +16,12 @@ from django.forms import (
     IntegerField,
     JSONField,
     ModelForm,
+    MultipleChoiceField,
     SplitDateTimeField,
 )
 from django.utils.translation import gettext_lazy as _
 
+from eav.instrumentation import FORM, instrument
 from eav.widgets import CSVWidget
 
 
@@ -58,9 +60,9 @@ class BaseDynamicEntityForm(ModelForm):
 
     Mapping between attribute types and field classes is as follows:
 
-    =====  =============
+    =====  ===================
     Type      Field
-    =====  =============
+    =====  ===================
     text   CharField
     float  IntegerField
     int    DateTimeField
@@ -69,7 +71,8 @@ class BaseDynamicEntityForm(ModelForm):
     enum   ChoiceField
     json   JSONField
     csv    CSVField
-    =====  =============
+    multi  MultipleChoiceField
+    =====  ===================
     """
 
     FIELD_CLASSES: ClassVar[dict[str, Field]] = {
@@ -81,6 +84,7 @@ class BaseDynamicEntityForm(ModelForm):
         "enum": ChoiceField,
         "json": JSONField,
         "csv": CSVFormField,
+        "multi": MultipleChoiceField,
     }
 
     def __init__(self, data=None, *args, **kwargs):
@@ -90,40 +94,60 @@ class BaseDynamicEntityForm(ModelForm):
         self._build_dynamic_fields()
 
     def _build_dynamic_fields(self):
-        # Reset form fields.
-        self.fields = deepcopy(self.base_fields)
-
-        for attribute in self.entity.get_all_attributes():
-            value = getattr(self.entity, attribute.slug)
-
-            defaults = {
-                "label": attribute.name.capitalize(),
-                "required": attribute.required,
-                "help_text": attribute.help_text,
-                "validators": attribute.get_validators(),
-            }
-
-            datatype = attribute.datatype
-
-            if datatype == attribute.TYPE_ENUM:
-                values = attribute.get_choices().values_list("id", "value")
-                choices = [("", ""), ("-----", "-----"), *list(values)]
-                defaults.update({"choices": choices})
-
-                if value:
-                    defaults.update({"initial": value.pk})
-
-            elif datatype == attribute.TYPE_DATE:
-                defaults.update({"widget": AdminSplitDateTime})
-            elif datatype == attribute.TYPE_OBJECT:
-                continue
-
-            MappedField = self.FIELD_CLASSES[datatype]  # noqa: N806
-            self.fields[attribute.slug] = MappedField(**defaults)
-
-            # Fill initial data (if attribute was already defined).
-            if value and datatype != attribute.TYPE_ENUM:
-                self.initial[attribute.slug] = value
+        with instrument(FORM, self.instance) as operation:
+            # Reset form fields.
+            self.fields = deepcopy(self.base_fields)
+
+            # Read all stored values at once rather than one query per attribute.
+            stored = self.entity.get_values_dict() if self.instance.pk else {}
+            operation.add_rows(len(stored))
+
+            for attribute in self.entity.get_all_attributes():
+                if self.entity._hasattr(attribute.slug):  # noqa: SLF001
+                    value = self.entity._getattr(attribute.slug)  # noqa: SLF001
+                else:
+                    value = stored.get(attribute.slug, attribute.get_default())
+
+                defaults = {
+                    "label": attribute.name.capitalize(),
+                    # Blank fields read as the default.
+                    "required": attribute.required and attribute.default is None,
+                    "help_text": attribute.help_text,
+                    "validators": attribute.get_validators(),
+                }
+
+                datatype = attribute.datatype
+
+                if datatype == attribute.TYPE_ENUM:
+                    values = attribute.get_choices().values_list("id", "value")
+                    choices = [("", ""), ("-----", "-----"), *list(values)]
+                    defaults.update({"choices": choices})
+
+                    if value:
+                        defaults.update({"initial": value.pk})
+
+                elif datatype == attribute.TYPE_MULTI_ENUM:
+                    values = attribute.get_choices().values_list("id", "value")
+                    defaults.update({"choices": list(values)})
+
+                    if value:
+                        defaults.update({"initial": [v.pk for v in value]})
+
+                elif datatype == attribute.TYPE_DATE:
+                    defaults.update({"widget": AdminSplitDateTime})
+                elif datatype == attribute.TYPE_OBJECT:
+                    continue
+
+                MappedField = self.FIELD_CLASSES[datatype]  # noqa: N806
+                self.fields[attribute.slug] = MappedField(**defaults)
+                operation.add_slugs(attribute.slug)
+
+                # Fill initial data (if attribute was already defined).
+                if value and datatype not in (
+                    attribute.TYPE_ENUM,
+                    attribute.TYPE_MULTI_ENUM,
+                ):
+                    self.initial[attribute.slug] = value
 
     def save(self, *, commit=True):
         """
@@ -147,6 +171,8 @@ class BaseDynamicEntityForm(ModelForm):
 
             if attribute.datatype == attribute.TYPE_ENUM:
                 value = attribute.enum_group.values.get(pk=value) if value else None
+            elif attribute.datatype == attribute.TYPE_MULTI_ENUM:
+                value = list(attribute.enum_group.values.filter(pk__in=value or []))
 
             setattr(self.entity, attribute.slug, value)
 
@@ -0,0 +1,259 @@
+"""
+This module contains the identity map sharing :class:`~eav.models.Attribute`
+and :class:`~eav.models.EnumValue` instances between values.
+
+A schema has a few hundred attributes at most, while a value table has
+millions of rows. Reading ``value.attribute`` (which :attr:`Value.value
+<eav.models.Value.value>` and ``str(value)`` do) would load the attribute
+again for every row that wasn't fetched with ``select_related()``. The
+``attribute``, ``value_enum`` and ``value_interned`` foreign keys of
+:class:`~eav.models.Value` resolve through :data:`identity_map` instead, so
+every attribute, enum value and interned text is loaded once and all values
+share the same instance.
+
+The map is safe to use from several threads and keeps the
+``EAV2_IDENTITY_MAP_SIZE`` (1024 by default) most recently used instances,
+``0`` disables it. Instances loaded inside a transaction are only shared
+with the other threads once it is committed, and are evicted if it (or the
+savepoint they were loaded in) is rolled back, as the rows they were read
+from may be gone. Saving or deleting an attribute or enum value evicts it;
+changes that bypass model signals, like ``QuerySet.update()`` or changes made
+by other processes, are only seen once the instance is evicted, e.g. with
+:func:`eav.schema.schema_changed` or ``identity_map.clear()``.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, TypeVar
+
+import django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.signals import post_delete, post_save
+
+from eav import settings as eav_settings
+
+if TYPE_CHECKING:
+    from django.db import models
+
+_M = TypeVar("_M", bound="models.Model")
+
+
+#: Whether this version of Django keeps its commit hooks as
+#: :func:`_commit_hooks` expects.
+_KNOWN_HOOKS = (5, 2) <= django.VERSION[:2] <= (6, 0)
+
+
+def _commit_hooks(connection) -> list | None:
+    """
+    Return the list of the hooks registered on *connection* by
+    ``transaction.on_commit()``, or None if it can't be read.
+
+    Django has no public API telling whether a hook is still registered:
+    rolling back a transaction, or a savepoint, silently drops the hooks
+    registered in it. This is the only place reading the private
+    ``run_on_commit`` list of ``(savepoint ids, func, robust)`` entries,
+    whose layout is checked for the Django versions of :data:`_KNOWN_HOOKS`.
+    These versions replace the list when they drop hooks, and only append to
+    it otherwise.
+    """
+    hooks = getattr(connection, "run_on_commit", None)
+    if not _KNOWN_HOOKS or not isinstance(hooks, list):
+        return None
+    return hooks
+
+
+class _Pending:
+    """
+    The commit hook of a transaction in which instances were mapped: it
+    stays registered on the connection until the transaction is committed,
+    and is dropped by a rollback.
+    """
+
+    def __init__(self, using: str):
+        self.using = using
+        self.committed = False
+        self.savepoints = list(connections[using].savepoint_ids)
+        self._thread = threading.get_ident()
+        # The list of commit hooks this one was last found in.
+        self._hooks = None
+
+    def __call__(self) -> None:
+        self.committed = True
+        self._hooks = None
+
+    def hooked(self) -> bool | None:
+        """
+        Return whether the hook is still registered, None if that can't be
+        told (see :func:`_commit_hooks`).
+        """
+        hooks = _commit_hooks(connections[self.using])
+        if hooks is None:
+            return None
+        # Hooks are only appended to the list the connection holds, so the
+        # list is only scanned once it was replaced.
+        if hooks is not self._hooks:
+            found = any(entry[1] is self for entry in hooks)
+            self._hooks = hooks if found else None
+        return self._hooks is not None
+
+    def valid(self) -> bool:
+        """Return whether what was read in the transaction can be used."""
+        if self.committed:
+            return True
+        # Not committed yet: the other threads can't see these rows.
+        return threading.get_ident() == self._thread and bool(self.hooked())
+
+    def rolled_back(self) -> bool:
+        """
+        Return whether the transaction was rolled back, or may have been if
+        that can't be told.
+        """
+        return (
+            not self.committed
+            and threading.get_ident() == self._thread
+            and not self.hooked()
+        )
+
+
+_local = threading.local()
+
+
+def uncommitted(using: str) -> _Pending | None:
+    """
+    Return the commit hook of the transaction open on the database *using*,
+    or None outside of transactions. What is read from the database in the
+    transaction is only valid as long as ``hook.valid()`` is true.
+    """
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        return None
+    pending = getattr(_local, using, None)
+    if (
+        pending is None
+        or pending.committed
+        or pending.savepoints != connection.savepoint_ids
+        or pending.hooked() is False
+    ):
+        pending = _Pending(using)
+        connection.on_commit(pending)
+        setattr(_local, using, pending)
+    return pending
+
+
+class IdentityMap:
+    """
+    A bounded, least recently used map of model instances, keyed by model,
+    database and primary key. *maxsize* defaults to the
+    ``EAV2_IDENTITY_MAP_SIZE`` setting.
+    """
+
+    def __init__(self, maxsize: int | None = None):
+        self._maxsize = maxsize
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        if self._maxsize is not None:
+            return self._maxsize
+        return getattr(
+            settings,
+            "EAV2_IDENTITY_MAP_SIZE",
+            eav_settings.IDENTITY_MAP_SIZE,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(model_cls, pk, using) -> tuple:
+        return (model_cls._meta.label_lower, using or DEFAULT_DB_ALIAS, pk)  # noqa: SLF001
+
+    def get(self, model_cls: type[_M], pk, using: str | None = None) -> _M | None:
+        """Return the mapped *model_cls* instance with *pk*, or None."""
+        key = self._key(model_cls, pk, using)
+        with self._lock:
+            obj, pending = self._entries.get(key, (None, None))
+            if pending is not None and not pending.valid():
+                if pending.rolled_back():
+                    del self._entries[key]
+                obj = None
+            if obj is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return obj
+
+    def add(self, obj: _M) -> _M:
+        """
+        Map *obj*, evicting the least recently used instance if the map is
+        full. If an instance with the same key is already mapped, it is kept
+        and returned instead of *obj*.
+        """
+        maxsize = self.maxsize
+        if maxsize <= 0 or obj.pk is None:
+            return obj
+
+        using = obj._state.db or DEFAULT_DB_ALIAS  # noqa: SLF001
+        key = self._key(type(obj), obj.pk, using)
+        pending = uncommitted(using)
+        with self._lock:
+            mapped, mapped_pending = self._entries.get(key, (None, None))
+            if mapped is not None and (
+                mapped_pending is None or mapped_pending.valid()
+            ):
+                obj, pending = mapped, mapped_pending
+            self._entries[key] = (obj, pending)
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+        return obj
+
+    def get_or_load(
+        self,
+        model_cls: type[_M],
+        pk,
+        load: Callable[[], _M],
+        using: str | None = None,
+    ) -> _M:
+        """
+        Return the mapped *model_cls* instance with *pk*, calling *load* and
+        mapping its result if there is none.
+        """
+        obj = self.get(model_cls, pk, using)
+        if obj is None:
+            # Loaded without holding the lock; if another thread loaded the
+            # same instance meanwhile, add() returns the one it mapped.
+            obj = self.add(load())
+        return obj
+
+    def discard(self, model_cls: type, pk, using: str | None = None) -> None:
+        """Evict the *model_cls* instance with *pk*, if it is mapped."""
+        with self._lock:
+            self._entries.pop(self._key(model_cls, pk, using), None)
+
+    def clear(self) -> None:
+        """Evict all instances and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+#: The map used by the foreign keys of :class:`~eav.models.Value`.
+identity_map = IdentityMap()
+
+
+def _evict(sender, instance, using, **kwargs):
+    identity_map.discard(sender, instance.pk, using)
+
+
+for _model in ("eav.Attribute", "eav.EnumValue", "eav.InternedText"):
+    post_save.connect(_evict, sender=_model, dispatch_uid=f"eav_identity_{_model}")
+    post_delete.connect(_evict, sender=_model, dispatch_uid=f"eav_identity_{_model}")
@@ -0,0 +1,284 @@
+"""
+This module contains hooks reporting how much work each EAV operation does.
+
+Every instrumented call site is wrapped in :func:`instrument`, which measures
+the number of SQL statements executed, the number of EAV rows touched and the
+elapsed time, and hands an :class:`OperationStats` to every subscriber::
+
+    from eav import instrumentation
+
+    instrumentation.subscribe(instrumentation.LoggingSubscriber())
+
+When nothing is subscribed and no :func:`collect` block is active,
+:func:`instrument` returns a shared no-op context manager, so the hooks cost
+next to nothing.
+
+To look at the operations performed by a block of code, use :func:`collect`::
+
+    with instrumentation.collect() as stats:
+        patient.eav.age
+
+    stats.queries  # -> 2
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+READ = "read"
+WRITE = "write"
+VALIDATE = "validate"
+FILTER = "filter"
+ORDER = "order"
+PREFETCH = "prefetch"
+FORM = "form"
+
+#: All operations reported through :func:`instrument`.
+OPERATIONS = (READ, WRITE, VALIDATE, FILTER, ORDER, PREFETCH, FORM)
+
+logger = logging.getLogger(__name__)
+
+_subscribers: list[Callable[[OperationStats], None]] = []
+
+#: Collections of the :func:`collect` blocks active in the current context.
+_collections: ContextVar[tuple[Collection, ...]] = ContextVar(
+    "eav_instrumentation_collections",
+    default=(),
+)
+
+#: Innermost operation being measured in the current context, if any.
+_current: ContextVar[Operation | None] = ContextVar(
+    "eav_instrumentation_current",
+    default=None,
+)
+
+
+@dataclass(frozen=True)
+class OperationStats:
+    """What a single instrumented EAV operation cost."""
+
+    operation: str
+    slugs: tuple[str, ...]
+    content_type: ContentType | None
+    queries: int
+    rows: int
+    elapsed: float
+
+    def __str__(self) -> str:
+        ct = (
+            f"{self.content_type.app_label}.{self.content_type.model}"
+            if self.content_type
+            else "-"
+        )
+        return (
+            f"eav {self.operation} {ct} [{', '.join(self.slugs)}]: "
+            + f"{self.queries} queries, {self.rows} rows, "
+            + f"{self.elapsed * 1000:.2f}ms"
+        )
+
+
+class _NoOp:
+    """Returned by :func:`instrument` when nothing is subscribed."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+    def __bool__(self) -> bool:
+        return False
+
+    def add_slugs(self, *slugs: str) -> None:
+        pass
+
+    def add_rows(self, rows: int) -> None:
+        pass
+
+
+_NOOP = _NoOp()
+
+
+class Operation(_NoOp):
+    """
+    An operation being measured. Call sites use :meth:`add_slugs` and
+    :meth:`add_rows` to report what they worked on.
+    """
+
+    __slots__ = (
+        "_stack",
+        "_start",
+        "_token",
+        "content_type",
+        "operation",
+        "queries",
+        "rows",
+        "slugs",
+    )
+
+    def __init__(self, operation: str, content_type, slugs: Iterable[str]) -> None:
+        self.operation = operation
+        self.content_type = content_type
+        self.slugs = list(slugs)
+        self.queries = 0
+        self.rows = 0
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._count))
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self._start
+        self._stack.close()
+        _current.reset(self._token)
+
+        stats = OperationStats(
+            operation=self.operation,
+            slugs=tuple(dict.fromkeys(self.slugs)),
+            content_type=_get_content_type(self.content_type),
+            queries=self.queries,
+            rows=self.rows,
+            elapsed=elapsed,
+        )
+        for collection in _collections.get():
+            collection.operations.append(stats)
+        for subscriber in _subscribers[:]:
+            subscriber(stats)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def _count(self, execute, sql, params, many, context):
+        # Queries of nested operations are theirs only.
+        if _current.get() is self:
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+    def add_slugs(self, *slugs: str) -> None:
+        self.slugs.extend(slugs)
+
+    def add_rows(self, rows: int) -> None:
+        self.rows += rows
+
+
+def _get_content_type(content_type):
+    """Accept a ``ContentType``, a model class or a model instance."""
+    if content_type is None or isinstance(content_type, ContentType):
+        return content_type
+    return ContentType.objects.get_for_model(content_type)
+
+
+def instrument(operation: str, content_type=None, slugs: Iterable[str] = ()):
+    """
+    Return a context manager measuring *operation* on the entities of
+    *content_type* (a ``ContentType`` or a model) and the attributes in
+    *slugs*.
+
+    The context manager yields an :class:`Operation`, or a falsy no-op
+    stand-in when nobody is listening; call sites can test it to skip
+    collecting details nobody will see.
+
+    An operation started while the same kind of operation is already being
+    measured (a filter issued while expanding another filter, say) is
+    accounted to the outer one and not reported separately. An operation of
+    another kind is reported on its own, and its queries are not counted
+    again by the outer one, so that they add up.
+    """
+    if not _subscribers and not _collections.get():
+        return _NOOP
+    current = _current.get()
+    if current is not None and current.operation == operation:
+        return _NOOP
+    return Operation(operation, content_type, slugs)
+
+
+def subscribe(subscriber: Callable[[OperationStats], None]) -> None:
+    """Call *subscriber* with the :class:`OperationStats` of every operation."""
+    _subscribers.append(subscriber)
+
+
+def unsubscribe(subscriber: Callable[[OperationStats], None]) -> None:
+    """Stop calling *subscriber*. Unknown subscribers are ignored."""
+    try:
+        _subscribers.remove(subscriber)
+    except ValueError:
+        pass
+
+
+class LoggingSubscriber:
+    """
+    Subscriber writing every operation to the ``eav.instrumentation`` logger
+    (or *logger*) at *level*.
+    """
+
+    def __init__(self, logger=logger, level: int = logging.DEBUG) -> None:
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, stats: OperationStats) -> None:
+        self.logger.log(
+            self.level,
+            "%s",
+            stats,
+            extra={"eav_operation": stats},
+        )
+
+
+@dataclass
+class Collection:
+    """The operations recorded by :func:`collect`."""
+
+    operations: list[OperationStats] = field(default_factory=list)
+
+    def __iter__(self):
+        return iter(self.operations)
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    @property
+    def queries(self) -> int:
+        return sum(stats.queries for stats in self.operations)
+
+    @property
+    def rows(self) -> int:
+        return sum(stats.rows for stats in self.operations)
+
+    @property
+    def elapsed(self) -> float:
+        return sum(stats.elapsed for stats in self.operations)
+
+    def filter(self, operation: str) -> list[OperationStats]:
+        """Return the recorded stats of *operation* only."""
+        return [stats for stats in self.operations if stats.operation == operation]
+
+
+@contextmanager
+def collect() -> Iterator[Collection]:
+    """
+    Record the operations performed inside the ``with`` block (and only in
+    the current thread or task) into the yielded :class:`Collection`.
+    """
+    collection = Collection()
+    token = _collections.set((*_collections.get(), collection))
+    try:
+        yield collection
+    finally:
+        _collections.reset(token)
@@ -0,0 +1,83 @@
+"""
+Compression of large ``text`` and ``json`` values.
+
+Attributes with a :attr:`~eav.models.Attribute.compression` store the values
+at least ``EAV2_COMPRESSION_THRESHOLD`` bytes long (serialized, for JSON)
+compressed in :attr:`~eav.models.Value.value_compressed`, leaving their
+regular column empty. :attr:`Value.value <eav.models.Value.value>`
+compresses and decompresses them transparently; compressed values can't be
+filtered nor ordered on.
+
+A compressed value is the name of its codec, a colon and the compressed
+bytes, so that values stay readable when the attribute's compression
+changes. The ``eav_compress`` management command rewrites stored values to
+match the compression of their attributes.
+"""
+
+from __future__ import annotations
+
+import json
+import lzma
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from eav.settings import COMPRESSION_THRESHOLD
+
+#: Codecs by name, as (compress, decompress) functions of bytes.
+CODECS = {
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+#: Datatypes whose values can be compressed.
+COMPRESSIBLE = ("text", "json")
+
+
+def compression_threshold() -> int:
+    """Return the size in bytes from which values are compressed."""
+    return getattr(settings, "EAV2_COMPRESSION_THRESHOLD", COMPRESSION_THRESHOLD)
+
+
+def serialize(datatype, value) -> bytes:
+    """Return the bytes of *value*, of a compressible *datatype*."""
+    if datatype == "json":
+        return json.dumps(value, cls=DjangoJSONEncoder).encode()
+    return str(value).encode()
+
+
+def deserialize(datatype, data: bytes):
+    """Return the value of *datatype* serialized as *data*."""
+    if datatype == "json":
+        return json.loads(data)
+    return data.decode()
+
+
+def compress(codec: str, datatype, value) -> bytes | None:
+    """
+    Return *value*, of *datatype*, compressed with *codec*, or None if it's
+    shorter than :func:`compression_threshold`.
+    """
+    data = serialize(datatype, value)
+    if len(data) < compression_threshold():
+        return None
+    return codec.encode() + b":" + CODECS[codec][0](data)
+
+
+def decompress(datatype, blob):
+    """Return the value of *datatype* compressed as *blob*."""
+    codec, _, data = bytes(blob).partition(b":")
+    return deserialize(datatype, CODECS[codec.decode()][1](data))
+
+
+def recompress(values, batch_size=1000) -> int:
+    """
+    Rewrite the :class:`~eav.models.Value` objects of *values*, a queryset,
+    *batch_size* at a time, so that they are compressed as their attribute
+    requires. Returns the number of values rewritten.
+    """
+    return values.filter(attribute__datatype__in=COMPRESSIBLE).rewrite(
+        ["value_text", "value_json", "value_compressed", "value_interned"],
+        batch_size=batch_size,
+    )
@@ -0,0 +1,255 @@
+"""Synthetic EAV data, used by the ``eav_generate`` management command."""
+
+from __future__ import annotations
+
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.utils import timezone
+
+from eav.logic.entity_pk import get_entity_pk_type
+from eav.models import Attribute, EnumGroup, EnumValue, Value
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+#: Datatypes generated when no attribute counts are given (one of each).
+DEFAULT_DATATYPES = (
+    Attribute.TYPE_TEXT,
+    Attribute.TYPE_FLOAT,
+    Attribute.TYPE_INT,
+    Attribute.TYPE_DATE,
+    Attribute.TYPE_BOOLEAN,
+    Attribute.TYPE_ENUM,
+    Attribute.TYPE_JSON,
+    Attribute.TYPE_CSV,
+)
+
+_EPOCH = datetime(2020, 1, 1)  # noqa: DTZ001
+_WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf")
+
+
+@dataclass
+class Schema:
+    """The attributes values are generated for."""
+
+    attributes: list[Attribute]
+    enum_choices: dict[int, list[EnumValue]] = field(default_factory=dict)
+
+
+@dataclass
+class Stats:
+    """What :func:`generate` created and how long it took."""
+
+    entities: int = 0
+    values: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        rows = self.entities + self.values
+        return rows / self.seconds if self.seconds else 0.0
+
+
+def create_schema(
+    counts: dict[str, int],
+    enum_groups: int = 1,
+    enum_cardinality: int = 5,
+    prefix: str = "gen",
+) -> Schema:
+    """
+    Create (or reuse) *counts[datatype]* attributes of every datatype, named
+    ``<prefix>_<datatype>_<n>``, and *enum_groups* enum groups of
+    *enum_cardinality* values each, assigned to the enum and multi attributes
+    in turn.
+    """
+    groups = []
+    choices = {}
+    multi = bool(counts.get(Attribute.TYPE_MULTI_ENUM))
+    with_group = counts.get(Attribute.TYPE_ENUM) or multi
+    for index in range(enum_groups if with_group else 0):
+        group, _ = EnumGroup.objects.get_or_create(name=f"{prefix} enum {index}")
+        values = [
+            EnumValue.objects.get_or_create(value=f"{prefix}_{index}_{n}")[0]
+            for n in range(enum_cardinality)
+        ]
+        group.values.add(*values)
+        if multi:
+            # Give every value its bit up front, see make_sampler().
+            group.encode(values)
+        groups.append(group)
+        choices[group.pk] = values
+
+    attributes = []
+    for datatype, count in counts.items():
+        for index in range(count):
+            group = (
+                groups[index % len(groups)]
+                if datatype in (Attribute.TYPE_ENUM, Attribute.TYPE_MULTI_ENUM)
+                else None
+            )
+            attribute, _ = Attribute.objects.get_or_create(
+                slug=f"{prefix}_{datatype}_{index}",
+                defaults={
+                    "name": f"{prefix} {datatype} {index}",
+                    "datatype": datatype,
+                    "enum_group": group,
+                },
+            )
+            attributes.append(attribute)
+
+    return Schema(
+        attributes=attributes,
+        enum_choices={
+            a.pk: choices[a.enum_group_id] for a in attributes if a.enum_group_id
+        },
+    )
+
+
+def make_sampler(
+    attribute: Attribute,
+    rnd: random.Random,
+    choices: list[EnumValue] | None = None,
+) -> Callable[[], object]:
+    """
+    Return a function producing random values for *attribute*, picking enum
+    values from *choices*. Multi attributes get the bitmask of a random
+    subset of *choices*, as stored. Object attributes are not supported.
+    """
+    if attribute.datatype == Attribute.TYPE_MULTI_ENUM:
+        ordinals = attribute.enum_group.ordinals
+        bits = [1 << ordinals[str(choice.pk)] for choice in choices]
+        return lambda: sum(rnd.sample(bits, rnd.randrange(len(bits) + 1)))
+
+    samplers = {
+        Attribute.TYPE_TEXT: lambda: f"{rnd.choice(_WORDS)} {rnd.randrange(1000)}",
+        Attribute.TYPE_FLOAT: lambda: rnd.random() * 1000,
+        Attribute.TYPE_INT: lambda: rnd.randrange(1000),
+        Attribute.TYPE_DATE: lambda: _date(rnd.randrange(365 * 24 * 3600)),
+        Attribute.TYPE_BOOLEAN: lambda: rnd.random() < 0.5,  # noqa: PLR2004
+        Attribute.TYPE_ENUM: lambda: rnd.choice(choices),
+        Attribute.TYPE_JSON: lambda: {
+            "size": rnd.randrange(10),
+            "tags": rnd.sample(_WORDS, 2),
+        },
+        Attribute.TYPE_CSV: lambda: rnd.sample(_WORDS, 2),
+    }
+    return samplers[attribute.datatype]
+
+
+def _date(seconds: int) -> datetime:
+    value = _EPOCH + timedelta(seconds=seconds)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def _batches(total: int, size: int) -> Iterator[range]:
+    for start in range(0, total, size):
+        yield range(start, min(start + size, total))
+
+
+def _create_entities(model_cls, numbers, rnd, fields):
+    instances = []
+    pk_field = model_cls._meta.pk  # noqa: SLF001
+    for number in numbers:
+        instance = model_cls(
+            **{name: value.format(n=number) for name, value in fields.items()},
+        )
+        if isinstance(pk_field, models.UUIDField):
+            # Derive the key from the seed, so runs are reproducible.
+            instance.pk = uuid.UUID(int=rnd.getrandbits(128), version=4)
+        instances.append(instance)
+
+    created = model_cls.objects.bulk_create(instances)
+    if created and created[0].pk is None:
+        # The backend doesn't return generated keys, read them back.
+        pks = model_cls.objects.order_by("-pk").values_list("pk", flat=True)
+        for instance, pk in zip(created, reversed(pks[: len(created)])):
+            instance.pk = pk
+    return created
+
+
+def generate(  # noqa: PLR0913
+    model_cls: type[models.Model],
+    schema: Schema,
+    entities: int,
+    *,
+    sparsity: float = 0.0,
+    batch_size: int = 1000,
+    seed: int = 0,
+    fields: dict[str, str] | None = None,
+    progress=None,
+) -> Stats:
+    """
+    Create *entities* instances of *model_cls* with random values for the
+    *schema* attributes, leaving each value out with probability *sparsity*.
+
+    Instances and values are written with ``bulk_create`` in batches of
+    *batch_size*, each batch in its own transaction. *fields* maps model
+    fields to ``str.format()`` templates receiving the entity number as
+    ``n``. *progress* is called with the running :class:`Stats` after every
+    batch. The same *seed* generates the same data.
+    """
+    rnd = random.Random(seed)  # noqa: S311
+    ct = ContentType.objects.get_for_model(model_cls)
+    entity_field = get_entity_pk_type(model_cls)
+    stats = Stats()
+    start = time.perf_counter()
+
+    samplers = [
+        (
+            attribute,
+            f"value_{attribute.datatype}",
+            None
+            if attribute.datatype == Attribute.TYPE_OBJECT
+            else make_sampler(attribute, rnd, schema.enum_choices.get(attribute.pk)),
+        )
+        for attribute in schema.attributes
+    ]
+
+    pending = []
+
+    def flush():
+        Value.objects.bulk_create(pending, batch_size=batch_size)
+        stats.values += len(pending)
+        pending.clear()
+
+    for numbers in _batches(entities, batch_size):
+        with transaction.atomic():
+            instances = _create_entities(model_cls, numbers, rnd, fields or {})
+            stats.entities += len(instances)
+
+            for instance in instances:
+                for attribute, field_name, sampler in samplers:
+                    if sparsity and rnd.random() < sparsity:
+                        continue
+                    if sampler is None:
+                        # Object attributes point to a random generated entity.
+                        target = rnd.choice(instances)
+                        extra = {"generic_value_ct": ct, "generic_value_id": target.pk}
+                    else:
+                        extra = {field_name: sampler()}
+                    pending.append(
+                        Value(
+                            entity_ct=ct,
+                            attribute=attribute,
+                            **{entity_field: instance.pk},
+                            **extra,
+                        ),
+                    )
+                    if len(pending) >= batch_size:
+                        flush()
+            flush()
+
+        stats.seconds = time.perf_counter() - start
+        if progress:
+            progress(stats)
+
+    stats.seconds = time.perf_counter() - start
+    return stats
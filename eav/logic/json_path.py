@@ -0,0 +1,113 @@
+"""
+Key-path lookups on the values of ``json`` attributes.
+
+``eav__<slug>__<key>__<key>__<op>`` filters on the value at the key path
+``<key>.<key>`` of the JSON values of ``<slug>``. The filters are compiled so
+that the indexes built by the ``eav_json_index`` management command can be
+used:
+
+* on PostgreSQL, ``exact`` lookups of scalars use JSONB containment
+  (``@>``), served by a GIN index, and other lookups the ``#>`` path
+  operator of Django's key transforms, served by an expression index;
+* on SQLite, scalar lookups compare ``JSON_EXTRACT(value_json, '$."k"."k"')``,
+  with the path inlined so that it matches an expression index;
+* other lookups, and other databases, use Django's key transforms.
+"""
+
+from __future__ import annotations
+
+from django.db import models
+from django.db.models import F, Func, Q
+from django.db.models.fields.json import KeyTransform
+
+#: The field of :class:`~eav.models.Value` storing JSON values.
+JSON_FIELD = "value_json"
+
+_OUTPUT_FIELDS = (
+    (bool, models.BooleanField),
+    (int, models.IntegerField),
+    (float, models.FloatField),
+    (str, models.TextField),
+)
+
+
+def split_json_path(parts) -> tuple[tuple[str, ...], str]:
+    """
+    Return the keys and the lookup of the key path *parts*, the lookup being
+    ``exact`` unless the last part names one.
+    """
+    parts = tuple(parts)
+    lookups = {*KeyTransform.get_lookups(), *models.JSONField.get_lookups()}
+    if parts and parts[-1] in lookups:
+        return parts[:-1], parts[-1]
+    return parts, "exact"
+
+
+def _inlinable(keys) -> bool:
+    # Array indexes and quotes are left to Django's key transforms.
+    return all(
+        key and not key.isdigit() and '"' not in key and "'" not in key for key in keys
+    )
+
+
+class JSONExtract(Func):
+    """
+    ``JSON_EXTRACT(<expression>, '$."key"."key"')`` on SQLite, with the path
+    inlined, so that it can match an expression index.
+    """
+
+    function = "JSON_EXTRACT"
+
+    def __init__(self, expression, keys, **extra):
+        self.keys = tuple(keys)
+        super().__init__(expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        path = "$" + "".join(f'."{key}"' for key in self.keys)
+        return f"{self.function}({sql}, '{path}')", params
+
+
+def _output_field(lookup, value):
+    """Return the field of the scalar compared by *lookup* to *value*."""
+    sample = value
+    if lookup == "in" and isinstance(value, (list, tuple)):
+        sample = next(iter(value), None)
+    for python_type, field_cls in _OUTPUT_FIELDS:
+        if isinstance(sample, python_type):
+            return field_cls()
+    return None
+
+
+def json_path_condition(keys, lookup, value, vendor) -> Q:
+    """
+    Return the condition on :class:`~eav.models.Value` of the *lookup* of
+    *value* at the key path *keys*, for a database of *vendor*.
+    """
+    if vendor == "postgresql" and lookup == "exact" and _output_field(lookup, value):
+        nested = value
+        for key in reversed(keys):
+            nested = {key: nested}
+        return Q(**{f"{JSON_FIELD}__contains": nested})
+
+    if vendor == "sqlite" and lookup != "isnull" and _inlinable(keys):
+        output_field = _output_field(lookup, value)
+        # JSON_EXTRACT() returns booleans as 0 or 1, like numbers.
+        if isinstance(output_field, models.BooleanField):
+            output_field = None
+        lookup_cls = output_field and output_field.get_lookup(lookup)
+        if lookup_cls is not None:
+            extract = JSONExtract(F(JSON_FIELD), keys, output_field=output_field)
+            return Q(lookup_cls(extract, value))
+
+    return Q(**{"__".join((JSON_FIELD, *keys, lookup)): value})
+
+
+def json_path_expression(keys, vendor):
+    """
+    Return the expression compared by the key path lookups on *keys* that
+    aren't matched with containment, to index it.
+    """
+    if vendor == "sqlite" and _inlinable(keys):
+        return JSONExtract(F(JSON_FIELD), keys)
+    return F("__".join((JSON_FIELD, *keys)))
@@ -1,4 +1,12 @@
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import F
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+
+from eav.fields import CSVField, csv_items_enabled
+from eav.filter_cache import filter_cache
+from eav.logic.compression import COMPRESSIBLE
+from eav.snapshots import entity_cache
 
 
 class EnumValueManager(models.Manager):
@@ -62,7 +70,290 @@ class AttributeManager(models.Manager):
         return self.get(name=name, slug=slug)
 
 
-class ValueManager(models.Manager):
+class CSVItemManager(models.Manager):
+    """
+    Custom manager for `CSVItem` model.
+
+    This manager keeps the items of csv values in sync with them.
+    """
+
+    def sync(self, values):
+        """
+        Replace the stored items of the *values* of csv attributes, if
+        ``EAV2_CSV_ITEMS`` is set.
+        """
+        if not csv_items_enabled():
+            return
+        values = [
+            value
+            for value in values
+            if value.pk is not None and value.attribute.datatype == "csv"
+        ]
+        if not values:
+            return
+        manager = self.db_manager(values[0]._state.db)  # noqa: SLF001
+        manager.filter(value__in=[value.pk for value in values]).delete()
+        manager.bulk_create(
+            self.model(value_id=value.pk, item=item)
+            for value in values
+            for item in csv_items(value.value_csv)
+        )
+
+    def rebuild(self, batch_size=1000):
+        """
+        Store the items of all csv values, *batch_size* values at a time,
+        replacing the stored ones. Returns the number of items stored.
+        """
+        from eav.models import Value  # noqa: PLC0415
+
+        self.all().delete()
+        stored = 0
+        last = None
+        values = Value.objects.filter(attribute__datatype="csv").order_by("pk")
+        while True:
+            batch = values if last is None else values.filter(pk__gt=last)
+            batch = list(batch.values_list("pk", "value_csv")[:batch_size])
+            if not batch:
+                return stored
+            items = self.bulk_create(
+                self.model(value_id=pk, item=item)
+                for pk, value in batch
+                for item in csv_items(value)
+            )
+            stored += len(items)
+            last = batch[-1][0]
+
+
+class InternedTextManager(models.Manager):
+    """
+    Custom manager for `InternedText` model.
+
+    This manager interns the strings of dictionary encoded attributes.
+    """
+
+    def intern(self, attribute, text):
+        """
+        Return the :class:`~eav.models.InternedText` of *text* for
+        *attribute*, creating it if needed, or None if *text* is too long to
+        be interned.
+        """
+        text = str(text)
+        if len(text) > self.model._meta.get_field("text").max_length:  # noqa: SLF001
+            return None
+        interned, _ = self.db_manager(attribute._state.db).get_or_create(  # noqa: SLF001
+            attribute=attribute,
+            text=text,
+        )
+        return interned
+
+
+def _update_returning(connection):
+    """Return whether *connection* supports ``UPDATE ... RETURNING``."""
+    return (
+        connection.vendor in {"postgresql", "sqlite"}
+        and connection.features.can_return_columns_from_insert
+    )
+
+
+def csv_items(value):
+    """Return the distinct, non-empty items of the csv *value*."""
+    return [item for item in dict.fromkeys(CSVField().to_python(value)) if item]
+
+
+#: Fields of :class:`~eav.models.Value` loaded whatever the datatype: what
+#: identifies the value, and what saving it writes besides the value.
+VALUE_IDENTITY_FIELDS = (
+    "id",
+    "attribute",
+    "entity_ct",
+    "entity_id",
+    "entity_uuid",
+    "modified",
+)
+
+
+def value_fields(datatype):
+    """Return the fields of :class:`~eav.models.Value` storing *datatype*."""
+    if datatype == "object":
+        return ("generic_value_ct", "generic_value_id")
+    if datatype == "text":
+        return ("value_text", "value_compressed", "value_interned")
+    if datatype in COMPRESSIBLE:
+        return (f"value_{datatype}", "value_compressed")
+    return (f"value_{datatype}",)
+
+
+class ValueQuerySet(models.QuerySet):
+    """
+    Custom queryset for `Value` model.
+
+    Set-based writes delete the entity snapshots and invalidate the filter
+    results depending on the values they change, see :mod:`eav.snapshots`
+    and :mod:`eav.filter_cache`, and keep the items of csv values in sync,
+    see :class:`~eav.models.CSVItem`.
+    """
+
+    def _written_rows(self):
+        return list(
+            self.order_by()
+            .values_list("entity_ct_id", "entity_id", "entity_uuid", "attribute_id")
+            .distinct(),
+        )
+
+    def _invalidate(self, rows):
+        rows = list(rows)
+        entity_cache.invalidate_rows((row[:3] for row in rows), self.db)
+        filter_cache.invalidate((row[3] for row in rows), self.db)
+
+    def _sync_csv_items(self, values):
+        from eav.models import CSVItem  # noqa: PLC0415
+
+        CSVItem.objects.sync(values)
+
+    def only_datatypes(self, datatypes):
+        """
+        Load only the fields identifying the values and those storing
+        *datatypes*, see :func:`value_fields`, deferring the other value
+        columns, such as large text and JSON ones, until they're accessed.
+        """
+        fields = dict.fromkeys(
+            field for datatype in datatypes for field in value_fields(datatype)
+        )
+        return self.only(*VALUE_IDENTITY_FIELDS, *fields)
+
+    def rewrite(self, fields, batch_size=1000):
+        """
+        Assign the values their own value again, *batch_size* at a time, and
+        store the *fields* of those that changed, to rewrite the values stored
+        before their attribute changed how it stores them. Returns the number
+        of values rewritten.
+        """
+        attnames = [self.model._meta.get_field(f).attname for f in fields]  # noqa: SLF001
+        values = self.select_related("attribute").order_by("pk")
+        rewritten = 0
+        last = None
+        while True:
+            batch = values if last is None else values.filter(pk__gt=last)
+            batch = list(batch[:batch_size])
+            if not batch:
+                return rewritten
+            changed = []
+            for value in batch:
+                stored = [getattr(value, attname) for attname in attnames]
+                value.value = value.value
+                value._intern()  # noqa: SLF001
+                if [getattr(value, attname) for attname in attnames] != stored:
+                    changed.append(value)
+            self.model.objects.bulk_update(changed, fields)
+            rewritten += len(changed)
+            last = batch[-1].pk
+
+    def increment(self, column, amount):
+        """
+        Add *amount* to the *column* of the values, ``value_int`` or
+        ``value_float``, with one ``UPDATE``. Returns the new values by
+        entity primary key, read in the same statement with ``RETURNING``
+        where the database supports it, in the same transaction otherwise.
+        """
+        updates = {column: F(column) + amount, "modified": timezone.now()}
+        fields = ("entity_ct_id", "entity_id", "entity_uuid", "attribute_id", column)
+        connection = connections[self.db]
+        if not _update_returning(connection):
+            with transaction.atomic(using=self.db):
+                self.update(**updates)
+                rows = list(self.values_list(*fields))
+        else:
+            query = self.query.chain(UpdateQuery)
+            query.add_update_values(updates)
+            update_sql, params = query.get_compiler(self.db).as_sql()
+            returning = ", ".join(
+                connection.ops.quote_name(self.model._meta.get_field(f).column)  # noqa: SLF001
+                for f in fields
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"{update_sql} RETURNING {returning}", params)
+                to_uuid = self.model._meta.get_field("entity_uuid").to_python  # noqa: SLF001
+                rows = [
+                    (ct_id, entity_id, to_uuid(entity_uuid), *rest)
+                    for ct_id, entity_id, entity_uuid, *rest in cursor.fetchall()
+                ]
+            self._invalidate(row[:4] for row in rows)
+        return {
+            entity_id if entity_uuid is None else entity_uuid: value
+            for _, entity_id, entity_uuid, _, value in rows
+        }
+
+    def mutate(self, mutation):
+        """
+        Apply *mutation*, one of the mutations of :mod:`eav.logic.mutations`,
+        to the values in place: with one ``UPDATE`` where the database can
+        compute it, otherwise by reading, changing and writing the values in
+        a transaction. Returns the number of values changed.
+        """
+        column = f"value_{mutation.datatype}"
+        now = timezone.now()
+        expression = mutation.expression(column, connections[self.db].vendor)
+        if expression is not None:
+            return self.update(**{column: expression, "modified": now})
+
+        with transaction.atomic(using=self.db):
+            values = list(
+                self.select_for_update().only(*VALUE_IDENTITY_FIELDS, column),
+            )
+            for value in values:
+                setattr(value, column, mutation.apply(getattr(value, column)))
+                value.modified = now
+            self.model.objects.bulk_update(values, [column, "modified"])
+        return len(values)
+
+    def update(self, **kwargs):
+        cached = entity_cache.active or filter_cache.enabled
+        csv = "value_csv" in kwargs and csv_items_enabled()
+        if not (cached or csv):
+            return super().update(**kwargs)
+        rows = self._written_rows() if cached else []
+        pks = list(self.values_list("pk", flat=True)) if csv else []
+        updated = super().update(**kwargs)
+        if cached:
+            self._invalidate(rows)
+        if "attribute" in kwargs or "attribute_id" in kwargs:
+            filter_cache.clear()
+        if csv:
+            self._sync_csv_items(self.model.objects.filter(pk__in=pks))
+        return updated
+
+    def delete(self):
+        if not (entity_cache.active or filter_cache.enabled):
+            return super().delete()
+        rows = self._written_rows()
+        deleted = super().delete()
+        self._invalidate(rows)
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for value in objs:
+            value._intern()  # noqa: SLF001
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._invalidate(v._written_row() for v in objs)  # noqa: SLF001
+        self._sync_csv_items(objs)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if {"value_text", "value_interned"} <= set(fields):
+            for value in objs:
+                value._intern()  # noqa: SLF001
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        self._invalidate(v._written_row() for v in objs)  # noqa: SLF001
+        self._sync_csv_items(objs)
+        return updated
+
+
+class ValueManager(models.Manager.from_queryset(ValueQuerySet)):
     """
     Custom manager for `Value` model.
 
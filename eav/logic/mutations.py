@@ -0,0 +1,190 @@
+"""
+In-place changes of stored ``json`` and ``csv`` values.
+
+Adding a key to a large JSON document, or an item to a CSV list, by
+assigning the attribute reads the whole value, changes it in Python and
+writes it back, and loses the changes made meanwhile by other writers. The
+mutations of this module are applied by the database instead, with one
+``UPDATE`` of the values (see :meth:`~eav.logic.managers.ValueQuerySet.mutate`):
+
+* :class:`JSONMerge` sets top-level keys of JSON objects, with the JSONB
+  ``||`` operator on PostgreSQL and ``JSON_SET()`` on SQLite;
+* :class:`JSONRemoveKey` removes a top-level key, with the JSONB ``-``
+  operator on PostgreSQL and ``JSON_REMOVE()`` on SQLite;
+* :class:`CSVAppend` and :class:`CSVRemove` append and remove items with
+  string functions, on every database.
+
+On other databases, the JSON mutations read, change and write the values in
+a transaction, locking them with ``SELECT ... FOR UPDATE`` where supported.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Case, F, Func, Q, TextField, When
+from django.db.models import Value as Constant
+from django.db.models.functions import Concat, Greatest, Length, Replace, Substr
+from django.utils.translation import gettext_lazy as _
+
+from eav.fields import CSVField
+
+#: Separator of the items of stored CSV values.
+CSV_SEPARATOR = CSVField.default_separator
+
+#: Databases on which the JSON mutations are compiled to SQL.
+JSON_VENDORS = frozenset(("postgresql", "sqlite"))
+
+
+def _path(key: str) -> str:
+    return f'$."{key}"'
+
+
+class _JSONSet(Func):
+    """Set the top-level keys of a JSON object to the values of *patch*."""
+
+    def __init__(self, expression, patch, **extra):
+        self.patch = patch
+        super().__init__(expression, **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        patch = json.dumps(self.patch, cls=DjangoJSONEncoder)
+        return f"(COALESCE({sql}, '{{}}'::jsonb) || %s::jsonb)", (*params, patch)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        pairs = []
+        for key, value in self.patch.items():
+            pairs.extend((_path(key), json.dumps(value, cls=DjangoJSONEncoder)))
+        sets = ", ".join(["%s, JSON(%s)"] * len(self.patch))
+        return f"JSON_SET(COALESCE({sql}, '{{}}'), {sets})", (*params, *pairs)
+
+
+class _JSONRemove(Func):
+    """Remove the top-level *key* of a JSON object."""
+
+    def __init__(self, expression, key, **extra):
+        self.key = key
+        super().__init__(expression, **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"({sql} - %s)", (*params, self.key)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"JSON_REMOVE({sql}, %s)", (*params, _path(self.key))
+
+
+def _sql_key(key: str) -> bool:
+    # Keys with quotes can't be written in SQLite JSON paths.
+    return '"' not in key
+
+
+@dataclass(frozen=True)
+class JSONMerge:
+    """Set the top-level keys of JSON objects to the values of *patch*."""
+
+    patch: dict
+
+    datatype = "json"
+    #: Value created for the entities without one, None to skip them.
+    start = {}  # noqa: RUF012
+
+    def expression(self, column, vendor):
+        """
+        Return the expression of the new value of *column* on a database of
+        *vendor*, or None if it has to be computed in Python.
+        """
+        if vendor not in JSON_VENDORS or not all(map(_sql_key, self.patch)):
+            return None
+        return _JSONSet(F(column), self.patch)
+
+    def apply(self, value):
+        """Return the new python *value*."""
+        return {**(value or {}), **self.patch}
+
+
+@dataclass(frozen=True)
+class JSONRemoveKey:
+    """Remove the top-level *key* of JSON objects."""
+
+    key: str
+
+    datatype = "json"
+    start = None
+
+    def expression(self, column, vendor):
+        if vendor not in JSON_VENDORS or not _sql_key(self.key):
+            return None
+        return _JSONRemove(F(column), self.key)
+
+    def apply(self, value):
+        if not isinstance(value, dict):
+            return value
+        return {k: v for k, v in value.items() if k != self.key}
+
+
+def _check_item(item: str) -> None:
+    if not item or CSV_SEPARATOR in item:
+        raise ValidationError(
+            _("CSV items must be non-empty and can't contain %(sep)s")
+            % {"sep": CSV_SEPARATOR},
+        )
+
+
+@dataclass(frozen=True)
+class CSVAppend:
+    """Append *item* to CSV values."""
+
+    item: str
+
+    datatype = "csv"
+    start = ""
+
+    def __post_init__(self):
+        _check_item(self.item)
+
+    def expression(self, column, vendor):
+        empty = Q(**{f"{column}__isnull": True}) | Q(**{column: ""})
+        return Case(
+            When(empty, then=Constant(self.item)),
+            default=Concat(
+                F(column),
+                Constant(CSV_SEPARATOR + self.item),
+                output_field=TextField(),
+            ),
+            output_field=TextField(),
+        )
+
+    def apply(self, value):
+        return [*(value or []), self.item]
+
+
+@dataclass(frozen=True)
+class CSVRemove:
+    """Remove every occurrence of *item* from CSV values."""
+
+    item: str
+
+    datatype = "csv"
+    start = None
+
+    def __post_init__(self):
+        _check_item(self.item)
+
+    def expression(self, column, vendor):
+        # ";a;x;b;" -> ";a;b;" -> "a;b". Replacing twice also removes
+        # adjacent occurrences, which share their separator.
+        separator = Constant(CSV_SEPARATOR)
+        target = Constant(CSV_SEPARATOR + self.item + CSV_SEPARATOR)
+        padded = Concat(separator, F(column), separator, output_field=TextField())
+        removed = Replace(Replace(padded, target, separator), target, separator)
+        return Substr(removed, 2, Greatest(Length(removed) - 2, Constant(0)))
+
+    def apply(self, value):
+        return [item for item in value or [] if item != self.item]
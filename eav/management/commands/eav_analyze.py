@@ -0,0 +1,61 @@
+"""Collect the attribute statistics used to plan EAV filters."""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from eav.planner import analyze
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the row counts, distinct value counts, null ratios and most "
+        + "common values of every attribute, per registered model, for the "
+        + "EAV filter planner. Run it periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="Models to analyze, as app_label.ModelName. Defaults to all "
+            + "models with values.",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Number of most common values to keep per attribute.",
+        )
+
+    def handle(self, *args, **options):
+        model_classes = None
+        if options["models"]:
+            try:
+                model_classes = [apps.get_model(name) for name in options["models"]]
+            except (LookupError, ValueError) as err:
+                raise CommandError(err) from err
+            for model_cls, name in zip(model_classes, options["models"]):
+                if not hasattr(model_cls, "_eav_config_cls"):
+                    raise CommandError(f"{name} is not registered with eav.")
+        if options["top"] < 0:
+            raise CommandError("--top can't be negative.")
+
+        stored = analyze(model_classes, top=options["top"])
+
+        if options["verbosity"] > 1:
+            for statistics in stored:
+                self.stdout.write(
+                    f"{statistics.attribute.slug} "
+                    + f"({statistics.entity_ct.app_label}."
+                    + f"{statistics.entity_ct.model}): "
+                    + f"{statistics.row_count} rows, "
+                    + f"{statistics.distinct_count} distinct, "
+                    + f"{statistics.null_ratio:.0%} null",
+                )
+        models = {statistics.entity_ct_id for statistics in stored}
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Analyzed {len(stored)} attribute statistics "
+                + f"of {len(models)} models.",
+            ),
+        )
@@ -0,0 +1,50 @@
+"""Compress the stored values of attributes as their compression requires."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from eav.logic.compression import COMPRESSIBLE, recompress
+from eav.models import Attribute, Value
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the stored text and JSON values, in batches, so that they "
+        + "are compressed as the compression of their attribute requires: "
+        + "compressing them after it is set or changed, decompressing them "
+        + "after it is removed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "slugs",
+            nargs="*",
+            help="Slugs of the attributes to rewrite. Defaults to all.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of values read and written at a time.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        attributes = Attribute.objects.filter(datatype__in=COMPRESSIBLE)
+        if options["slugs"]:
+            attributes = attributes.filter(slug__in=options["slugs"])
+            unknown = set(options["slugs"]) - set(
+                attributes.values_list("slug", flat=True),
+            )
+            if unknown:
+                raise CommandError(
+                    "No text or JSON attribute " + ", ".join(sorted(unknown)) + ".",
+                )
+
+        rewritten = recompress(
+            Value.objects.filter(attribute__in=attributes),
+            batch_size=options["batch_size"],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Rewrote {rewritten} values."))
@@ -0,0 +1,32 @@
+"""Store the items of csv values for the has, has_any and has_all lookups."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from eav.fields import csv_items_enabled
+from eav.models import CSVItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the items of all csv values in the indexed CSVItem table, in "
+        + "batches, replacing the stored ones. Run it after setting "
+        + "EAV2_CSV_ITEMS on a database with csv values."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of values read and stored at a time.",
+        )
+
+    def handle(self, *args, **options):
+        if not csv_items_enabled():
+            raise CommandError("EAV2_CSV_ITEMS is not set.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        stored = CSVItem.objects.rebuild(batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} csv items."))
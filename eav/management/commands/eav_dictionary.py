@@ -0,0 +1,50 @@
+"""Intern the stored text values of attributes as their encoding requires."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from eav.logic.managers import value_fields
+from eav.models import Attribute, Value
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the stored text values, in batches, so that they are "
+        + "dictionary encoded as their attribute requires: interning them "
+        + "after dictionary encoding is turned on, storing them as plain "
+        + "text after it is turned off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "slugs",
+            nargs="*",
+            help="Slugs of the attributes to rewrite. Defaults to all.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of values read and written at a time.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        attributes = Attribute.objects.filter(datatype=Attribute.TYPE_TEXT)
+        if options["slugs"]:
+            attributes = attributes.filter(slug__in=options["slugs"])
+            unknown = set(options["slugs"]) - set(
+                attributes.values_list("slug", flat=True),
+            )
+            if unknown:
+                raise CommandError(
+                    "No text attribute " + ", ".join(sorted(unknown)) + ".",
+                )
+
+        rewritten = Value.objects.filter(attribute__in=attributes).rewrite(
+            value_fields(Attribute.TYPE_TEXT),
+            batch_size=options["batch_size"],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Rewrote {rewritten} values."))
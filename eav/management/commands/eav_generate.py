@@ -0,0 +1,153 @@
+"""Populate a registered model with synthetic EAV data for load testing."""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from eav.logic.entity_pk import get_entity_pk_type
+from eav.logic.generate import DEFAULT_DATATYPES, create_schema, generate
+from eav.models import Attribute
+from eav.models.enum_group import MAX_ORDINALS
+
+
+def _pair(value):
+    name, sep, rest = value.partition("=")
+    if not sep or not name:
+        raise ValueError(value)
+    return name, rest
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a synthetic attribute schema and populate an EAV-registered "
+        + "model with generated entities and values, using bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "model",
+            help="Registered model to populate, as app_label.ModelName.",
+        )
+        parser.add_argument("--entities", type=int, default=1000)
+        parser.add_argument(
+            "--attributes",
+            action="append",
+            type=_pair,
+            metavar="DATATYPE=COUNT",
+            help="Number of attributes of a datatype (may be given more than "
+            + "once). Defaults to one attribute of every datatype but object "
+            + "and multi.",
+        )
+        parser.add_argument(
+            "--enum-groups",
+            type=int,
+            default=1,
+            help="Number of enum groups shared by the enum and multi attributes.",
+        )
+        parser.add_argument(
+            "--enum-cardinality",
+            type=int,
+            default=5,
+            help="Number of values in every enum group.",
+        )
+        parser.add_argument(
+            "--sparsity",
+            type=float,
+            default=0.0,
+            help="Probability of an entity having no value for an attribute.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--prefix",
+            default="gen",
+            help="Prefix of the generated attribute slugs and enum groups.",
+        )
+        parser.add_argument(
+            "--field",
+            action="append",
+            type=_pair,
+            default=[],
+            metavar="NAME=TEMPLATE",
+            help="Value of a model field, formatted with the entity number as "
+            + '{n}, e.g. --field "name=patient {n}".',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            model_cls = apps.get_model(options["model"])
+        except (LookupError, ValueError) as err:
+            raise CommandError(err) from err
+
+        if not hasattr(model_cls, "_eav_config_cls"):
+            raise CommandError(f"{options['model']} is not registered with eav.")
+
+        counts = self._get_counts(options["attributes"])
+        integer_keys = get_entity_pk_type(model_cls) == "entity_id"
+        if counts.get(Attribute.TYPE_OBJECT) and not integer_keys:
+            raise CommandError(
+                "object attributes can only point to models with integer keys.",
+            )
+        if not 0 <= options["sparsity"] < 1:
+            raise CommandError("--sparsity must be at least 0 and below 1.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        if (
+            counts.get(Attribute.TYPE_MULTI_ENUM)
+            and options["enum_cardinality"] > MAX_ORDINALS
+        ):
+            raise CommandError(
+                f"--enum-cardinality can't exceed {MAX_ORDINALS} with multi "
+                + "attributes.",
+            )
+
+        schema = create_schema(
+            counts,
+            enum_groups=options["enum_groups"],
+            enum_cardinality=options["enum_cardinality"],
+            prefix=options["prefix"],
+        )
+        verbosity = options["verbosity"]
+
+        def progress(stats):
+            if verbosity > 1:
+                self.stdout.write(
+                    f"{stats.entities} entities, {stats.values} values "
+                    + f"({stats.rows_per_second:,.0f} rows/s)",
+                )
+
+        stats = generate(
+            model_cls,
+            schema,
+            options["entities"],
+            sparsity=options["sparsity"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            fields=dict(options["field"]),
+            progress=progress,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {stats.entities} {model_cls.__name__} entities and "
+                + f"{stats.values} values for {len(schema.attributes)} attributes "
+                + f"in {stats.seconds:.2f}s ({stats.rows_per_second:,.0f} rows/s).",
+            ),
+        )
+
+    def _get_counts(self, pairs):
+        if not pairs:
+            return dict.fromkeys(DEFAULT_DATATYPES, 1)
+
+        datatypes = {choice for choice, _ in Attribute.DATATYPE_CHOICES}
+        counts = {}
+        for datatype, count in pairs:
+            if datatype not in datatypes:
+                raise CommandError(
+                    f"Unknown datatype {datatype!r}, "
+                    + f"choose from {', '.join(sorted(datatypes))}.",
+                )
+            try:
+                counts[datatype] = int(count)
+            except ValueError as err:
+                raise CommandError(f"Invalid attribute count {count!r}.") from err
+        return counts
@@ -0,0 +1,90 @@
+"""Build the indexes used by the key-path lookups of a json attribute."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.backends.utils import names_digest
+from django.db.models import Q
+
+from eav.logic.json_path import JSON_FIELD, json_path_expression
+from eav.models import Attribute, Value
+
+
+def json_index(attribute, keys, vendor):
+    """
+    Return the partial index on the values of the json *attribute* for the
+    key path *keys*, or for containment if empty, on a *vendor* database.
+    """
+    name = f"eav_json_{attribute.pk}_{names_digest(*keys, length=8)}"
+    condition = Q(attribute_id=attribute.pk)
+    if keys:
+        # Leading with the attribute lets the planner pick it on small tables.
+        return models.Index(
+            models.F("attribute"),
+            json_path_expression(keys, vendor),
+            name=name,
+            condition=condition,
+        )
+    if vendor != "postgresql":
+        raise CommandError("Indexes without --key need PostgreSQL.")
+    from django.contrib.postgres.indexes import GinIndex, OpClass  # noqa: PLC0415
+
+    return GinIndex(
+        OpClass(models.F(JSON_FIELD), name="jsonb_path_ops"),
+        name=name,
+        condition=condition,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Create (or drop) partial indexes on the values of a json attribute: "
+        + "a GIN index for the containment lookups on PostgreSQL, or an "
+        + "expression index per --key path for its comparison lookups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("slug", help="Slug of the json attribute.")
+        parser.add_argument(
+            "--key",
+            action="append",
+            default=[],
+            dest="keys",
+            help="Key path to index, as key__key (may be given more than "
+            + "once). Defaults to a GIN index of the values on PostgreSQL.",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop the indexes instead of creating them.",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        try:
+            attribute = Attribute.objects.using(options["database"]).get(
+                slug=options["slug"],
+            )
+        except Attribute.DoesNotExist as err:
+            raise CommandError(f'No attribute "{options["slug"]}".') from err
+        if attribute.datatype != Attribute.TYPE_JSON:
+            raise CommandError(f'"{attribute.slug}" is not a json attribute.')
+
+        connection = connections[options["database"]]
+        paths = [tuple(key.split("__")) for key in options["keys"]] or [()]
+        indexes = [json_index(attribute, keys, connection.vendor) for keys in paths]
+
+        with connection.cursor() as cursor:
+            existing = connection.introspection.get_constraints(
+                cursor,
+                Value._meta.db_table,  # noqa: SLF001
+            )
+        with connection.schema_editor() as schema_editor:
+            for index in indexes:
+                if options["drop"] and index.name in existing:
+                    schema_editor.remove_index(Value, index)
+                    self.stdout.write(f"Dropped {index.name}.")
+                elif not options["drop"] and index.name not in existing:
+                    schema_editor.add_index(Value, index)
+                    self.stdout.write(f"Created {index.name}.")
+                else:
+                    self.stdout.write(f"Skipped {index.name}.")
@@ -2,6 +2,7 @@
 This module contains the custom manager used by entities registered with eav.
 """
 
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
 from django.db import models
 
 from eav.queryset import EavQuerySet
@@ -43,6 +44,20 @@ class EntityManager(models.Manager):
         obj.save()
         return obj
 
+    def prefetch_eav(self, *slugs):
+        """
+        Return a queryset loading the EAV values of its entities in one
+        query. See :meth:`~eav.queryset.EavQuerySet.prefetch_eav`.
+        """
+        return self.get_queryset().prefetch_eav(*slugs)
+
+    def cache_eav_filter(self, timeout=DEFAULT_TIMEOUT):
+        """
+        Return a queryset caching the results of its EAV filters. See
+        :meth:`~eav.queryset.EavQuerySet.cache_eav_filter`.
+        """
+        return self.get_queryset().cache_eav_filter(timeout)
+
     def get_or_create(self, defaults=None, **kwargs):
         """
         Reproduces the behavior of get_or_create, eav friendly.
@@ -0,0 +1,62 @@
+"""This module contains the middleware of eav."""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from eav.nplusone import detect_n_plus_one
+from eav.unit_of_work import unit_of_work
+
+
+class NPlusOneMiddleware:
+    """
+    Detects N+1 EAV value loads while handling each request, see
+    :mod:`eav.nplusone`. Only active when ``DEBUG`` is on::
+
+        MIDDLEWARE = [
+            ...
+            'eav.middleware.NPlusOneMiddleware',
+        ]
+    """
+
+    def __init__(self, get_response) -> None:
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect_n_plus_one():
+            return self.get_response(request)
+
+
+class UnitOfWorkMiddleware:
+    """
+    Handles each request in a :func:`~eav.unit_of_work.unit_of_work`, so that
+    views, serializers and templates reading the same entity through
+    different instances load its values only once::
+
+        MIDDLEWARE = [
+            ...
+            'eav.middleware.UnitOfWorkMiddleware',
+        ]
+
+    Supports both sync and async requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with unit_of_work():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with unit_of_work():
+            return await self.get_response(request)
@@ -0,0 +1,104 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Add the AttributeStatistics model collected by ``eav_analyze``."""
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("eav", "0012_add_value_uniqueness_checks"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttributeStatistics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "entity_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of entities of the content type.",
+                        verbose_name="Entity count",
+                    ),
+                ),
+                (
+                    "row_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of values stored for the attribute.",
+                        verbose_name="Row count",
+                    ),
+                ),
+                (
+                    "distinct_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of distinct non-null values.",
+                        verbose_name="Distinct count",
+                    ),
+                ),
+                (
+                    "null_ratio",
+                    models.FloatField(
+                        default=0.0,
+                        help_text="Share of the values that are null.",
+                        verbose_name="Null ratio",
+                    ),
+                ),
+                (
+                    "most_common",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Values, as strings, with their row counts.",
+                        verbose_name="Most common values",
+                    ),
+                ),
+                (
+                    "analyzed",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Analyzed",
+                    ),
+                ),
+                (
+                    "attribute",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statistics",
+                        to="eav.attribute",
+                        verbose_name="Attribute",
+                    ),
+                ),
+                (
+                    "entity_ct",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="contenttypes.contenttype",
+                        verbose_name="Entity content type",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Attribute statistics",
+                "verbose_name_plural": "Attribute statistics",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=["attribute", "entity_ct"],
+                        name="unique_statistics_per_attribute",
+                    ),
+                ],
+            },
+        ),
+    ]
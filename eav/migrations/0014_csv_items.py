@@ -0,0 +1,79 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def store_csv_items(apps, schema_editor):
+    """Store the items of the existing csv values, if EAV2_CSV_ITEMS is set."""
+    if not getattr(settings, "EAV2_CSV_ITEMS", False):
+        return
+    csv_item = apps.get_model("eav", "CSVItem")
+    value = apps.get_model("eav", "Value")
+    using = schema_editor.connection.alias
+
+    values = (
+        value.objects.using(using)
+        .filter(attribute__datatype="csv")
+        .order_by("pk")
+        .values_list("pk", "value_csv")
+    )
+    last = None
+    while True:
+        batch = values if last is None else values.filter(pk__gt=last)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            return
+        csv_item.objects.using(using).bulk_create(
+            csv_item(value_id=pk, item=item)
+            for pk, text in batch
+            for item in dict.fromkeys((text or "").split(";"))
+            if item
+        )
+        last = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+    """Add the CSVItem model, storing the items of csv values."""
+
+    dependencies = [
+        ("eav", "0013_attribute_statistics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CSVItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("item", models.TextField(verbose_name="Item")),
+                (
+                    "value",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="csv_items",
+                        to="eav.value",
+                        verbose_name="Value",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "CSV item",
+                "verbose_name_plural": "CSV items",
+                "indexes": [
+                    models.Index(
+                        fields=["item", "value"],
+                        name="eav_csvitem_item_value",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(store_csv_items, migrations.RunPython.noop),
+    ]
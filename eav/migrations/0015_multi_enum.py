@@ -0,0 +1,54 @@
+from django.db import migrations, models
+
+import eav.fields
+
+
+class Migration(migrations.Migration):
+    """Add the multi datatype, storing multiple selections as bitmasks."""
+
+    dependencies = [
+        ("eav", "0014_csv_items"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enumgroup",
+            name="ordinals",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Bit of each member in the masks of multiple selections.",
+                verbose_name="Ordinals",
+            ),
+        ),
+        migrations.AddField(
+            model_name="value",
+            name="value_multi",
+            field=eav.fields.BitmaskField(
+                blank=True,
+                null=True,
+                verbose_name="Value multiple selection",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="attribute",
+            name="datatype",
+            field=eav.fields.EavDatatypeField(
+                choices=[
+                    ("text", "Text"),
+                    ("date", "Date"),
+                    ("float", "Float"),
+                    ("int", "Integer"),
+                    ("bool", "True / False"),
+                    ("object", "Django Object"),
+                    ("enum", "Multiple Choice"),
+                    ("json", "JSON Object"),
+                    ("csv", "Comma-Separated-Value"),
+                    ("multi", "Multiple Selection"),
+                ],
+                max_length=6,
+                verbose_name="Data Type",
+            ),
+        ),
+    ]
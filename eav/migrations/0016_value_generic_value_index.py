@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Index the generic relation of values, matched by object filters."""
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("eav", "0015_multi_enum"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="value",
+            index=models.Index(
+                fields=["generic_value_ct", "generic_value_id"],
+                name="eav_value_generic_value",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Add the compression of large text and JSON values."""
+
+    dependencies = [
+        ("eav", "0016_value_generic_value_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attribute",
+            name="compression",
+            field=models.CharField(
+                blank=True,
+                choices=[("", "None"), ("zlib", "zlib"), ("lzma", "lzma")],
+                default="",
+                help_text=(
+                    "Compress large text and JSON values. Compressed values "
+                    + "can't be filtered nor ordered on."
+                ),
+                max_length=8,
+                verbose_name="Compression",
+            ),
+        ),
+        migrations.AddField(
+            model_name="value",
+            name="value_compressed",
+            field=models.BinaryField(
+                blank=True,
+                null=True,
+                verbose_name="Value compressed",
+            ),
+        ),
+    ]
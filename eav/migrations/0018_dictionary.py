@@ -0,0 +1,70 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Add the dictionary encoding of low-cardinality text attributes."""
+
+    dependencies = [
+        ("eav", "0017_compression"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InternedText",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("text", models.CharField(max_length=255, verbose_name="Text")),
+                (
+                    "attribute",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="interned_texts",
+                        to="eav.attribute",
+                        verbose_name="Attribute",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Interned text",
+                "verbose_name_plural": "Interned texts",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("attribute", "text"),
+                        name="unique_text_per_attribute",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="attribute",
+            name="dictionary",
+            field=models.BooleanField(
+                default=False,
+                help_text=(
+                    "Store each distinct text value once, and a key to it in "
+                    + "the values. Suits attributes with few distinct values."
+                ),
+                verbose_name="Dictionary encoded",
+            ),
+        ),
+        migrations.AddField(
+            model_name="value",
+            name="value_interned",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="eav_values",
+                to="eav.internedtext",
+                verbose_name="Value interned text",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Add the default of attributes, read for entities without a value."""
+
+    dependencies = [
+        ("eav", "0018_dictionary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attribute",
+            name="default",
+            field=models.JSONField(
+                blank=True,
+                encoder=django.core.serializers.json.DjangoJSONEncoder,
+                help_text=(
+                    "Value read for entities that have none stored. It is "
+                    + "not written to the values."
+                ),
+                null=True,
+                verbose_name="Default",
+            ),
+        ),
+    ]
@@ -1,25 +1,34 @@
 """
-This module defines the four concrete, non-abstract models:
+This module defines the seven concrete, non-abstract models:
     * :class:`Value`
     * :class:`Attribute`
     * :class:`EnumValue`
-    * :class:`EnumGroup`.
+    * :class:`EnumGroup`
+    * :class:`AttributeStatistics`
+    * :class:`CSVItem`
+    * :class:`InternedText`.
 
 Along with the :class:`Entity` helper class and :class:`EAVModelMeta`
 optional metaclass for each eav model class.
 """
 
 from .attribute import Attribute
+from .csv_item import CSVItem
 from .entity import EAVModelMeta, Entity
 from .enum_group import EnumGroup
 from .enum_value import EnumValue
+from .interned_text import InternedText
+from .statistics import AttributeStatistics
 from .value import Value
 
 __all__ = [
     "Attribute",
+    "AttributeStatistics",
+    "CSVItem",
     "EAVModelMeta",
     "Entity",
     "EnumGroup",
     "EnumValue",
+    "InternedText",
     "Value",
 ]
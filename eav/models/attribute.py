@@ -5,17 +5,27 @@ from typing import TYPE_CHECKING
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import ForeignKey
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import NotSupportedError, models
+from django.db.models import Exists, ForeignKey, OuterRef, QuerySet
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from eav.fields import EavDatatypeField
+from eav.logic.compression import COMPRESSIBLE
 from eav.logic.entity_pk import get_entity_pk_type
 from eav.logic.managers import AttributeManager
 from eav.logic.object_pk import get_pk_format
 from eav.logic.slug import SLUGFIELD_MAX_LENGTH, generate_slug
 from eav.settings import CHARFIELD_LENGTH
+from eav.tracing import (
+    CONTENT_TYPE,
+    SAVE_VALUE_SPAN,
+    SLUGS,
+    STRATEGY,
+    content_type_label,
+    start_span,
+)
 from eav.validators import (
     validate_bool,
     validate_csv,
@@ -24,6 +34,7 @@ from eav.validators import (
     validate_float,
     validate_int,
     validate_json,
+    validate_multi_enum,
     validate_object,
     validate_text,
 )
@@ -53,7 +64,7 @@ class Attribute(models.Model):
        to save or create any entity object for which this attribute applies,
        without first setting this EAV attribute.
 
-    There are 7 possible values for datatype:
+    There are 10 possible values for datatype:
 
         * int (TYPE_INT)
         * float (TYPE_FLOAT)
@@ -64,6 +75,7 @@ class Attribute(models.Model):
         * enum (TYPE_ENUM)
         * json (TYPE_JSON)
         * csv (TYPE_CSV)
+        * multi (TYPE_MULTI_ENUM)
 
 
     Examples::
@@ -99,6 +111,7 @@ class Attribute(models.Model):
     TYPE_ENUM = "enum"
     TYPE_JSON = "json"
     TYPE_CSV = "csv"
+    TYPE_MULTI_ENUM = "multi"
 
     DATATYPE_CHOICES = (
         (TYPE_TEXT, _("Text")),
@@ -110,6 +123,16 @@ class Attribute(models.Model):
         (TYPE_ENUM, _("Multiple Choice")),
         (TYPE_JSON, _("JSON Object")),
         (TYPE_CSV, _("Comma-Separated-Value")),
+        (TYPE_MULTI_ENUM, _("Multiple Selection")),
+    )
+
+    #: Datatypes whose attributes can have a :attr:`default`.
+    TYPES_WITH_DEFAULT = (TYPE_TEXT, TYPE_FLOAT, TYPE_INT, TYPE_DATE, TYPE_BOOLEAN)
+
+    COMPRESSION_CHOICES = (
+        ("", _("None")),
+        ("zlib", _("zlib")),
+        ("lzma", _("lzma")),
     )
 
     # Core attributes
@@ -171,6 +194,38 @@ class Attribute(models.Model):
         verbose_name=_("Choice Group"),
     )
 
+    compression = models.CharField(
+        max_length=8,
+        blank=True,
+        default="",
+        choices=COMPRESSION_CHOICES,
+        help_text=_(
+            "Compress large text and JSON values. Compressed values can't be "
+            + "filtered nor ordered on.",
+        ),
+        verbose_name=_("Compression"),
+    )
+
+    dictionary = models.BooleanField(
+        default=False,
+        help_text=_(
+            "Store each distinct text value once, and a key to it in the "
+            + "values. Suits attributes with few distinct values.",
+        ),
+        verbose_name=_("Dictionary encoded"),
+    )
+
+    default = models.JSONField(
+        blank=True,
+        null=True,
+        encoder=DjangoJSONEncoder,
+        help_text=_(
+            "Value read for entities that have none stored. It is not "
+            + "written to the values.",
+        ),
+        verbose_name=_("Default"),
+    )
+
     description = models.CharField(
         max_length=256,
         blank=True,
@@ -258,6 +313,7 @@ class Attribute(models.Model):
             "enum": validate_enum,
             "json": validate_json,
             "csv": validate_csv,
+            "multi": validate_multi_enum,
         }
 
         return [datatype_validators[self.datatype]]
@@ -279,22 +335,69 @@ class Attribute(models.Model):
                     % {"val": value, "attr": self},
                 )
 
+        if self.datatype == self.TYPE_MULTI_ENUM:
+            self.enum_group.members(value)
+
+    def get_default(self):
+        """
+        Return the :attr:`default` of this attribute as a python object of
+        its datatype, or None if it has none.
+        """
+        if self.default is None:
+            return None
+        field = Value._meta.get_field(f"value_{self.datatype}")  # noqa: SLF001
+        return field.to_python(self.default)
+
     def clean(self):
         """
         Validates the attribute.  Will raise ``ValidationError`` if the
-        attribute's datatype is *TYPE_ENUM* and enum_group is not set, or if
-        the attribute is not *TYPE_ENUM* and the enum group is set.
+        attribute's datatype is *TYPE_ENUM* or *TYPE_MULTI_ENUM* and
+        enum_group is not set, if the attribute has another datatype and the
+        enum group is set, if it's compressed but not *TYPE_TEXT* nor
+        *TYPE_JSON*, if it's dictionary encoded but not *TYPE_TEXT* or
+        compressed, or if its default isn't valid for its datatype.
         """
-        if self.datatype == self.TYPE_ENUM and not self.enum_group:
+        with_group = (self.TYPE_ENUM, self.TYPE_MULTI_ENUM)
+        if self.datatype in with_group and not self.enum_group:
             raise ValidationError(
                 _("You must set the choice group for multiple choice attributes"),
             )
 
-        if self.datatype != self.TYPE_ENUM and self.enum_group:
+        if self.datatype not in with_group and self.enum_group:
             raise ValidationError(
                 _("You can only assign a choice group to multiple choice attributes"),
             )
 
+        if self.compression and self.datatype not in COMPRESSIBLE:
+            raise ValidationError(
+                _("Only text and JSON attributes can be compressed"),
+            )
+
+        if self.dictionary and self.datatype != self.TYPE_TEXT:
+            raise ValidationError(
+                _("Only text attributes can be dictionary encoded"),
+            )
+
+        if self.dictionary and self.compression:
+            raise ValidationError(
+                _("Dictionary encoded attributes can't be compressed"),
+            )
+
+        if self.default is not None:
+            if self.datatype not in self.TYPES_WITH_DEFAULT:
+                raise ValidationError(
+                    _(
+                        "Only text, number, date and boolean attributes can "
+                        + "have a default",
+                    ),
+                )
+            try:
+                self.validate_value(self.get_default())
+            except ValidationError as err:
+                raise ValidationError(
+                    _("Invalid default: %(err)s") % {"err": err},
+                ) from err
+
     def clean_fields(self, exclude=None):
         """Perform field-specific validation on the model's fields.
 
@@ -319,27 +422,45 @@ class Attribute(models.Model):
     def get_choices(self):
         """
         Returns a query set of :class:`EnumValue` objects for this attribute.
-        Returns None if the datatype of this attribute is not *TYPE_ENUM*.
+        Returns None if the datatype of this attribute is not *TYPE_ENUM* or
+        *TYPE_MULTI_ENUM*.
         """
         return (
             self.enum_group.values.all()
-            if self.datatype == Attribute.TYPE_ENUM
+            if self.datatype in (Attribute.TYPE_ENUM, Attribute.TYPE_MULTI_ENUM)
             else None
         )
 
-    def save_value(self, entity, value):
+    def save_value(self, entity, value, value_obj=None):
         """
         Called with *entity*, any Django object registered with eav, and
         *value*, the :class:`Value` this attribute for *entity* should
         be set to.
 
         If a :class:`Value` object for this *entity* and attribute doesn't
-        exist, one will be created.
+        exist, one will be created. Callers that already loaded the existing
+        :class:`Value` can pass it as *value_obj* to skip the lookup.
 
         .. note::
            If *value* is None and a :class:`Value` object exists for this
            Attribute and *entity*, it will delete that :class:`Value` object.
         """
+        with start_span(SAVE_VALUE_SPAN) as span:
+            strategy = self._save_value(entity, value, value_obj)
+            if span:
+                span.set_attributes(
+                    {
+                        CONTENT_TYPE: content_type_label(entity),
+                        SLUGS: (self.slug,),
+                        STRATEGY: strategy,
+                    },
+                )
+
+    def _save_value(self, entity, value, value_obj):
+        """
+        Write *value* for *entity*. Returns what was done: ``"create"``,
+        ``"update"``, ``"delete"`` or ``"unchanged"``.
+        """
         ct = ContentType.objects.get_for_model(entity)
 
         entity_filter = {
@@ -348,18 +469,144 @@ class Attribute(models.Model):
             f"{get_entity_pk_type(entity)}": entity.pk,
         }
 
-        try:
-            value_obj = self.value_set.get(**entity_filter)
-        except Value.DoesNotExist:
-            if value is None or value == "":
-                return
+        created = False
+        if value_obj is None:
+            try:
+                value_obj = self.value_set.get(**entity_filter)
+            except Value.DoesNotExist:
+                if value is None or value == "":
+                    return "unchanged"
 
-            value_obj = Value.objects.create(**entity_filter)
+                value_obj = Value.objects.create(**entity_filter)
+                created = True
 
         if value is None or value == "":
             value_obj.delete()
-            return
+            return "delete"
+
+        if value == value_obj.value:
+            return "unchanged"
+
+        value_obj.value = value
+        value_obj.save()
+        return "create" if created else "update"
+
+    def increment(self, model_cls, pks, amount=1, using=None):
+        """
+        Add *amount* to the values of this *int* or *float* attribute for the
+        entities of *model_cls* with primary keys *pks*, in the database
+        rather than by reading and writing them, so that concurrent
+        increments aren't lost. *pks* is a list, or a queryset of primary
+        keys such as ``entities.values("pk")``, used as a subquery. Entities
+        without a value start from the default of the attribute, or 0.
+        Returns the new values by primary key.
+
+        Raises ``NotSupportedError`` for attributes of other datatypes.
+        """
+        if self.datatype not in (self.TYPE_INT, self.TYPE_FLOAT):
+            raise NotSupportedError(
+                f'EAV attribute "{self.slug}" is not a number and cannot be '
+                + "incremented",
+            )
+        self.validate_value(amount)
+
+        column = f"value_{self.datatype}"
+        ct = ContentType.objects.get_for_model(model_cls)
+        entity_field = get_entity_pk_type(model_cls)
+        values = Value.objects.using(using).filter(attribute=self, entity_ct=ct)
+
+        incremented = values.filter(**{f"{entity_field}__in": pks}).increment(
+            column,
+            amount,
+        )
+        if isinstance(pks, QuerySet):
+            missing = self._without_value(model_cls, pks, using)
+        else:
+            missing = [pk for pk in pks if pk not in incremented]
+        if missing:
+            self._create_values(model_cls, missing, self.get_default() or 0, using)
+            incremented.update(
+                values.filter(**{f"{entity_field}__in": missing}).increment(
+                    column,
+                    amount,
+                ),
+            )
+        return incremented
+
+    def mutate(self, model_cls, pks, mutation, using=None):
+        """
+        Apply *mutation*, one of the mutations of :mod:`eav.logic.mutations`,
+        to the values of this attribute for the entities of *model_cls* with
+        primary keys *pks*, a list or a queryset (see :meth:`increment`), in
+        the database rather than by reading and writing them, see
+        :meth:`ValueQuerySet.mutate <eav.logic.managers.ValueQuerySet.mutate>`.
+        Entities without a value get one first if the mutation adds to
+        values. Returns the number of values changed.
+
+        Raises ``NotSupportedError`` for attributes of another datatype, and
+        compressed attributes.
+        """
+        if self.datatype != mutation.datatype or self.compression:
+            raise NotSupportedError(
+                f'EAV attribute "{self.slug}" is not an uncompressed '
+                + f"{mutation.datatype} attribute and cannot be changed in place",
+            )
+
+        ct = ContentType.objects.get_for_model(model_cls)
+        entity_field = get_entity_pk_type(model_cls)
+        values = Value.objects.using(using).filter(
+            attribute=self,
+            entity_ct=ct,
+            **{f"{entity_field}__in": pks},
+        )
+        if mutation.start is not None:
+            missing = self._without_value(model_cls, pks, using)
+            self._create_values(model_cls, missing, mutation.start, using)
+        return values.mutate(mutation)
+
+    def _without_value(self, model_cls, pks, using):
+        """
+        Return the primary keys among *pks*, a list or a queryset, of the
+        entities of *model_cls* that have no value for this attribute.
+        """
+        entity_field = get_entity_pk_type(model_cls)
+        stored = Value.objects.using(using).filter(
+            attribute=self,
+            entity_ct=ContentType.objects.get_for_model(model_cls),
+        )
+        if isinstance(pks, QuerySet):
+            return list(
+                model_cls._base_manager.using(using)  # noqa: SLF001
+                .filter(pk__in=pks)
+                .filter(~Exists(stored.filter(**{entity_field: OuterRef("pk")})))
+                .values_list("pk", flat=True),
+            )
+        stored = set(
+            stored.filter(**{f"{entity_field}__in": pks}).values_list(
+                entity_field,
+                flat=True,
+            ),
+        )
+        return [pk for pk in pks if pk not in stored]
 
-        if value != value_obj.value:
-            value_obj.value = value
-            value_obj.save()
+    def _create_values(self, model_cls, pks, value, using):
+        """
+        Store *value* for the entities of *model_cls* with primary keys *pks*
+        that have no value. Values created meanwhile by concurrent writers
+        are kept.
+        """
+        if not pks:
+            return
+        entity_field = get_entity_pk_type(model_cls)
+        column = f"value_{self.datatype}"
+        Value.objects.using(using).bulk_create(
+            [
+                Value(
+                    attribute=self,
+                    entity_ct=ContentType.objects.get_for_model(model_cls),
+                    **{entity_field: pk, column: value},
+                )
+                for pk in pks
+            ],
+            ignore_conflicts=True,
+        )
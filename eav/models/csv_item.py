@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import ClassVar
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from eav.logic.managers import CSVItemManager
+from eav.logic.object_pk import get_pk_format
+
+
+class CSVItem(models.Model):
+    """
+    One item of a :class:`Value` of a ``csv`` attribute.
+
+    When ``EAV2_CSV_ITEMS`` is set, the items of csv values are stored here
+    as well, on every write through :class:`Value` and its queryset, and the
+    ``has``, ``has_any`` and ``has_all`` lookups of
+    :class:`~eav.fields.CSVField` use the index on them::
+
+        Supplier.objects.filter(eav__tags__has='organic')
+        Supplier.objects.filter(eav__tags__has_all=['organic', 'local'])
+
+    The items of existing values are stored by the migration creating this
+    table if the setting is enabled then, or by the ``eav_csv_items``
+    management command.
+    """
+
+    id = get_pk_format()
+
+    value = models.ForeignKey(
+        "eav.Value",
+        on_delete=models.CASCADE,
+        related_name="csv_items",
+        verbose_name=_("Value"),
+    )
+    item = models.TextField(verbose_name=_("Item"))
+
+    objects = CSVItemManager()
+
+    class Meta:
+        verbose_name = _("CSV item")
+        verbose_name_plural = _("CSV items")
+
+        indexes: ClassVar[list[models.Index]] = [
+            models.Index(fields=["item", "value"], name="eav_csvitem_item_value"),
+        ]
+
+    def __str__(self) -> str:
+        return self.item
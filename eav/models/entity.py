@@ -2,21 +2,52 @@ from copy import copy
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
 from django.db.models.base import ModelBase
 from django.utils.translation import gettext_lazy as _
 
 from eav import register
 from eav.exceptions import IllegalAssignmentException
+from eav.instrumentation import READ, VALIDATE, WRITE, instrument
 from eav.logic.entity_pk import get_entity_pk_type
+from eav.logic.mutations import CSVAppend, CSVRemove, JSONMerge, JSONRemoveKey
+from eav.nplusone import record_load
+from eav.snapshots import Snapshot, entity_cache
+from eav.tracing import (
+    CONTENT_TYPE,
+    SAVE_SPAN,
+    SLUGS,
+    VALIDATE_SPAN,
+    content_type_label,
+    start_span,
+)
+from eav.unit_of_work import current_unit_of_work
 
 from .attribute import Attribute
 from .enum_value import EnumValue
 from .value import Value
 
 
+def defaults_of(attributes):
+    """Return the defaults of the *attributes* that have one, by slug."""
+    return {a.slug: a.get_default() for a in attributes if a.default is not None}
+
+
 class Entity:
     """Helper class that will be attached to entities registered with eav."""
 
+    #: Names used internally, never attribute slugs.
+    _internal_attrs = frozenset(
+        (
+            "instance",
+            "ct",
+            "_prefetched_slugs",
+            "_prefetched_values",
+            "_prefetched_defaults",
+            "_snapshot",
+        ),
+    )
+
     @staticmethod
     def pre_save_handler(sender, *args, **kwargs):
         """
@@ -56,24 +87,106 @@ class Entity:
         instances. If it is, tries to lookup the :class:`Value` with that
         attribute slug. If there is one, it returns the value of the
         class:`Value` object, otherwise it hasn't been set, so it returns
-        None.
+        the default of the attribute, None if it has none.
         """
         if not name.startswith("_"):
-            try:
-                attribute = self.get_attribute_by_slug(name)
-            except Attribute.DoesNotExist as err:
-                raise AttributeError(
-                    _("%(obj)s has no EAV attribute named %(attr)s")
-                    % {"obj": self.instance, "attr": name},
-                ) from err
-
-            try:
-                return self.get_value_by_attribute(attribute).value
-            except Value.DoesNotExist:
-                return None
+            prefetched = self.__dict__.get("_prefetched_slugs", ())
+            if name in prefetched:
+                value_obj = self._prefetched_values.get(name)
+                if value_obj is None:
+                    return self._prefetched_defaults.get(name)
+                return value_obj.value
+
+            snapshot = self.get_snapshot(name)
+            if snapshot is not None and name in snapshot.slugs:
+                return snapshot.values.get(name)
+
+            with instrument(READ, self.ct, (name,)) as operation:
+                record_load(self, name)
+                try:
+                    attribute = self.get_attribute_by_slug(name)
+                except Attribute.DoesNotExist as err:
+                    raise AttributeError(
+                        _("%(obj)s has no EAV attribute named %(attr)s")
+                        % {"obj": self.instance, "attr": name},
+                    ) from err
+
+                try:
+                    value = self.get_value_by_attribute(attribute).value
+                except Value.DoesNotExist:
+                    return attribute.get_default()
+
+                operation.add_rows(1)
+                return value
 
         return getattr(super(), name)
 
+    def set_prefetched_values(self, slugs, values, defaults=None):
+        """
+        Serve reads of the attributes in *slugs* from *values*, a mapping of
+        slug to :class:`Value`, instead of the database. Attributes in *slugs*
+        missing from *values* read as their default in *defaults*, a mapping
+        of slug to default, or None. The prefetched values are dropped by
+        :meth:`save`. Used by :func:`~eav.queryset.prefetch_eav`.
+        """
+        self._prefetched_slugs = slugs
+        self._prefetched_values = values
+        self._prefetched_defaults = defaults or {}
+
+    def get_snapshot(self, slug=None):
+        """
+        Return the :class:`~eav.snapshots.Snapshot` of this entity's values,
+        shared by the enclosing :func:`~eav.unit_of_work.unit_of_work` or taken
+        from the entity cache, taking it if there is none. None if neither is
+        in use, or the instance isn't saved. Taking it is reported to the
+        :mod:`N+1 detector <eav.nplusone>` as a load of *slug*, the attribute
+        being read.
+        """
+        if "_snapshot" in self.__dict__:
+            return self._snapshot
+        pk = self.instance.pk
+        scope = current_unit_of_work()
+        if pk is None or (scope is None and not entity_cache.enabled):
+            return None
+
+        key = (self.ct.pk, pk)
+        snapshot = scope.snapshots.get(key) if scope is not None else None
+        if snapshot is None and entity_cache.enabled:
+            snapshot = entity_cache.get_many(self.ct.pk, [pk]).get(pk)
+        if snapshot is None:
+            if slug is not None:
+                record_load(self, slug)
+            attributes = self.get_all_attributes()
+            if scope is not None:
+                attributes = scope.get_attributes(attributes)
+            # Defaults are part of the snapshot, which changes to the
+            # attributes invalidate.
+            snapshot = Snapshot(
+                slugs=frozenset(a.slug for a in attributes),
+                values={**defaults_of(attributes), **self.get_values_dict()},
+            )
+            if entity_cache.enabled:
+                entity_cache.set_many(
+                    self.ct.pk,
+                    {pk: snapshot},
+                    self.instance._state.db or DEFAULT_DB_ALIAS,  # noqa: SLF001
+                )
+
+        if scope is not None:
+            # Looked up again on every read, to see writes made through other
+            # instances of the entity.
+            scope.snapshots[key] = snapshot
+        else:
+            self._snapshot = snapshot
+        return snapshot
+
+    def set_snapshot(self, snapshot):
+        """
+        Serve reads from *snapshot* until :meth:`save`. Used by
+        :func:`~eav.queryset.prefetch_eav` with the entity cache enabled.
+        """
+        self._snapshot = snapshot
+
     def get_all_attributes(self):
         """
         Return a query set of all :class:`Attribute` objects that can be set
@@ -101,9 +214,33 @@ class Entity:
 
     def save(self):
         """Saves all the EAV values that have been set on this entity."""
-        for attribute in self.get_all_attributes():
-            if self._hasattr(attribute.slug):
+        measured = instrument(WRITE, self.ct)
+        with start_span(SAVE_SPAN) as span, measured as operation:
+            saved = []
+            attributes = [
+                attribute
+                for attribute in self.get_all_attributes()
+                if self._hasattr(attribute.slug)
+            ]
+            # Load the stored values once, instead of once per attribute, with
+            # only the columns of the attributes being saved.
+            stored = {
+                value.attribute_id: value
+                for value in self.get_values({a.datatype for a in attributes})
+            }
+
+            for attribute in attributes:
                 attribute_value = self._getattr(attribute.slug)
+                value_obj = stored.get(attribute.pk)
+
+                if value_obj is None and (
+                    attribute_value in (None, "")
+                    or attribute_value == attribute.get_default()
+                ):
+                    # Nothing stored and nothing to store: defaults are read
+                    # when nothing is stored.
+                    continue
+
                 if (
                     attribute.datatype == Attribute.TYPE_ENUM
                     and not isinstance(
@@ -113,84 +250,224 @@ class Entity:
                     and attribute_value is not None
                 ):
                     attribute_value = EnumValue.objects.get(value=attribute_value)
-                attribute.save_value(self.instance, attribute_value)
-
-    def validate_attributes(self):
+                attribute.save_value(
+                    self.instance,
+                    attribute_value,
+                    value_obj=value_obj,
+                )
+                saved.append(attribute.slug)
+
+            self._drop_loaded()
+
+            operation.add_slugs(*saved)
+            operation.add_rows(len(saved))
+            if span:
+                span.set_attributes(
+                    {CONTENT_TYPE: content_type_label(self.ct), SLUGS: tuple(saved)},
+                )
+
+    def increment(self, slug, amount=1):
         """
-        Called before :meth:`save`, first validate all the entity values to
-        make sure they can be created / saved cleanly.
-        Raises ``ValidationError`` if they can't be.
+        Add *amount* to the value of the *int* or *float* attribute *slug*
+        with one ``UPDATE``, creating it from the default if needed, and
+        return the new value. See
+        :meth:`Attribute.increment <eav.models.Attribute.increment>`.
         """
-        values_dict = self.get_values_dict()
-
-        for attribute in self.get_all_attributes():
-            value = None
+        with instrument(WRITE, self.ct, (slug,)) as operation:
+            attribute = self.get_attribute_by_slug(slug)
+            pk = self.instance.pk
+            value = attribute.increment(
+                type(self.instance),
+                [pk],
+                amount,
+                using=self.instance._state.db,  # noqa: SLF001
+            )[pk]
+            operation.add_rows(1)
+
+        self._drop_loaded()
+        return value
+
+    def json_merge(self, slug, patch):
+        """
+        Set the top-level keys of the value of the *json* attribute *slug* to
+        those of *patch*, in the database. See :class:`~eav.logic.mutations.JSONMerge`.
+        """
+        self._mutate(slug, JSONMerge(patch))
 
-            # Value was assigned to this instance.
-            if self._hasattr(attribute.slug):
-                value = self._getattr(attribute.slug)
-                values_dict.pop(attribute.slug, None)
-            # Otherwise try pre-loaded from DB.
-            else:
-                value = values_dict.pop(attribute.slug, None)
+    def json_remove_key(self, slug, key):
+        """
+        Remove the top-level *key* of the value of the *json* attribute
+        *slug*, in the database. See :class:`~eav.logic.mutations.JSONRemoveKey`.
+        """
+        self._mutate(slug, JSONRemoveKey(key))
 
-            if value is None:
-                if attribute.required:
-                    raise ValidationError(
-                        _("%s EAV field cannot be blank") % attribute.slug,
-                    )
-            else:
-                try:
-                    attribute.validate_value(value)
-                except ValidationError as err:
-                    raise ValidationError(
-                        _("%(attr)s EAV field %(err)s")
-                        % {"attr": attribute.slug, "err": err},
-                    ) from err
+    def csv_append(self, slug, item):
+        """
+        Append *item* to the value of the *csv* attribute *slug*, in the
+        database. See :class:`~eav.logic.mutations.CSVAppend`.
+        """
+        self._mutate(slug, CSVAppend(item))
 
-        illegal = values_dict or (
-            self.get_object_attributes() - self.get_all_attribute_slugs()
+    def csv_remove(self, slug, item):
+        """
+        Remove *item* from the value of the *csv* attribute *slug*, in the
+        database. See :class:`~eav.logic.mutations.CSVRemove`.
+        """
+        self._mutate(slug, CSVRemove(item))
+
+    def _mutate(self, slug, mutation):
+        with instrument(WRITE, self.ct, (slug,)) as operation:
+            attribute = self.get_attribute_by_slug(slug)
+            changed = attribute.mutate(
+                type(self.instance),
+                [self.instance.pk],
+                mutation,
+                using=self.instance._state.db,  # noqa: SLF001
+            )
+            operation.add_rows(changed)
+        self._drop_loaded()
+
+    def _drop_loaded(self):
+        # Stored values changed, stop serving reads from the prefetch and
+        # the snapshots, including those of the unit of work.
+        self.__dict__.pop("_prefetched_slugs", None)
+        self.__dict__.pop("_prefetched_values", None)
+        self.__dict__.pop("_prefetched_defaults", None)
+        self.__dict__.pop("_snapshot", None)
+        entity_cache.invalidate(
+            self.ct.pk,
+            [self.instance.pk],
+            self.instance._state.db or DEFAULT_DB_ALIAS,  # noqa: SLF001
         )
 
-        if illegal:
-            message = (
-                "Instance of the class {} cannot have values for attributes: {}."
-            ).format(
-                self.instance.__class__,
-                ", ".join(illegal),
+    def validate_attributes(self):
+        """
+        Called before :meth:`save`, first validate all the entity values to
+        make sure they can be created / saved cleanly.
+        Raises ``ValidationError`` if they can't be.
+        """
+        measured = instrument(VALIDATE, self.ct)
+        with start_span(VALIDATE_SPAN) as span, measured as operation:
+            validated = []
+            values_dict = self.get_values_dict()
+            operation.add_rows(len(values_dict))
+
+            for attribute in self.get_all_attributes():
+                value = None
+
+                # Value was assigned to this instance.
+                if self._hasattr(attribute.slug):
+                    value = self._getattr(attribute.slug)
+                    values_dict.pop(attribute.slug, None)
+                # Otherwise try pre-loaded from DB.
+                else:
+                    value = values_dict.pop(attribute.slug, None)
+
+                if value is None:
+                    if attribute.required and attribute.default is None:
+                        raise ValidationError(
+                            _("%s EAV field cannot be blank") % attribute.slug,
+                        )
+                else:
+                    validated.append(attribute.slug)
+                    try:
+                        attribute.validate_value(value)
+                    except ValidationError as err:
+                        raise ValidationError(
+                            _("%(attr)s EAV field %(err)s")
+                            % {"attr": attribute.slug, "err": err},
+                        ) from err
+
+            operation.add_slugs(*validated)
+            if span:
+                span.set_attributes(
+                    {
+                        CONTENT_TYPE: content_type_label(self.ct),
+                        SLUGS: tuple(validated),
+                    },
+                )
+
+            illegal = values_dict or (
+                self.get_object_attributes() - self.get_all_attribute_slugs()
             )
-            raise IllegalAssignmentException(message)
+
+            if illegal:
+                message = (
+                    "Instance of the class {} cannot have values for attributes: {}."
+                ).format(
+                    self.instance.__class__,
+                    ", ".join(illegal),
+                )
+                raise IllegalAssignmentException(message)
 
     def get_values_dict(self):
         return {v.attribute.slug: v.value for v in self.get_values()}
 
-    def get_values(self):
-        """Get all set :class:`Value` objects for self.instance."""
+    def get_defaults(self):
+        """
+        Return the defaults of the attributes available to this entity that
+        have one, by slug, see :attr:`Attribute.default`.
+        """
+        scope = current_unit_of_work()
+        attributes = self.get_all_attributes()
+        if scope is not None:
+            attributes = scope.get_attributes(attributes)
+        return defaults_of(attributes)
+
+    def get_values(self, datatypes=None):
+        """
+        Get all set :class:`Value` objects for self.instance. If *datatypes*
+        is given, only the value columns of these datatypes are loaded, see
+        :meth:`~eav.logic.managers.ValueQuerySet.only_datatypes`.
+        """
         entity_filter = {
             "entity_ct": self.ct,
             f"{get_entity_pk_type(self.instance)}": self.instance.pk,
         }
 
-        return Value.objects.filter(**entity_filter).select_related()
+        values = Value.objects.filter(**entity_filter)
+        if datatypes is None:
+            return values.select_related(
+                "attribute",
+                "entity_ct",
+                "value_enum",
+                "value_interned",
+            )
+        related = ["attribute", "entity_ct"]
+        if Attribute.TYPE_ENUM in datatypes:
+            related.append("value_enum")
+        if Attribute.TYPE_TEXT in datatypes:
+            related.append("value_interned")
+        return values.only_datatypes(datatypes).select_related(*related)
 
     def get_all_attribute_slugs(self):
         """Returns a list of slugs for all attributes available to this entity."""
+        scope = current_unit_of_work()
+        if scope is not None:
+            return {a.slug for a in scope.get_attributes(self.get_all_attributes())}
         return set(self.get_all_attributes().values_list("slug", flat=True))
 
     def get_attribute_by_slug(self, slug):
         """Returns a single :class:`Attribute` with *slug*."""
-        return self.get_all_attributes().get(slug=slug)
+        scope = current_unit_of_work()
+        if scope is None:
+            return self.get_all_attributes().get(slug=slug)
+
+        for attribute in scope.get_attributes(self.get_all_attributes()):
+            if attribute.slug == slug:
+                return attribute
+        raise Attribute.DoesNotExist
 
     def get_value_by_attribute(self, attribute):
         """Returns a single :class:`Value` for *attribute*."""
-        return self.get_values().get(attribute=attribute)
+        return self.get_values([attribute.datatype]).get(attribute=attribute)
 
     def get_object_attributes(self):
         """
         Returns entity instance attributes, except for
-        ``instance`` and ``ct`` which are used internally.
+        ``instance``, ``ct`` and prefetched values which are used internally.
         """
-        return set(copy(self.__dict__).keys()) - {"instance", "ct"}
+        return set(copy(self.__dict__).keys()) - self._internal_attrs
 
     def __iter__(self):
         """
@@ -2,25 +2,38 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
 
-from django.db import models
-from django.db.models import ManyToManyField
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import ManyToManyField, Q
 from django.utils.translation import gettext_lazy as _
 
+from eav.identity import identity_map
 from eav.logic.managers import EnumGroupManager
 from eav.logic.object_pk import get_pk_format
 from eav.settings import CHARFIELD_LENGTH
 
+from .enum_value import EnumValue
+
 if TYPE_CHECKING:
-    from .enum_value import EnumValue
+    from collections.abc import Iterable
+
+#: Number of members of an :class:`EnumGroup` a bitmask can hold.
+MAX_ORDINALS = 63
 
 
 class EnumGroup(models.Model):
     """
     *EnumGroup* objects have two fields - a *name* ``CharField`` and *values*,
     a ``ManyToManyField`` to :class:`EnumValue`. :class:`Attribute` classes
-    with datatype *TYPE_ENUM* have a ``ForeignKey`` field to *EnumGroup*.
+    with datatype *TYPE_ENUM* or *TYPE_MULTI_ENUM* have a ``ForeignKey`` field
+    to *EnumGroup*.
 
     See :class:`EnumValue` for an example.
+
+    The members selected by a *TYPE_MULTI_ENUM* attribute are stored as a
+    bitmask, see :meth:`encode`. Each member gets a bit, its ordinal, the
+    first time it is encoded; ordinals are never changed nor reused, so
+    stored masks stay valid when members are added or removed.
     """
 
     id = get_pk_format()
@@ -34,6 +47,13 @@ class EnumGroup(models.Model):
         "eav.EnumValue",
         verbose_name=_("Enum group"),
     )
+    ordinals = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name=_("Ordinals"),
+        help_text=_("Bit of each member in the masks of multiple selections."),
+    )
 
     objects = EnumGroupManager()
 
@@ -61,3 +81,94 @@ class EnumGroup(models.Model):
             tuple: A tuple containing the name of the EnumGroup instance.
         """
         return (self.name,)
+
+    def members(self, values: Iterable) -> list[EnumValue]:
+        """
+        Return the members of this group among *values*, :class:`EnumValue`
+        instances or their ``value``. Raises ``ValidationError`` if any of
+        them isn't a member.
+        """
+        members, invalid = self._resolve(values)
+        if invalid:
+            raise ValidationError(
+                _("%(val)s is not a valid choice for %(group)s")
+                % {"val": ", ".join(sorted(map(str, invalid))), "group": self},
+            )
+        return members
+
+    def encode(self, values: Iterable) -> int:
+        """
+        Return the bitmask of *values*, members of this group (see
+        :meth:`members`), assigning ordinals to those that don't have one.
+        Raises ``ValidationError`` if more than :data:`MAX_ORDINALS` members
+        would need one.
+        """
+        members = self.members(values)
+        if any(str(member.pk) not in self.ordinals for member in members):
+            self._assign_ordinals(members)
+        mask = 0
+        for member in members:
+            mask |= 1 << self.ordinals[str(member.pk)]
+        return mask
+
+    def lookup_mask(self, values: Iterable) -> tuple[int, bool]:
+        """
+        Return the bitmask of the members of this group among *values* that
+        have an ordinal, and whether all of *values* do, for filtering: no
+        ordinal is assigned and no ``ValidationError`` raised.
+        """
+        members, invalid = self._resolve(values)
+        bits = [self.ordinals.get(str(member.pk)) for member in members]
+        mask = 0
+        for bit in bits:
+            if bit is not None:
+                mask |= 1 << bit
+        return mask, not invalid and None not in bits
+
+    def decode(self, mask: int) -> list[EnumValue]:
+        """Return the members whose bits are set in *mask*, by ordinal."""
+        pk_field = EnumValue._meta.pk  # noqa: SLF001
+        pks = [
+            pk_field.to_python(pk)
+            for pk, bit in sorted(self.ordinals.items(), key=lambda item: item[1])
+            if mask >> bit & 1
+        ]
+        using = self._state.db
+        members = {pk: identity_map.get(EnumValue, pk, using) for pk in pks}
+        missing = [pk for pk, member in members.items() if member is None]
+        for member in EnumValue.objects.using(using).filter(pk__in=missing):
+            members[member.pk] = identity_map.add(member)
+        return [members[pk] for pk in pks if members[pk] is not None]
+
+    def _resolve(self, values: Iterable) -> tuple[list[EnumValue], set]:
+        # Return the members among values, and the values that aren't any.
+        values = list(values)
+        pks = {v.pk for v in values if isinstance(v, EnumValue)}
+        names = {str(v) for v in values if not isinstance(v, EnumValue)}
+        members = list(self.values.filter(Q(pk__in=pks) | Q(value__in=names)))
+        invalid = (pks - {m.pk for m in members}) | (names - {m.value for m in members})
+        return members, invalid
+
+    def _assign_ordinals(self, members: list[EnumValue]) -> None:
+        # Lock the group, so concurrent writers don't hand out the same bit.
+        with transaction.atomic(using=self._state.db):
+            group = (
+                type(self)
+                .objects.using(self._state.db)
+                .select_for_update()
+                .get(pk=self.pk)
+            )
+            ordinals = dict(group.ordinals)
+            for member in sorted(members, key=lambda member: member.pk):
+                if str(member.pk) in ordinals:
+                    continue
+                bit = max(ordinals.values(), default=-1) + 1
+                if bit >= MAX_ORDINALS:
+                    raise ValidationError(
+                        _("%(group)s can't hold more than %(max)s selections.")
+                        % {"group": self, "max": MAX_ORDINALS},
+                    )
+                ordinals[str(member.pk)] = bit
+            group.ordinals = ordinals
+            group.save(update_fields=["ordinals"])
+        self.ordinals = ordinals
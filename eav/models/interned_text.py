@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import ClassVar
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from eav.logic.managers import InternedTextManager
+from eav.logic.object_pk import get_pk_format
+
+#: Length of the longest string that can be interned.
+INTERNED_TEXT_LENGTH = 255
+
+
+class InternedText(models.Model):
+    """
+    A string of a dictionary encoded ``text`` attribute, see
+    :attr:`Attribute.dictionary <eav.models.Attribute.dictionary>`.
+
+    The values of the attribute equal to the string store a foreign key to
+    it, :attr:`Value.value_interned <eav.models.Value.value_interned>`,
+    instead of repeating it, and the ``eav__`` filters on the attribute
+    compare these keys. Strings are interned the first time a value is saved
+    with them, and resolved through :data:`~eav.identity.identity_map` when
+    read. Strings longer than :data:`INTERNED_TEXT_LENGTH` are stored as plain text.
+    """
+
+    id = get_pk_format()
+
+    attribute = models.ForeignKey(
+        "eav.Attribute",
+        on_delete=models.CASCADE,
+        related_name="interned_texts",
+        verbose_name=_("Attribute"),
+    )
+    text = models.CharField(
+        max_length=INTERNED_TEXT_LENGTH,
+        verbose_name=_("Text"),
+    )
+
+    objects = InternedTextManager()
+
+    class Meta:
+        verbose_name = _("Interned text")
+        verbose_name_plural = _("Interned texts")
+
+        constraints: ClassVar[list[models.Constraint]] = [
+            models.UniqueConstraint(
+                fields=["attribute", "text"],
+                name="unique_text_per_attribute",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.text
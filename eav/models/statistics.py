@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import ClassVar
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from eav.logic.object_pk import get_pk_format
+
+from .enum_value import EnumValue
+
+#: Share of the non-null values assumed to match a range or pattern lookup.
+RANGE_SELECTIVITY = 1 / 3
+
+
+class AttributeStatistics(models.Model):
+    """
+    The distribution of the values of an :class:`Attribute` for the entities
+    of one content type, collected by the ``eav_analyze`` management command
+    and used by :mod:`eav.planner` to plan and estimate EAV filters.
+    """
+
+    id = get_pk_format()
+
+    attribute = models.ForeignKey(
+        "eav.Attribute",
+        on_delete=models.CASCADE,
+        related_name="statistics",
+        verbose_name=_("Attribute"),
+    )
+    entity_ct = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Entity content type"),
+    )
+    entity_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Entity count"),
+        help_text=_("Number of entities of the content type."),
+    )
+    row_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Row count"),
+        help_text=_("Number of values stored for the attribute."),
+    )
+    distinct_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Distinct count"),
+        help_text=_("Number of distinct non-null values."),
+    )
+    null_ratio = models.FloatField(
+        default=0.0,
+        verbose_name=_("Null ratio"),
+        help_text=_("Share of the values that are null."),
+    )
+    most_common = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name=_("Most common values"),
+        help_text=_("Values, as strings, with their row counts."),
+    )
+    analyzed = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Analyzed"),
+    )
+
+    class Meta:
+        verbose_name = _("Attribute statistics")
+        verbose_name_plural = _("Attribute statistics")
+        constraints: ClassVar[list[models.Constraint]] = [
+            models.UniqueConstraint(
+                fields=["attribute", "entity_ct"],
+                name="unique_statistics_per_attribute",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """String representation of `AttributeStatistics` instance."""
+        return f"{self.attribute_id} ({self.entity_ct_id}): {self.row_count} rows"
+
+    def estimate_rows(self, lookup: str, value) -> float:
+        """
+        Return the estimated number of values of the attribute matching
+        *lookup* (``"exact"``, ``"in"``, ``"isnull"``, ...) with *value*.
+        """
+        common = dict(self.most_common)
+        non_null = self.row_count * (1 - self.null_ratio)
+
+        if lookup == "isnull":
+            return self.row_count * self.null_ratio if value else non_null
+
+        if lookup == "in":
+            return min(
+                sum(self.estimate_rows("exact", v) for v in value),
+                non_null,
+            )
+
+        if lookup in {"exact", "iexact"}:
+            key = str(value.value if isinstance(value, EnumValue) else value)
+            if key in common:
+                return common[key]
+            # Spread the rows of the other values evenly between them.
+            rest = non_null - sum(common.values())
+            return max(rest, 0) / max(self.distinct_count - len(common), 1)
+
+        return non_null * RANGE_SELECTIVITY
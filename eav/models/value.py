@@ -10,9 +10,15 @@ from django.db.models import ForeignKey
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from eav.fields import CSVField
+from eav.fields import BitmaskField, CSVField, IdentityMapForeignKey
+from eav.filter_cache import filter_cache
+from eav.logic.compression import COMPRESSIBLE, compress, decompress
 from eav.logic.managers import ValueManager
 from eav.logic.object_pk import get_pk_format
+from eav.snapshots import entity_cache
+
+from .csv_item import CSVItem
+from .interned_text import InternedText
 
 if TYPE_CHECKING:
     from .attribute import Attribute
@@ -46,7 +52,7 @@ class Value(models.Model):
     id = get_pk_format()
 
     # Direct foreign keys
-    attribute: ForeignKey[Attribute] = ForeignKey(
+    attribute: ForeignKey[Attribute] = IdentityMapForeignKey(
         "eav.Attribute",
         db_index=True,
         on_delete=models.PROTECT,
@@ -136,7 +142,22 @@ class Value(models.Model):
         verbose_name=_("Value JSON"),
     )
 
-    value_enum: ForeignKey[EnumValue | None] = ForeignKey(
+    value_interned: ForeignKey[InternedText | None] = IdentityMapForeignKey(
+        "eav.InternedText",
+        blank=True,
+        null=True,
+        on_delete=models.PROTECT,
+        related_name="eav_values",
+        verbose_name=_("Value interned text"),
+    )
+
+    value_compressed = models.BinaryField(
+        blank=True,
+        null=True,
+        verbose_name=_("Value compressed"),
+    )
+
+    value_enum: ForeignKey[EnumValue | None] = IdentityMapForeignKey(
         "eav.EnumValue",
         blank=True,
         null=True,
@@ -145,6 +166,12 @@ class Value(models.Model):
         verbose_name=_("Value enum"),
     )
 
+    value_multi = BitmaskField(
+        blank=True,
+        null=True,
+        verbose_name=_("Value multiple selection"),
+    )
+
     # Value object relationship
     generic_value_id = models.IntegerField(
         blank=True,
@@ -189,6 +216,12 @@ class Value(models.Model):
                 name="ensure_entity_id_xor_entity_uuid",
             ),
         ]
+        indexes: ClassVar[list[models.Index]] = [
+            models.Index(
+                fields=["generic_value_ct", "generic_value_id"],
+                name="eav_value_generic_value",
+            ),
+        ]
 
     def __str__(self) -> str:
         """String representation of a Value."""
@@ -201,9 +234,54 @@ class Value(models.Model):
         return f'{self.attribute.name}: "{self.value}" ({entity})'
 
     def save(self, *args, **kwargs):
-        """Validate and save this value."""
-        self.full_clean()
+        """
+        Validate and save this value. Fields deferred when it was loaded are
+        neither validated nor written, so they aren't loaded by saving.
+        """
+        deferred = self.get_deferred_fields()
+        if "value_text" not in deferred:
+            self._intern()
+        self.full_clean(
+            exclude=[
+                field.name
+                for field in self._meta.concrete_fields
+                if field.attname in deferred
+            ],
+        )
         super().save(*args, **kwargs)
+        self._invalidate(self._written_row())
+        CSVItem.objects.sync([self])
+
+    def delete(self, *args, **kwargs):
+        """Delete this value."""
+        row = self._written_row()
+        deleted = super().delete(*args, **kwargs)
+        self._invalidate(row)
+        return deleted
+
+    def _intern(self) -> None:
+        """
+        Store the text of a dictionary encoded attribute as the key of its
+        :class:`InternedText`, interning it if it's new.
+        """
+        if (
+            self.value_interned_id is not None
+            or not self.value_text
+            or not self.attribute.dictionary
+            or self.attribute.datatype != self.attribute.TYPE_TEXT
+        ):
+            return
+        interned = InternedText.objects.intern(self.attribute, self.value_text)
+        if interned is not None:
+            self.value_interned = interned
+            self.value_text = ""
+
+    def _written_row(self) -> tuple:
+        return (self.entity_ct_id, self.entity_id, self.entity_uuid, self.attribute_id)
+
+    def _invalidate(self, row: tuple) -> None:
+        entity_cache.invalidate_rows([row[:3]], self._state.db)
+        filter_cache.invalidate([row[3]], self._state.db)
 
     def natural_key(self) -> tuple[tuple[str, str], int, str]:
         """
@@ -222,10 +300,41 @@ class Value(models.Model):
 
     def _get_value(self):
         """Return the python object this value is holding."""
-        return getattr(self, f"value_{self.attribute.datatype}")
+        datatype = self.attribute.datatype
+        if datatype == self.attribute.TYPE_TEXT and self.value_interned_id is not None:
+            return self.value_interned.text
+        if datatype in COMPRESSIBLE and self.value_compressed is not None:
+            return decompress(datatype, self.value_compressed)
+        value = getattr(self, f"value_{datatype}")
+        if datatype == self.attribute.TYPE_MULTI_ENUM:
+            # The selected members are stored as a bitmask of their ordinals.
+            return None if value is None else self.attribute.enum_group.decode(value)
+        return value
 
     def _set_value(self, new_value):
         """Set the object this value is holding."""
-        setattr(self, f"value_{self.attribute.datatype}", new_value)
+        datatype = self.attribute.datatype
+        if datatype == self.attribute.TYPE_MULTI_ENUM and new_value is not None:
+            new_value = self.attribute.enum_group.encode(new_value)
+        interned = None
+        if datatype == self.attribute.TYPE_TEXT:
+            # Strings of dictionary encoded attributes are interned when the
+            # value is saved (see _intern()), keep the key of an equal one.
+            if self.value_interned_id is not None and self.attribute.dictionary:
+                interned = self.value_interned
+                if interned.text != new_value:
+                    interned = None
+            self.value_interned = interned
+            if interned is not None:
+                new_value = ""
+        if datatype in COMPRESSIBLE:
+            # Large values of compressed attributes leave their column empty.
+            codec = self.attribute.compression
+            self.value_compressed = None
+            if codec and new_value is not None and interned is None:
+                self.value_compressed = compress(codec, datatype, new_value)
+            if self.value_compressed is not None:
+                new_value = "" if datatype == self.attribute.TYPE_TEXT else None
+        setattr(self, f"value_{datatype}", new_value)
 
     value = property(_get_value, _set_value)
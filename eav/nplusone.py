@@ -0,0 +1,155 @@
+"""
+This module contains a development helper detecting N+1 EAV value loads.
+
+Reading ``instance.eav.<slug>`` loads the value from the database. Doing it in
+a loop over a queryset (typically in a template) issues queries for every
+entity, which :meth:`~eav.queryset.EavQuerySet.prefetch_eav` avoids. Inside a
+:func:`detect_n_plus_one` block, or a request handled by
+:class:`~eav.middleware.NPlusOneMiddleware`, loading the values of
+``EAV2_N_PLUS_ONE_THRESHOLD`` (5 by default) different entities of the same
+model one at a time is reported, together with the ``prefetch_eav()`` call
+that removes the extra queries.
+
+The ``EAV2_N_PLUS_ONE`` setting selects what a report does: ``"warn"`` (the
+default) issues an :class:`~eav.exceptions.NPlusOneWarning` including the
+stack of the offending access, ``"raise"`` raises
+:class:`~eav.exceptions.NPlusOneError`.
+"""
+
+from __future__ import annotations
+
+import traceback
+import warnings
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from eav import settings as eav_settings
+from eav.exceptions import NPlusOneError, NPlusOneWarning
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+WARN = "warn"
+RAISE = "raise"
+
+_EAV_DIR = str(Path(__file__).parent)
+
+_detector: ContextVar[NPlusOneDetector | None] = ContextVar(
+    "eav_n_plus_one_detector",
+    default=None,
+)
+
+
+@dataclass
+class _Loads:
+    """Single loads of one content type."""
+
+    model_cls: type
+    pks: set = field(default_factory=set)
+    slugs: dict = field(default_factory=dict)
+    reported: bool = False
+
+
+class NPlusOneDetector:
+    """
+    Counts, per content type, the entities whose values were loaded one at a
+    time and reports once *threshold* of them were. *threshold* and *action*
+    default to the ``EAV2_N_PLUS_ONE_THRESHOLD`` and ``EAV2_N_PLUS_ONE``
+    settings.
+    """
+
+    def __init__(self, threshold: int | None = None, action: str | None = None):
+        if threshold is None:
+            threshold = getattr(
+                settings,
+                "EAV2_N_PLUS_ONE_THRESHOLD",
+                eav_settings.N_PLUS_ONE_THRESHOLD,
+            )
+        if action is None:
+            action = getattr(
+                settings,
+                "EAV2_N_PLUS_ONE",
+                eav_settings.N_PLUS_ONE_ACTION,
+            )
+        if action not in (WARN, RAISE):
+            raise ImproperlyConfigured(
+                f'EAV2_N_PLUS_ONE must be "{WARN}" or "{RAISE}", not {action!r}',
+            )
+
+        self.threshold = threshold
+        self.action = action
+        #: Messages of the reports made so far.
+        self.reports: list[str] = []
+        self._loads: dict[int, _Loads] = {}
+
+    def record(self, entity, slug: str) -> None:
+        """Record that *slug* was loaded from the database for *entity*."""
+        loads = self._loads.get(entity.ct.pk)
+        if loads is None:
+            loads = self._loads[entity.ct.pk] = _Loads(type(entity.instance))
+
+        loads.pks.add(entity.instance.pk)
+        loads.slugs[slug] = None
+
+        if not loads.reported and len(loads.pks) >= self.threshold:
+            loads.reported = True
+            self._report(loads)
+
+    def _report(self, loads: _Loads) -> None:
+        model_cls = loads.model_cls
+        manager = model_cls._eav_config_cls.manager_attr  # noqa: SLF001
+        slugs = ", ".join(repr(slug) for slug in loads.slugs)
+        message = (
+            f"EAV values of {len(loads.pks)} {model_cls.__name__} instances were "
+            + f"loaded one at a time (attributes {slugs}). Load them up front "
+            + f"with {model_cls.__name__}.{manager}.prefetch_eav({slugs})."
+        )
+        self.reports.append(message)
+
+        if self.action == RAISE:
+            raise NPlusOneError(message)
+
+        stack = [
+            frame
+            for frame in traceback.extract_stack()
+            if not frame.filename.startswith(_EAV_DIR)
+        ]
+        warnings.warn(
+            message + "\n" + "".join(traceback.format_list(stack)),
+            NPlusOneWarning,
+            stacklevel=5,
+        )
+
+
+def record_load(entity, slug: str) -> None:
+    """Report a database load of *slug* for *entity* to the active detector."""
+    detector = _detector.get()
+    if detector is not None and entity.instance.pk is not None:
+        detector.record(entity, slug)
+
+
+@contextmanager
+def detect_n_plus_one(
+    threshold: int | None = None,
+    action: str | None = None,
+) -> Iterator[NPlusOneDetector]:
+    """
+    Detect N+1 EAV value loads inside the ``with`` block (in the current
+    thread or task only). Yields the :class:`NPlusOneDetector`, whose
+    ``reports`` lists what was found. In tests, pass ``action="raise"`` to
+    fail on the first report::
+
+        with detect_n_plus_one(action="raise"):
+            render_patient_list()
+    """
+    token = _detector.set(NPlusOneDetector(threshold, action))
+    try:
+        yield _detector.get()
+    finally:
+        _detector.reset(token)
@@ -0,0 +1,146 @@
+"""
+This module contains the collection of attribute statistics and the
+selectivity-aware planning of EAV filters.
+
+:func:`analyze`, run by the ``eav_analyze`` management command, stores the
+number of values, distinct values, null ratio and most common values of every
+attribute, per entity content type, as :class:`~eav.models.AttributeStatistics`.
+Once an attribute has statistics, the filters on it are planned:
+
+* the keyword arguments of a ``filter()`` call are applied from the most to
+  the least selective, so the narrowest subquery is evaluated first;
+* each one picks how it is matched, see :func:`choose_strategy`;
+* :meth:`~eav.queryset.EavQuerySet.estimate_eav_count` estimates the number
+  of entities matched by the EAV filters of a queryset.
+
+Without statistics, filters are matched with a join as before. The lookups
+compiled by :func:`eav.queryset.compile_eav_lookup` carry the statistics of
+their attribute, so planning doesn't query the database; :func:`analyze`
+calls :func:`eav.schema.schema_changed` to drop them.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, Q
+
+from eav.models import Attribute, AttributeStatistics, Value
+from eav.schema import schema_changed
+from eav.settings import PLANNER_EXISTS_SELECTIVITY, PLANNER_IN_SELECTIVITY
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+#: Join the values table and match the value ids, the default.
+JOIN = "join"
+#: Match the primary keys selected by a subquery on the values.
+IN = "in"
+#: Match the entities for which a correlated subquery finds a value.
+EXISTS = "exists"
+
+
+def choose_strategy(selectivity: float | None) -> str:
+    """
+    Return how to match a filter expected to match the *selectivity* share
+    of the entities (None if unknown).
+
+    Filters matching at most ``EAV2_PLANNER_IN_SELECTIVITY`` (5% by default)
+    of the entities use :data:`IN`, since their few primary keys are cheap to
+    collect first. Filters matching at least ``EAV2_PLANNER_EXISTS_SELECTIVITY``
+    (50% by default) use :data:`EXISTS`, probing the values of each entity
+    instead of building a large set. Others, and filters without statistics,
+    use :data:`JOIN`.
+    """
+    if selectivity is None:
+        return JOIN
+    if selectivity <= getattr(
+        settings,
+        "EAV2_PLANNER_IN_SELECTIVITY",
+        PLANNER_IN_SELECTIVITY,
+    ):
+        return IN
+    if selectivity >= getattr(
+        settings,
+        "EAV2_PLANNER_EXISTS_SELECTIVITY",
+        PLANNER_EXISTS_SELECTIVITY,
+    ):
+        return EXISTS
+    return JOIN
+
+
+def _stat_field(attribute: Attribute) -> str:
+    if attribute.datatype == Attribute.TYPE_ENUM:
+        return "value_enum__value"
+    if attribute.datatype == Attribute.TYPE_OBJECT:
+        return "generic_value_id"
+    if attribute.dictionary:
+        # Strings too long to be interned count as nulls.
+        return "value_interned__text"
+    return f"value_{attribute.datatype}"
+
+
+def analyze(
+    model_classes: Iterable | None = None,
+    top: int = 10,
+) -> list[AttributeStatistics]:
+    """
+    Collect and store the statistics of every attribute for the entities of
+    *model_classes*, all models with values if None, keeping the *top* most
+    common values of each. Returns the statistics stored.
+
+    Other processes only see the new statistics through the schema cache,
+    whose version is changed once they are stored, see :mod:`eav.schema`.
+    """
+    if model_classes is None:
+        cts = ContentType.objects.filter(
+            pk__in=Value.objects.values("entity_ct"),
+        )
+    else:
+        cts = ContentType.objects.get_for_models(*model_classes).values()
+
+    stored = []
+    attributes = list(Attribute.objects.all())
+    for ct in cts:
+        model_cls = ct.model_class()
+        if model_cls is None:
+            continue
+        entity_count = model_cls._base_manager.count()  # noqa: SLF001
+
+        for attribute in attributes:
+            field = _stat_field(attribute)
+            values = Value.objects.filter(entity_ct=ct, attribute=attribute)
+            counts = values.aggregate(
+                rows=Count("pk"),
+                nulls=Count("pk", filter=Q(**{f"{field}__isnull": True})),
+                distinct=Count(field, distinct=True),
+            )
+            most_common = (
+                values.exclude(**{f"{field}__isnull": True})
+                .values(field)
+                .annotate(rows=Count("pk"))
+                .order_by("-rows", field)[:top]
+            )
+            statistics, _ = AttributeStatistics.objects.update_or_create(
+                attribute=attribute,
+                entity_ct=ct,
+                defaults={
+                    "entity_count": entity_count,
+                    "row_count": counts["rows"],
+                    "distinct_count": counts["distinct"],
+                    "null_ratio": (
+                        counts["nulls"] / counts["rows"] if counts["rows"] else 0.0
+                    ),
+                    "most_common": [
+                        [str(row[field]), row["rows"]] for row in most_common
+                    ],
+                },
+            )
+            stored.append(statistics)
+
+    # Drop the statistics carried by the compiled lookups, here and, through
+    # the schema cache, in the other processes.
+    schema_changed()
+    return stored
@@ -35,15 +35,72 @@ Q-expressions need to be rewritten for two reasons:
        MyModel.objects.filter(eav__a=x).exclude(eav__b=y)
 """
 
+from __future__ import annotations
+
+import threading
+import uuid
+from copy import copy
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from decimal import Decimal
 from functools import wraps
 from itertools import count
 
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Case, IntegerField, Q, When
+from django.db import connections, router
+from django.db.models import (
+    Case,
+    Exists,
+    FilteredRelation,
+    IntegerField,
+    Model,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    When,
+)
+from django.db.models import Value as Constant
+from django.db.models.functions import Coalesce
 from django.db.models.query import QuerySet
 from django.db.utils import NotSupportedError
 
-from eav.models import Attribute, EnumValue, Value
+from eav import schema
+from eav.explain import (
+    FilterStep,
+    MergedBranch,
+    OrderStep,
+    explain_eav,
+    leaves,
+    planned_lookup,
+)
+from eav.filter_cache import filter_cache
+from eav.identity import identity_map, uncommitted
+from eav.instrumentation import FILTER, ORDER, PREFETCH, WRITE, instrument
+from eav.logic.entity_pk import get_entity_pk_type
+from eav.logic.json_path import json_path_condition, split_json_path
+from eav.logic.mutations import CSVAppend, CSVRemove, JSONMerge, JSONRemoveKey
+from eav.models import (
+    Attribute,
+    AttributeStatistics,
+    EnumGroup,
+    EnumValue,
+    InternedText,
+    Value,
+)
+from eav.models.entity import defaults_of
+from eav.planner import IN, JOIN, choose_strategy
+from eav.snapshots import Snapshot, entity_cache
+from eav.tracing import (
+    CONTENT_TYPE,
+    FILTER_SPAN,
+    SLUGS,
+    STRATEGY,
+    content_type_label,
+    start_span,
+)
 
 
 def is_eav_and_leaf(expr, gr_name):
@@ -65,7 +122,7 @@ def is_eav_and_leaf(expr, gr_name):
     )
 
 
-def rewrite_q_expr(model_cls, expr):
+def rewrite_q_expr(model_cls, expr, merged=None):
     """
         Rewrites Q-expression to safe form, in order to ensure that
         generated SQL is valid.
@@ -95,80 +152,83 @@ def rewrite_q_expr(model_cls, expr):
              ├── AND
              │    └── eav_values__in [1, 2, 3]
              └── AND
-                  └── pk__in [1, 2]
+                  └── pk__in (entities of [4, 5] AND entities of [6, 7, 8])
     IGNORE
 
         This is done by merging dangerous AND's and substituting them with
-        explicit ``pk__in`` filter, where pks are taken from evaluated
-        Q-expr branch.
+        one explicit ``pk__in`` filter. AND'ed branches select their entities
+        with join-free subqueries, OR'ed ones share a single join. The tree is
+        rewritten in a single pass, in time linear in its size, and a new
+        Q-expression is returned: *expr* is not modified.
 
         Args:
             model_cls (TypeVar): model class used to construct :meth:`QuerySet`
                 from leaf attribute-value expression.
                 expr: (Q | tuple): Q-expression (or attr-val leaf) to be rewritten.
+                merged (list | None): if given, a
+                :class:`~eav.explain.MergedBranch` is appended to it for every
+                merged node.
 
         Returns:
             Union[Q, tuple]
     """
     # Node in a Q-expr can be a Q or an attribute-value tuple (leaf).
     # We are only interested in Qs.
+    if not isinstance(expr, Q):
+        return expr
 
-    if isinstance(expr, Q):
-        config_cls = getattr(model_cls, "_eav_config_cls", None)
-        gr_name = config_cls.generic_relation_attr
-
-        # Recursively check child nodes.
-        expr.children = [rewrite_q_expr(model_cls, c) for c in expr.children]
-        # Check which ones need a rewrite.
-        rewritable = [c for c in expr.children if is_eav_and_leaf(c, gr_name)]
-
-        # Conflict occurs only with two or more AND-expressions.
-        # If there is only one we can ignore it.
-
-        if len(rewritable) > 1:
-            q = None
-            # Save nodes which shouldn't be merged (non-EAV).
-            other = [c for c in expr.children if c not in rewritable]
-
-            for child in rewritable:
-                if not (child.children and len(child.children) == 1):
-                    raise AssertionError("Child must have exactly one descendant")
-                # Child to be merged is always a terminal Q node,
-                # i.e. it's an AND expression with attribute-value tuple child.
-                attrval = child.children[0]
-                if not isinstance(attrval, tuple):
-                    raise TypeError("Attribute-value must be a tuple")
-
-                fname = f"{gr_name}__in"
+    config_cls = getattr(model_cls, "_eav_config_cls", None)
+    gr_name = config_cls.generic_relation_attr
+
+    # Rewrite child nodes first, leaving the caller's tree untouched.
+    children = [rewrite_q_expr(model_cls, c, merged) for c in expr.children]
+    rewritable = [is_eav_and_leaf(c, gr_name) for c in children]
+
+    # Conflict occurs only with two or more AND-expressions.
+    # If there is only one we can ignore it.
+    if sum(rewritable) > 1:
+        # Merge them into one ``pk__in`` leaf, which the parent can merge in
+        # turn, so the whole node is a single set operation. Alternatives
+        # can share one join, but every AND'ed leaf needs its own subquery.
+        leaves = []
+        other = []
+        for child, merge in zip(children, rewritable):
+            if not merge:
+                other.append(child)
+            elif expr.connector == Q.OR:
+                leaves.append(child)
+            else:
+                leaves.append(Q(pk__in=_entity_pks(model_cls, child.children[0])))
 
-                # Child can be either a 'eav_values__in' or 'pk__in' query.
-                # If it's the former then transform it into the latter.
-                # Otherwise, check if the value is valid for the '__in' query.
-                # If so, reverse it back to QuerySet so that set operators
-                # can be applied.
+        q = Q(*leaves, _connector=expr.connector)
+        queryset = model_cls.objects.filter(q)
+        children = [*other, ("pk__in", queryset)]
+        if merged is not None:
+            merged.append(MergedBranch(expr.connector, len(leaves), queryset))
 
-                if attrval[0] == fname or hasattr(attrval[1], "__contains__"):
-                    # Create model queryset.
-                    _q = model_cls.objects.filter(**{fname: attrval[1]})
-                else:
-                    # Second val in tuple is a queryset.
-                    _q = attrval[1]
+    return _with_children(expr, children)
 
-                # Explicitly check for None. 'or' doesn't work here
-                # as empty QuerySet, which is valid, is falsy.
-                q = q if q is not None else _q
 
-                if expr.connector == "AND":
-                    q &= _q
-                else:
-                    q |= _q
+def _entity_pks(model_cls, attrval):
+    """
+    Returns the primary keys selected by an ``eav_values__in`` or ``pk__in``
+    attribute-value leaf of *model_cls*.
+    """
+    key, value = attrval
+    if key == "pk__in":
+        return value
 
-            # If any two children were merged,
-            # update parent expression.
-            if q is not None:
-                expr.children = [*other, ("pk__in", q)]
+    if not (
+        isinstance(value, QuerySet)
+        and value.model is Value
+        and not value.query.is_sliced
+        and not value.query.combinator
+    ):
+        value = Value.objects.filter(pk__in=value)
 
-    return expr
+    return value.filter(
+        entity_ct=ContentType.objects.get_for_model(model_cls),
+    ).values(get_entity_pk_type(model_cls))
 
 
 def eav_filter(func):
@@ -180,40 +240,413 @@ def eav_filter(func):
 
     @wraps(func)
     def wrapper(self, *args, **kwargs):
-        nargs = []
-        nkwargs = {}
-
-        for arg in args:
-            if isinstance(arg, Q):
-                # Modify Q objects (warning: recursion ahead).
-                arg = expand_q_filters(arg, self.model)  # noqa: PLW2901
-                # Rewrite Q-expression to safeform.
-                arg = rewrite_q_expr(self.model, arg)  # noqa: PLW2901
-            nargs.append(arg)
-
-        for key, value in kwargs.items():
-            # Modify kwargs (warning: recursion ahead).
-            nkey, nval = expand_eav_filter(self.model, key, value)
-
-            if nkey in nkwargs:
-                # Add filter to check if matching entity_id is
-                # in the previous queryset with same nkey
-                nkwargs[nkey] = nval.filter(
-                    entity_id__in=nkwargs[nkey].values_list("entity_id", flat=True),
-                ).distinct()
-            else:
-                nkwargs.update({nkey: nval})
+        merged = []
+        lookups = args, kwargs
+        cached = self._eav_cache_filter and filter_cache.enabled
+
+        measured = instrument(FILTER, self.model)
+        with start_span(FILTER_SPAN) as span, measured as operation:
+            if span or operation:
+                slugs = eav_lookup_slugs(self.model, args, kwargs)
+                operation.add_slugs(*slugs)
+                span.set_attributes(
+                    {
+                        CONTENT_TYPE: content_type_label(self.model),
+                        SLUGS: tuple(dict.fromkeys(slugs)),
+                    },
+                )
 
-        return func(self, *nargs, **nkwargs)
+            # The strategy of every EAV lookup, reported in the span, and
+            # the planned lookups, reported by explain_eav().
+            strategies = [] if span else None
+            planned = []
+            estimate = _estimate(self.model, Q(*args, **kwargs), using=self.db)
+            if cached:
+                args, kwargs = _cached_eav_filters(
+                    self,
+                    args,
+                    kwargs,
+                    strategies,
+                    planned,
+                )
+
+            nargs = _expand_args(
+                self.model,
+                args,
+                merged,
+                strategies,
+                planned,
+                using=self.db,
+            )
+            conditions, nkwargs = _expand_kwargs(
+                self.model,
+                kwargs,
+                strategies,
+                planned,
+                using=self.db,
+            )
+            if span:
+                span.set_attribute(STRATEGY, tuple(strategies))
+
+        result = func(self, *nargs, *conditions, **nkwargs)
+        if not isinstance(result, EavQuerySet):
+            return result
+
+        selectivity, entities = estimate
+        if selectivity is not None:
+            if func.__name__ == "exclude":
+                selectivity = 1 - selectivity
+            result._eav_estimates += ((selectivity, entities),)  # noqa: SLF001
+        # Recorded for explain_eav().
+        result._eav_steps += (  # noqa: SLF001
+            FilterStep(
+                method=func.__name__,
+                args=lookups[0],
+                kwargs=lookups[1],
+                rewritten=Q(*nargs, *conditions, **nkwargs),
+                merged=tuple(merged),
+                cached=cached,
+                lookups=tuple(planned),
+            ),
+        )
+        return result
 
     return wrapper
 
 
-def expand_q_filters(q, root_cls):
+def _expand_args(  # noqa: PLR0913
+    model_cls,
+    args,
+    merged,
+    strategies=None,
+    planned=None,
+    *,
+    using=None,
+):
+    """
+    Passes the Q-expressions of *args* through :func:`expand_q_filters`, for
+    the database *using*, and :func:`rewrite_q_expr`, which adds the
+    conditions it merged to *merged*.
+    Returns the expanded arguments. ``"q_rewrite"`` is appended to
+    *strategies*, if given, for each Q-expression with EAV lookups, and the
+    :class:`~eav.explain.PlannedLookup` of each of these lookups to
+    *planned*, if given.
+    """
+    nargs = []
+    for arg in args:
+        if isinstance(arg, Q):
+            if strategies is not None and eav_lookup_slugs(model_cls, (arg,), {}):
+                strategies.append("q_rewrite")
+            if planned is not None:
+                # Joined, or merged, unless matched by the primary keys of
+                # the entities, see CompiledLookup.expand().
+                leaves = _compiled_leaves(model_cls, arg, using=using)
+                for key, value, compiled in leaves:
+                    strategy = JOIN if compiled.default is None else IN
+                    planned.append(planned_lookup(key, value, compiled, strategy))
+            # Modify Q objects (warning: recursion ahead).
+            arg = expand_q_filters(arg, model_cls, using=using)  # noqa: PLW2901
+            # Rewrite Q-expression to safeform.
+            arg = rewrite_q_expr(model_cls, arg, merged)  # noqa: PLW2901
+        nargs.append(arg)
+    return nargs
+
+
+def _compiled_leaves(model_cls, node, *, using=None):
+    """
+    Yields the key, value and :class:`CompiledLookup` of the EAV lookups of
+    the Q-expression *node*, compiled for the database *using*.
+    """
+    for key, value, _ in leaves((node,)):
+        compiled = compile_eav_lookup(
+            model_cls,
+            key,
+            enum_value=isinstance(value, EnumValue),
+            using=using,
+        )
+        if compiled is not None:
+            yield key, value, compiled
+
+
+def _expand_kwargs(model_cls, kwargs, strategies=None, planned=None, *, using=None):
+    """
+    Passes *kwargs* through :func:`expand_eav_filter`, in the order planned
+    by :func:`_plan_kwargs`, for the database *using*. Returns the filter
+    conditions of the EAV lookups matched without a join (see
+    :func:`eav.planner.choose_strategy`) and the expanded keyword arguments.
+    The strategy of every EAV lookup is appended to *strategies*, and its
+    :class:`~eav.explain.PlannedLookup` to *planned*, if given.
+    """
+    conditions = []
+    nkwargs = {}
+    entity_field = get_entity_pk_type(model_cls)
+
+    for key, value, compiled in _plan_kwargs(model_cls, kwargs, using=using):
+        if compiled is None:
+            # Not an eav field, so keep as is
+            nkwargs[key] = value
+            continue
+
+        strategy = choose_strategy(compiled.selectivity(value))
+        if compiled.default is not None:
+            # Matched by the primary keys of the entities, see condition().
+            strategy = IN
+        if strategies is not None:
+            strategies.append(strategy)
+        if planned is not None:
+            planned.append(planned_lookup(key, value, compiled, strategy))
+        if strategy != JOIN:
+            conditions.append(compiled.condition(value, strategy))
+            continue
+
+        nkey, nval = compiled.expand(value)
+        if nkey in nkwargs:
+            # Add filter to check if matching entity is
+            # in the previous queryset with same nkey
+            nkwargs[nkey] = nval.filter(
+                **{
+                    f"{entity_field}__in": nkwargs[nkey].values_list(
+                        entity_field,
+                        flat=True,
+                    ),
+                },
+            ).distinct()
+        else:
+            nkwargs.update({nkey: nval})
+
+    return conditions, nkwargs
+
+
+class _Uncacheable(Exception):  # noqa: N818
+    """Raised for filters whose results can't be cached."""
+
+
+_PLAIN_TYPES = (
+    str,
+    int,
+    float,
+    Decimal,
+    date,
+    time,
+    timedelta,
+    uuid.UUID,
+    type(None),
+)
+
+
+def _freeze_value(value):
+    """Returns a hashable form of a filtered *value*."""
+    if isinstance(value, Model):
+        return (value._meta.label_lower, value.pk)  # noqa: SLF001
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((_freeze_value(v) for v in value), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze_value(v)) for k, v in value.items()))
+    if isinstance(value, _PLAIN_TYPES):
+        return value
+    # Querysets, expressions and the like depend on more than the values.
+    raise _Uncacheable
+
+
+def _freeze_predicate(model_cls, node, attribute_ids, using=None):
+    """
+    Returns a hashable form of *node*, a Q-expression or leaf made of EAV
+    lookups only, and adds the ids of the attributes it filters on to
+    *attribute_ids*. Lookups on attributes with a default aren't cached, as
+    they match entities created without values, which write no values.
+    """
+    if isinstance(node, Q):
+        children = tuple(
+            _freeze_predicate(model_cls, child, attribute_ids, using)
+            for child in node.children
+        )
+        return (node.connector, node.negated, children)
+
+    key, value = node
+    compiled = compile_eav_lookup(
+        model_cls,
+        key,
+        enum_value=isinstance(value, EnumValue),
+        using=using,
+    )
+    if compiled is None or compiled.default is not None:
+        raise _Uncacheable
+    attribute_ids.add(compiled.attribute_id)
+    return (key, _freeze_value(value))
+
+
+def _cached_eav_filters(queryset, args, kwargs, strategies=None, planned=None):
+    """
+    Replaces the EAV lookups of a filter call on *queryset* with the cached
+    primary keys of the entities they match. The EAV keyword arguments are
+    cached together, each Q-expression made of EAV lookups only on its own.
+    Appends ``"cached"`` to *strategies*, if given, for each of them, and
+    the :class:`~eav.explain.PlannedLookup` of each of their lookups to
+    *planned*, if given.
+    """
+    model_cls = queryset.model
+    eav_attr = model_cls._eav_config_cls.eav_attr  # noqa: SLF001
+    eav_kwargs = {
+        key: value for key, value in kwargs.items() if key.split("__", 1)[0] == eav_attr
+    }
+    nkwargs = {key: value for key, value in kwargs.items() if key not in eav_kwargs}
+    nargs = [arg for arg in args if not isinstance(arg, Q)]
+
+    predicates = [arg for arg in args if isinstance(arg, Q)]
+    if eav_kwargs:
+        predicates.append(Q(**eav_kwargs))
+    ct_id = ContentType.objects.get_for_model(model_cls).pk
+
+    for predicate in predicates:
+        attribute_ids = set()
+        try:
+            frozen = _freeze_predicate(
+                model_cls,
+                predicate,
+                attribute_ids,
+                queryset.db,
+            )
+        except _Uncacheable:
+            attribute_ids.clear()
+        if not attribute_ids:
+            nargs.append(predicate)
+            continue
+
+        pks = filter_cache.get_or_load(
+            ct_id,
+            (queryset.db, frozen),
+            attribute_ids,
+            lambda predicate=predicate: (
+                EavQuerySet(model_cls, using=queryset.db)
+                .filter(predicate)
+                .values_list("pk", flat=True)
+            ),
+            timeout=queryset._eav_cache_timeout,  # noqa: SLF001
+            using=queryset.db,
+        )
+        nargs.append(Q(pk__in=pks))
+        if strategies is not None:
+            strategies.append("cached")
+        if planned is not None:
+            planned.extend(
+                planned_lookup(key, value, compiled, "cached")
+                for key, value, compiled in _compiled_leaves(
+                    model_cls,
+                    predicate,
+                    using=queryset.db,
+                )
+            )
+
+    return nargs, nkwargs
+
+
+def _plan_kwargs(model_cls, kwargs, *, using=None):
+    """
+    Returns the key, value and :class:`CompiledLookup` (None for non-EAV
+    keys) of *kwargs*, the EAV lookups ordered from the most to the least
+    selective. Lookups without statistics keep their order, after the others.
+    """
+    planned = [
+        (
+            key,
+            value,
+            compile_eav_lookup(
+                model_cls,
+                key,
+                enum_value=isinstance(value, EnumValue),
+                using=using,
+            ),
+        )
+        for key, value in kwargs.items()
+    ]
+
+    def selectivity(item):
+        _, value, compiled = item
+        estimate = compiled.selectivity(value) if compiled else None
+        return (estimate is None, estimate or 0)
+
+    return sorted(planned, key=selectivity)
+
+
+def estimate_selectivity(model_cls, node):
+    """
+    Returns the estimated share of the entities of *model_cls* matched by
+    *node*, a Q-expression or lookup, from the statistics of its EAV
+    attributes, or None if it can't be estimated. Non-EAV lookups are
+    assumed to match everything.
+    """
+    return _estimate(model_cls, node)[0]
+
+
+def _estimate(model_cls, node, *, using=None):
+    """
+    Returns the selectivity of *node* (see :func:`estimate_selectivity`) and
+    the number of entities in the statistics it was estimated with, compiling
+    its lookups for the database *using*.
+    """
+    if isinstance(node, Q):
+        estimates = [_estimate(model_cls, c, using=using) for c in node.children]
+        known = [selectivity for selectivity, _ in estimates if selectivity is not None]
+        entities = max((count for _, count in estimates), default=0)
+        if node.connector == Q.OR:
+            if not known or len(known) < len(estimates):
+                return None, entities
+            unmatched = 1.0
+            for selectivity in known:
+                unmatched *= 1 - selectivity
+            selectivity = 1 - unmatched
+        else:
+            if not known:
+                return None, entities
+            selectivity = 1.0
+            for estimate in known:
+                selectivity *= estimate
+        return (1 - selectivity if node.negated else selectivity), entities
+
+    if not isinstance(node, tuple):
+        return None, 0
+    key, value = node
+    compiled = compile_eav_lookup(
+        model_cls,
+        key,
+        enum_value=isinstance(value, EnumValue),
+        using=using,
+    )
+    selectivity = compiled.selectivity(value) if compiled else None
+    if selectivity is None:
+        return None, 0
+    return selectivity, compiled.statistics.entity_count
+
+
+def eav_lookup_slugs(model_cls, args, kwargs):
+    """
+    Returns the attribute slugs referenced by the EAV lookups in *args*
+    (Q-expressions) and *kwargs*, in order of appearance.
+    """
+    config_cls = getattr(model_cls, "_eav_config_cls", None)
+    if not config_cls:
+        return []
+
+    def lookups(nodes):
+        for node in nodes:
+            if isinstance(node, Q):
+                yield from lookups(node.children)
+            elif isinstance(node, tuple):
+                yield node[0]
+
+    keys = [*lookups(args), *kwargs]
+    fields = [key.split("__") for key in keys]
+    return [f[1] for f in fields if len(f) > 1 and f[0] == config_cls.eav_attr]
+
+
+def expand_q_filters(q, root_cls, *, using=None):
     """
     Takes a Q object and a model class.
     Recursively passes each filter / value in the Q object tree leaf nodes
-    through :func:`expand_eav_filter`.
+    through :func:`expand_eav_filter`, for the database *using*. Returns a
+    new Q object, *q* is not modified.
     """
     new_children = []
 
@@ -221,17 +654,299 @@ def expand_q_filters(q, root_cls):
         if isinstance(qi, tuple):
             # This child is a leaf node: in Q this is a 2-tuple of:
             # (filter parameter, value).
-            key, value = expand_eav_filter(root_cls, *qi)
+            key, value = expand_eav_filter(root_cls, *qi, using=using)
             new_children.append(Q(**{key: value}))
         else:
             # This child is another Q node: recursify!
-            new_children.append(expand_q_filters(qi, root_cls))
+            new_children.append(expand_q_filters(qi, root_cls, using=using))
+
+    return _with_children(q, new_children)
+
+
+def _with_children(q, children):
+    """Return a copy of *q* with *children*, leaving *q* untouched."""
+    node = copy(q)
+    node.children = children
+    return node
+
 
-    q.children = new_children
-    return q
+_MASK_LOOKUPS = frozenset(("exact", "has", "has_all", "has_any"))
 
 
-def expand_eav_filter(model_cls, key, value):
+def _generic_value_condition(value_key, lookup, value):
+    """
+    Return the condition on :class:`Value` of the *lookup* of *value* on
+    *value_key*, a lookup of ``generic_value_id``. The ``exact`` and ``in``
+    lookups of model instances also match their content type, so that the
+    index on ``(generic_value_ct, generic_value_id)`` can be used.
+    """
+    targets = value if lookup == "in" else [value]
+    if lookup not in {"exact", "in"} or not all(
+        isinstance(target, Model) for target in targets
+    ):
+        return Q(**{value_key: value})
+
+    pks_by_ct = {}
+    for target in targets:
+        ct = ContentType.objects.get_for_model(target)
+        pks_by_ct.setdefault(ct.pk, []).append(target.pk)
+    condition = Q(pk__in=[])
+    for ct_id, pks in pks_by_ct.items():
+        condition |= Q(generic_value_ct_id=ct_id, generic_value_id__in=pks)
+    return condition
+
+
+@dataclass(frozen=True)
+class CompiledLookup:
+    """
+    The translation of an ``eav__<slug>__<lookup>`` filter key: a lookup of
+    *value_key* on the values of the attribute with *attribute_id*, matched
+    through the *relation* of the entity model, with the *statistics* of the
+    attribute for that model, if any (see :mod:`eav.planner`). Lookups on
+    the *json_path* of JSON values are compiled for the database *vendor*,
+    see :mod:`eav.logic.json_path`, and lookups of multiple selections to
+    masks of the ordinals of their *enum_group*. Lookups of model instances
+    on *generic* relations match their content type and primary key, and
+    lookups of *dictionary* encoded strings match the keys of the interned
+    strings. Entities without a value match if the *default* of the
+    attribute does.
+    """
+
+    relation: str
+    value_key: str
+    attribute_id: int
+    lookup: str = "exact"
+    entity_ct_id: int | None = None
+    entity_field: str = "entity_id"
+    statistics: AttributeStatistics | None = field(
+        default=None,
+        compare=False,
+        repr=False,
+    )
+    json_path: tuple[str, ...] = ()
+    vendor: str = ""
+    enum_group: EnumGroup | None = field(default=None, compare=False, repr=False)
+    generic: bool = False
+    dictionary: bool = False
+    default: object = field(default=None, compare=False, repr=False)
+
+    def _values(self, value):
+        if self.dictionary and self.lookup != "isnull":
+            # The few interned strings are matched first, the values are
+            # then compared by key; strings too long to be interned are
+            # stored as plain text.
+            interned = InternedText.objects.filter(
+                attribute_id=self.attribute_id,
+                **{f"text__{self.lookup}": value},
+            )
+            return Value.objects.filter(
+                Q(value_interned__in=interned.values("pk"))
+                | Q(value_interned__isnull=True, **{self.value_key: value}),
+                attribute_id=self.attribute_id,
+            )
+        if self.generic:
+            return Value.objects.filter(
+                _generic_value_condition(self.value_key, self.lookup, value),
+                attribute_id=self.attribute_id,
+            )
+        if self.enum_group is not None and self.lookup in _MASK_LOOKUPS:
+            # Multiple selections are matched by the bitmask of the members.
+            members = [value] if self.lookup == "has" else value
+            value, complete = self.enum_group.lookup_mask(members)
+            if not complete and self.lookup != "has_any":
+                return Value.objects.none()
+        if self.json_path:
+            return Value.objects.filter(
+                json_path_condition(self.json_path, self.lookup, value, self.vendor),
+                attribute_id=self.attribute_id,
+            )
+        return Value.objects.filter(
+            **{self.value_key: value, "attribute_id": self.attribute_id},
+        )
+
+    def _entities(self, value):
+        # Entities without a value are matched by comparing the default,
+        # as a constant, like COALESCE(value, default) would.
+        model_cls = ContentType.objects.get_for_id(self.entity_ct_id).model_class()
+        column = self.value_key.split("__")[0]
+        values = Value.objects.filter(
+            attribute_id=self.attribute_id,
+            entity_ct_id=self.entity_ct_id,
+        )
+        return (
+            model_cls._base_manager.alias(  # noqa: SLF001
+                _eav_default=Constant(
+                    self.default,
+                    output_field=Value._meta.get_field(column),  # noqa: SLF001
+                ),
+            )
+            .filter(
+                Q(pk__in=self._values(value).values(self.entity_field))
+                | Q(
+                    ~Exists(values.filter(**{self.entity_field: OuterRef("pk")})),
+                    **{self.value_key.replace(column, "_eav_default", 1): value},
+                ),
+            )
+            .values("pk")
+        )
+
+    def expand(self, value):
+        """Return the filter key and value matching *value*."""
+        if self.default is not None:
+            return "pk__in", self._entities(value)
+        return self.relation, self._values(value)
+
+    def condition(self, value, strategy=JOIN):
+        """
+        Return the filter argument matching *value* with *strategy*, one of
+        the strategies of :mod:`eav.planner`. Attributes with a default are
+        always matched by the primary keys of their entities.
+        """
+        if strategy == JOIN or self.default is not None:
+            return Q(self.expand(value))
+        values = self._values(value).filter(entity_ct_id=self.entity_ct_id)
+        if strategy == IN:
+            return Q(pk__in=values.values(self.entity_field))
+        return Exists(values.filter(**{self.entity_field: OuterRef("pk")}))
+
+    def selectivity(self, value):
+        """
+        Return the estimated share of the entities matching *value*, or
+        None without statistics.
+        """
+        statistics = self.statistics
+        if statistics is None or not statistics.entity_count:
+            return None
+        rows = statistics.estimate_rows(self.lookup, value)
+        return min(rows / statistics.entity_count, 1.0)
+
+
+class _CompiledLookups:
+    """
+    The compiled lookups, dropped when the schema changes or when the
+    transaction they were compiled in is rolled back.
+    """
+
+    maxsize = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            if self._generation != schema.generation():
+                self._entries.clear()
+                self._generation = schema.generation()
+            compiled, pending = self._entries.get(key, (None, None))
+            if pending is not None and not pending.valid():
+                if pending.rolled_back():
+                    del self._entries[key]
+                return None
+            return compiled
+
+    def add(self, key, compiled):
+        pending = uncommitted(router.db_for_read(Attribute))
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                self._entries.clear()
+            self._entries[key] = (compiled, pending)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_compiled_lookups = _CompiledLookups()
+
+
+def compile_eav_lookup(model_cls, key, *, enum_value=False, using=None):
+    """
+    Return the :class:`CompiledLookup` of the EAV filter *key* on
+    *model_cls*, or None if *key* isn't an EAV filter. *enum_value* tells
+    whether the value filtered on is an :class:`EnumValue` instance. The
+    lookup is compiled for the vendor of the database *using*, the one
+    values are read from by default.
+
+    Lookups are compiled once per filter shape and database, and memoized
+    until the schema changes (see :func:`eav.schema.generation`). Raises
+    ``Attribute.DoesNotExist`` for an unknown slug, and ``NotSupportedError``
+    for a compressed attribute (see :mod:`eav.logic.compression`).
+    """
+    config_cls = getattr(model_cls, "_eav_config_cls", None)
+    fields = key.split("__")
+    if len(fields) < 2 or not config_cls or fields[0] != config_cls.eav_attr:  # noqa: PLR2004
+        return None
+
+    if using is None:
+        using = router.db_for_read(Value)
+    cache_key = (model_cls, key, enum_value, using)
+    compiled = _compiled_lookups.get(cache_key)
+    if compiled is not None:
+        return compiled
+
+    slug = fields[1]
+    ct_id = ContentType.objects.get_for_model(model_cls).pk
+    # Load the statistics of the attribute for model_cls in the same query.
+    attribute = (
+        Attribute.objects.annotate(
+            _statistics=FilteredRelation(
+                "statistics",
+                condition=Q(statistics__entity_ct=ct_id),
+            ),
+        )
+        .select_related("_statistics", "enum_group")
+        .get(slug=slug)
+    )
+    if attribute.compression:
+        raise NotSupportedError(
+            f'EAV attribute "{slug}" is compressed and cannot be filtered on',
+        )
+    datatype = attribute.datatype
+    json_path = ()
+    enum_group = None
+    generic = False
+    lookup = fields[2] if len(fields) > 2 else "exact"  # noqa: PLR2004
+
+    if datatype == Attribute.TYPE_ENUM and not enum_value:
+        suffix = f"__value__{fields[2]}" if len(fields) > 2 else "__value"  # noqa: PLR2004
+        value_key = f"value_{datatype}{suffix}"
+    elif datatype == Attribute.TYPE_OBJECT:
+        generic = True
+        suffix = f"__{fields[2]}" if len(fields) > 2 else ""  # noqa: PLR2004
+        value_key = f"generic_value_id{suffix}"
+    elif datatype == Attribute.TYPE_MULTI_ENUM:
+        enum_group = attribute.enum_group
+        suffix = f"__{fields[2]}" if len(fields) > 2 else ""  # noqa: PLR2004
+        value_key = f"value_{datatype}{suffix}"
+    elif datatype == Attribute.TYPE_JSON:
+        json_path, lookup = split_json_path(fields[2:])
+        value_key = "__".join((f"value_{datatype}", *fields[2:]))
+    else:
+        suffix = f"__{fields[2]}" if len(fields) > 2 else ""  # noqa: PLR2004
+        value_key = f"value_{datatype}{suffix}"
+
+    compiled = CompiledLookup(
+        relation=f"{config_cls.generic_relation_attr}__in",
+        value_key=value_key,
+        attribute_id=attribute.pk,
+        lookup=lookup,
+        entity_ct_id=ct_id,
+        entity_field=get_entity_pk_type(model_cls),
+        statistics=getattr(attribute, "_statistics", None),
+        json_path=json_path,
+        vendor=connections[using].vendor,
+        enum_group=enum_group,
+        generic=generic,
+        dictionary=attribute.dictionary,
+        default=attribute.get_default(),
+    )
+    _compiled_lookups.add(cache_key, compiled)
+    return compiled
+
+
+def expand_eav_filter(model_cls, key, value, *, using=None):
     """
     Accepts a model class and a key, value.
     Recurisively replaces any eav filter with a subquery.
@@ -244,32 +959,157 @@ def expand_eav_filter(model_cls, key, value):
     Would return::
 
         key = 'eav_values__in'
-        value = Values.objects.filter(value_int=5, attribute__slug='height')
+        value = Values.objects.filter(value_int=5, attribute_id=<height id>)
+
+    The translation of *key* is compiled by :func:`compile_eav_lookup`, for
+    the database *using*.
     """
-    fields = key.split("__")
-    config_cls = getattr(model_cls, "_eav_config_cls", None)
+    compiled = compile_eav_lookup(
+        model_cls,
+        key,
+        enum_value=isinstance(value, EnumValue),
+        using=using,
+    )
+    if compiled is None:
+        # Not an eav field, so keep as is
+        return key, value
+    return compiled.expand(value)
 
-    if len(fields) > 1 and config_cls and fields[0] == config_cls.eav_attr:
-        slug = fields[1]
-        gr_name = config_cls.generic_relation_attr
-        datatype = Attribute.objects.get(slug=slug).datatype
-
-        value_key = ""
-        if datatype == Attribute.TYPE_ENUM and not isinstance(value, EnumValue):
-            lookup = f"__value__{fields[2]}" if len(fields) > 2 else "__value"  # noqa: PLR2004
-            value_key = f"value_{datatype}{lookup}"
-        elif datatype == Attribute.TYPE_OBJECT:
-            value_key = "generic_value_id"
-        else:
-            lookup = f"__{fields[2]}" if len(fields) > 2 else ""  # noqa: PLR2004
-            value_key = f"value_{datatype}{lookup}"
-        kwargs = {value_key: value, "attribute__slug": slug}
-        value = Value.objects.filter(**kwargs)
 
-        return f"{gr_name}__in", value
+def _load_values(model_cls, instances, slugs):
+    """
+    Return the slugs of the attributes in *slugs* (all if empty), their
+    defaults by slug and the :class:`Value` objects of *instances* for them,
+    by entity pk and slug.
+    """
+    config_cls = model_cls._eav_config_cls  # noqa: SLF001
+    entity_field = get_entity_pk_type(model_cls)
+
+    attributes = config_cls.get_attributes()
+    if slugs:
+        attributes = attributes.filter(slug__in=slugs)
+    attributes = {a.pk: identity_map.add(a) for a in attributes}
+    known = frozenset(a.slug for a in attributes.values())
+    defaults = defaults_of(attributes.values())
+
+    # Only the value columns of the loaded attributes' datatypes are read.
+    datatypes = {a.datatype for a in attributes.values()}
+    loaded = Value.objects.filter(
+        entity_ct=ContentType.objects.get_for_model(model_cls),
+        attribute__in=list(attributes),
+        **{f"{entity_field}__in": [instance.pk for instance in instances]},
+    ).only_datatypes(datatypes)
+    if Attribute.TYPE_ENUM in datatypes:
+        loaded = loaded.select_related("value_enum")
+    if Attribute.TYPE_TEXT in datatypes:
+        loaded = loaded.select_related("value_interned")
+
+    values = {}
+    for value in loaded:
+        # Share the attribute, enum value and interned text instances,
+        # rather than joining a copy of the attribute into every row.
+        value.attribute = attributes[value.attribute_id]
+        datatype = value.attribute.datatype
+        if datatype == Attribute.TYPE_ENUM and value.value_enum:
+            value.value_enum = identity_map.add(value.value_enum)
+        if datatype == Attribute.TYPE_TEXT and value.value_interned:
+            value.value_interned = identity_map.add(value.value_interned)
+        entity_pk = getattr(value, entity_field)
+        values.setdefault(entity_pk, {})[value.attribute.slug] = value
+    _load_value_objects(
+        value
+        for entity_values in values.values()
+        for value in entity_values.values()
+        if value.attribute.datatype == Attribute.TYPE_OBJECT
+    )
+    return known, defaults, values
 
-    # Not an eav field, so keep as is
-    return key, value
+
+def _load_value_objects(values):
+    """
+    Resolve the ``value_object`` of the object attribute *values* with one
+    ``in_bulk()`` query per content type, rather than one query per value.
+    Objects that no longer exist resolve to None, as they would on access.
+    """
+    value_object = Value._meta.get_field("value_object")  # noqa: SLF001
+    by_ct = {}
+    for value in values:
+        if value.generic_value_ct_id is not None and value.generic_value_id is not None:
+            by_ct.setdefault(value.generic_value_ct_id, []).append(value)
+
+    for ct_id, ct_values in by_ct.items():
+        model_cls = ContentType.objects.get_for_id(ct_id).model_class()
+        if model_cls is None:
+            continue
+        using = ct_values[0]._state.db  # noqa: SLF001
+        objects = model_cls._base_manager.using(using).in_bulk(  # noqa: SLF001
+            {value.generic_value_id for value in ct_values},
+        )
+        for value in ct_values:
+            value_object.set_cached_value(value, objects.get(value.generic_value_id))
+
+
+def _prefetch_snapshots(model_cls, instances, operation):
+    """
+    Attach the cached snapshots of *instances*, taking the missing ones,
+    see :mod:`eav.snapshots`.
+    """
+    ct_id = ContentType.objects.get_for_model(model_cls).pk
+    snapshots = entity_cache.get_many(ct_id, [instance.pk for instance in instances])
+
+    missing = [instance for instance in instances if instance.pk not in snapshots]
+    if missing:
+        known, defaults, values = _load_values(model_cls, missing, ())
+        taken = {
+            instance.pk: Snapshot(
+                slugs=known,
+                values={
+                    **defaults,
+                    **{
+                        slug: value.value
+                        for slug, value in values.get(instance.pk, {}).items()
+                    },
+                },
+            )
+            for instance in missing
+        }
+        entity_cache.set_many(ct_id, taken, instances[0]._state.db)  # noqa: SLF001
+        snapshots.update(taken)
+        operation.add_rows(sum(len(v) for v in values.values()))
+
+    eav_attr = model_cls._eav_config_cls.eav_attr  # noqa: SLF001
+    for instance in instances:
+        getattr(instance, eav_attr).set_snapshot(snapshots[instance.pk])
+
+
+def prefetch_eav(instances, *slugs):
+    """
+    Load the values of the attributes in *slugs* (all attributes if none are
+    given) for every entity in *instances* with a single query, so that
+    reading ``instance.eav.<slug>`` afterwards doesn't hit the database.
+
+    Attributes are resolved through the ``get_attributes()`` of the model's
+    config class, called without an instance. When all attributes are loaded
+    and the :mod:`entity cache <eav.snapshots>` is enabled, the cached
+    snapshots are used and only the missing entities are queried.
+    """
+    instances = [instance for instance in instances if instance.pk is not None]
+    if not instances:
+        return
+
+    model_cls = type(instances[0])
+    with instrument(PREFETCH, model_cls, slugs) as operation:
+        if not slugs and entity_cache.enabled:
+            _prefetch_snapshots(model_cls, instances, operation)
+            return
+
+        known, defaults, values = _load_values(model_cls, instances, slugs)
+        operation.add_rows(sum(len(v) for v in values.values()))
+
+    eav_attr = model_cls._eav_config_cls.eav_attr  # noqa: SLF001
+    for instance in instances:
+        entity = getattr(instance, eav_attr)
+        entity.set_prefetched_values(known, values.get(instance.pk, {}), defaults)
 
 
 class EavQuerySet(QuerySet):
@@ -277,6 +1117,91 @@ class EavQuerySet(QuerySet):
     Overrides relational operators for EAV models.
     """
 
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._eav_prefetch = None
+        self._eav_prefetch_done = False
+        self._eav_cache_filter = False
+        self._eav_cache_timeout = DEFAULT_TIMEOUT
+        self._eav_estimates = ()
+        self._eav_steps = ()
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._eav_prefetch = self._eav_prefetch  # noqa: SLF001
+        clone._eav_cache_filter = self._eav_cache_filter  # noqa: SLF001
+        clone._eav_cache_timeout = self._eav_cache_timeout  # noqa: SLF001
+        clone._eav_estimates = self._eav_estimates  # noqa: SLF001
+        clone._eav_steps = self._eav_steps  # noqa: SLF001
+        return clone
+
+    def _fetch_all(self):
+        super()._fetch_all()
+        if self._eav_prefetch is not None and not self._eav_prefetch_done:
+            prefetch_eav(
+                [obj for obj in self._result_cache if isinstance(obj, self.model)],
+                *self._eav_prefetch,
+            )
+            self._eav_prefetch_done = True
+
+    def prefetch_eav(self, *slugs):
+        """
+        Return a new ``QuerySet`` that loads the values of the attributes in
+        *slugs* (all attributes if none are given) for all its entities in a
+        single query when it is evaluated. See :func:`prefetch_eav`.
+
+        .. note::
+           Like ``prefetch_related()``, this has no effect with
+           ``iterator()``.
+        """
+        clone = self._chain()
+        clone._eav_prefetch = slugs  # noqa: SLF001
+        return clone
+
+    def cache_eav_filter(self, timeout=DEFAULT_TIMEOUT):
+        """
+        Return a new ``QuerySet`` whose following ``filter()``, ``exclude()``
+        and ``get()`` calls look up the primary keys of the entities matching
+        their EAV lookups in the filter cache, caching them for *timeout*
+        seconds (the default timeout of the cache if unset) on a miss. See
+        :mod:`eav.filter_cache`.
+
+        The keyword arguments filtering on EAV attributes are cached together,
+        and each Q-expression made of EAV lookups only on its own. Lookups on
+        querysets or expressions are never cached. Has no effect unless
+        ``EAV2_FILTER_CACHE`` is set.
+        """
+        clone = self._chain()
+        clone._eav_cache_filter = True  # noqa: SLF001
+        clone._eav_cache_timeout = timeout  # noqa: SLF001
+        return clone
+
+    def estimate_eav_count(self):
+        """
+        Return the number of entities estimated to match the EAV filters of
+        this ``QuerySet`` from the statistics collected by ``eav_analyze``,
+        or None if none of them has statistics. Other filters are ignored,
+        and the values of attributes are assumed to be independent. See
+        :mod:`eav.planner`.
+        """
+        if not self._eav_estimates:
+            return None
+        selectivity = 1.0
+        for estimate, _ in self._eav_estimates:
+            selectivity *= estimate
+        entities = max(count for _, count in self._eav_estimates)
+        return round(entities * selectivity)
+
+    def explain_eav(self, **options):
+        """
+        Return an :class:`~eav.explain.EavExplanation` of how the EAV filters
+        and orderings of this ``QuerySet`` were rewritten and planned, with
+        its SQL, the ``EXPLAIN`` output of the database (passing *options* to
+        ``explain()``) and warnings about anti-patterns. See
+        :mod:`eav.explain`.
+        """
+        return explain_eav(self, **options)
+
     @eav_filter
     def filter(self, *args, **kwargs):
         """
@@ -301,6 +1226,76 @@ class EavQuerySet(QuerySet):
         """
         return super().get(*args, **kwargs)
 
+    def increment_eav(self, slug, amount=1):
+        """
+        Add *amount* to the values of the *int* or *float* attribute *slug*
+        for the entities of this queryset with one ``UPDATE``, creating the
+        missing ones from the default. Returns the new values by primary key.
+        See :meth:`Attribute.increment <eav.models.Attribute.increment>`.
+        """
+        with instrument(WRITE, self.model, (slug,)) as operation:
+            attribute = Attribute.objects.get(slug=slug)
+            incremented = attribute.increment(
+                self.model,
+                self.values("pk"),
+                amount,
+                using=self.db,
+            )
+            operation.add_rows(len(incremented))
+        return incremented
+
+    increment_eav.alters_data = True
+
+    def json_merge_eav(self, slug, patch):
+        """
+        Set the top-level keys of the values of the *json* attribute *slug*
+        of the entities of this queryset to those of *patch*, in the
+        database. Returns the number of values changed. See
+        :class:`~eav.logic.mutations.JSONMerge`.
+        """
+        return self._mutate_eav(slug, JSONMerge(patch))
+
+    def json_remove_key_eav(self, slug, key):
+        """
+        Remove the top-level *key* of the values of the *json* attribute
+        *slug* of the entities of this queryset, in the database. Returns the
+        number of values changed. See :class:`~eav.logic.mutations.JSONRemoveKey`.
+        """
+        return self._mutate_eav(slug, JSONRemoveKey(key))
+
+    def csv_append_eav(self, slug, item):
+        """
+        Append *item* to the values of the *csv* attribute *slug* of the
+        entities of this queryset, in the database. Returns the number of
+        values changed. See :class:`~eav.logic.mutations.CSVAppend`.
+        """
+        return self._mutate_eav(slug, CSVAppend(item))
+
+    def csv_remove_eav(self, slug, item):
+        """
+        Remove *item* from the values of the *csv* attribute *slug* of the
+        entities of this queryset, in the database. Returns the number of
+        values changed. See :class:`~eav.logic.mutations.CSVRemove`.
+        """
+        return self._mutate_eav(slug, CSVRemove(item))
+
+    json_merge_eav.alters_data = True
+    json_remove_key_eav.alters_data = True
+    csv_append_eav.alters_data = True
+    csv_remove_eav.alters_data = True
+
+    def _mutate_eav(self, slug, mutation):
+        with instrument(WRITE, self.model, (slug,)) as operation:
+            attribute = Attribute.objects.get(slug=slug)
+            changed = attribute.mutate(
+                self.model,
+                self.values("pk"),
+                mutation,
+                using=self.db,
+            )
+            operation.add_rows(changed)
+        return changed
+
     def order_by(self, *fields):
         # Django only allows to order querysets by direct fields and
         # foreign-key chains. In order to bypass this behaviour and order
@@ -308,52 +1303,96 @@ class EavQuerySet(QuerySet):
         # clause manually using Django's conditional expressions.
         # This will be slow, of course.
         order_clauses = []
+        orderings = []
         query_clause = self
         config_cls = self.model._eav_config_cls  # noqa: SLF001
 
         for term in [t.split("__") for t in fields]:
             # Continue only for EAV attributes.
             if len(term) == 2 and term[0] == config_cls.eav_attr:  # noqa: PLR2004
-                # Retrieve Attribute over which the ordering is performed.
-                try:
-                    attr = Attribute.objects.get(slug=term[1])
-                except ObjectDoesNotExist as err:
-                    raise ObjectDoesNotExist(
-                        f'Cannot find EAV attribute "{term[1]}"',
-                    ) from err
-
-                field_name = f"value_{attr.datatype}"
-
-                pks_values = (
-                    Value.objects.filter(
-                        # Retrieve pk-values pairs of the related values
-                        # (i.e. values for the specified attribute and
-                        # belonging to entities in the queryset).
-                        attribute__slug=attr.slug,
-                        entity_id__in=self,
-                    )
-                    .order_by(
-                        # Order values by their value-field of
-                        # appropriate attribute data-type.
-                        field_name,
-                    )
-                    .values_list(
-                        # Retrieve only primary-keys of the entities
-                        # in the current queryset.
-                        "entity_id",
-                        field_name,
-                    )
-                )
-
-                # Retrieve ordered values from pk-value list.
-                _, ordered_values = zip(*pks_values)
-
-                # Add explicit ordering and turn
-                # list of pairs into look-up table.
-                val2ind = dict(zip(ordered_values, count()))
-
-                # Finally, zip ordered pks with their grouped orderings.
-                entities_pk = [(pk, val2ind[val]) for pk, val in pks_values]
+                with instrument(ORDER, self.model, (term[1],)) as operation:
+                    # Retrieve Attribute over which the ordering is performed.
+                    try:
+                        attr = Attribute.objects.get(slug=term[1])
+                    except ObjectDoesNotExist as err:
+                        raise ObjectDoesNotExist(
+                            f'Cannot find EAV attribute "{term[1]}"',
+                        ) from err
+                    if attr.compression:
+                        raise NotSupportedError(
+                            f'EAV attribute "{attr.slug}" is compressed and '
+                            + "cannot be ordered on",
+                        )
+
+                    field_name = f"value_{attr.datatype}"
+                    entity_field = get_entity_pk_type(self.model)
+
+                    values = Value.objects.all()
+                    if attr.dictionary:
+                        # Order interned strings along with plain ones.
+                        field_name = "_text"
+                        values = values.annotate(
+                            _text=Coalesce(
+                                "value_interned__text",
+                                "value_text",
+                                output_field=TextField(),
+                            ),
+                        )
+
+                    values = values.filter(attribute__slug=attr.slug)
+                    default = attr.get_default()
+                    if default is None:
+                        pks_values = (
+                            values.filter(
+                                # Retrieve pk-values pairs of the related values
+                                # (i.e. values for the specified attribute and
+                                # belonging to entities in the queryset).
+                                **{f"{entity_field}__in": self},
+                            )
+                            .order_by(
+                                # Order values by their value-field of
+                                # appropriate attribute data-type.
+                                field_name,
+                            )
+                            .values_list(
+                                # Retrieve only primary-keys of the entities
+                                # in the current queryset.
+                                entity_field,
+                                field_name,
+                            )
+                        )
+                    else:
+                        # Entities without a value are ordered by the
+                        # default, like any other value, by the database.
+                        stored = values.filter(**{entity_field: OuterRef("pk")})
+                        pks_values = (
+                            QuerySet.order_by(self)
+                            .annotate(
+                                _eav_order=Coalesce(
+                                    Subquery(stored.values(field_name)[:1]),
+                                    Constant(default),
+                                    output_field=(
+                                        TextField()
+                                        if attr.dictionary
+                                        else Value._meta.get_field(field_name)  # noqa: SLF001
+                                    ),
+                                ),
+                            )
+                            .order_by("_eav_order")
+                            .values_list("pk", "_eav_order")
+                        )
+
+                    # Retrieve ordered values from pk-value list.
+                    ordered_values = [value for _, value in pks_values]
+
+                    # Add explicit ordering and turn
+                    # list of pairs into look-up table.
+                    val2ind = dict(zip(ordered_values, count()))
+
+                    # Finally, zip ordered pks with their grouped orderings.
+                    entities_pk = [(pk, val2ind[val]) for pk, val in pks_values]
+                    operation.add_rows(len(entities_pk))
+                    orderings.append(OrderStep(attr.slug, len(entities_pk)))
 
                 # Using ordered primary-keys, construct
                 # CASE clause of the form:
@@ -365,9 +1404,12 @@ class EavQuerySet(QuerySet):
                 #         WHEN id = 4 THEN 3
                 #     END
                 #
-                when_clauses = [When(id=pk, then=i) for pk, i in entities_pk]
+                when_clauses = [When(pk=pk, then=i) for pk, i in entities_pk]
 
-                order_clause = Case(*when_clauses, output_field=IntegerField())
+                order_clause = Case(
+                    *when_clauses,
+                    output_field=IntegerField(),
+                )
 
                 clause_name = "__".join(term)
                 # Use when-clause to construct
@@ -384,4 +1426,6 @@ class EavQuerySet(QuerySet):
             else:
                 order_clauses.append(term[0])
 
-        return QuerySet.order_by(query_clause, *order_clauses)
+        result = QuerySet.order_by(query_clause, *order_clauses)
+        result._eav_steps += tuple(orderings)  # noqa: SLF001
+        return result
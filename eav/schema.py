@@ -0,0 +1,239 @@
+"""
+This module contains the optional schema cache shared between processes.
+
+The :mod:`identity map <eav.identity>` of every process loads the attributes
+and enum values it needs from the database, so after a deploy, or a change to
+the schema, every worker loads them again. Setting ``EAV2_SCHEMA_CACHE`` to the
+alias of a Django cache (e.g. ``"default"``) stores the whole schema, the
+attributes, enum groups and enum values, in that cache instead: the first
+process to need it loads it from the database, all others from the cache.
+
+The cached schema is stored under a version stamp. Saving or deleting an
+:class:`~eav.models.Attribute`, :class:`~eav.models.EnumGroup` or
+:class:`~eav.models.EnumValue`, or changing their relations, sets a new
+version once the transaction is committed. Every process compares the version
+with the one it last saw (one cache read) at the start of each request, and
+when its identity map misses. When it changed, the local copies of the schema
+are dropped. Processes that don't serve requests can call
+``schema_cache.check()`` themselves.
+
+Any cache backend works, but only a shared one (memcached, redis, database)
+is shared between processes; ``locmem`` is enough for tests.
+"""
+
+from __future__ import annotations
+
+import threading
+import uuid
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from eav.identity import identity_map
+
+VERSION_KEY = "eav:schema:version"
+SCHEMA_KEY = "eav:schema:{version}"
+
+_MODELS = ("Attribute", "EnumGroup", "EnumValue")
+
+# Counts the schema changes seen by this process, see generation().
+_generation = 0
+
+
+@dataclass
+class Schema:
+    """Instances of the schema models, by model class and primary key."""
+
+    instances: dict[type, dict] = field(default_factory=dict)
+
+    def get(self, model_cls: type, pk):
+        """Return the *model_cls* instance with *pk*, or None."""
+        return self.instances.get(model_cls, {}).get(pk)
+
+    @classmethod
+    def dump(cls) -> dict:
+        """Read the schema from the database, in a picklable form."""
+        data = {}
+        for name in _MODELS:
+            model_cls = apps.get_model("eav", name)
+            fields = [f.attname for f in model_cls._meta.concrete_fields]  # noqa: SLF001
+            data[name] = (fields, list(model_cls.objects.values_list(*fields)))
+        return data
+
+    @classmethod
+    def load(cls, data: dict, using: str | None = None) -> Schema:
+        """Build the instances of a schema returned by :meth:`dump`."""
+        schema = cls()
+        for name, (fields, rows) in data.items():
+            model_cls = apps.get_model("eav", name)
+            schema.instances[model_cls] = {
+                obj.pk: obj
+                for obj in (model_cls.from_db(using, fields, row) for row in rows)
+            }
+
+        # Attributes share the enum group instances, too.
+        groups = schema.instances[apps.get_model("eav", "EnumGroup")]
+        for attribute in schema.instances[apps.get_model("eav", "Attribute")].values():
+            if attribute.enum_group_id is not None:
+                attribute.enum_group = groups.get(attribute.enum_group_id)
+        return schema
+
+
+class SchemaCache:
+    """
+    The schema stored in the Django cache with the *alias* given, which
+    defaults to the ``EAV2_SCHEMA_CACHE`` setting. Disabled if it is None.
+    """
+
+    def __init__(self, alias: str | None = None):
+        self._alias = alias
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self._schema: Schema | None = None
+        # Set when this process changed the schema and hasn't committed yet:
+        # what it reads from the database must not be published.
+        self._dirty = False
+
+    @property
+    def alias(self) -> str | None:
+        if self._alias is not None:
+            return self._alias
+        return getattr(settings, "EAV2_SCHEMA_CACHE", None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.alias is not None
+
+    def version(self) -> str:
+        """Return the current schema version, setting one if there is none."""
+        cache = caches[self.alias]
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    def check(self) -> bool:
+        """
+        Drop the local copies of the schema, including the identity map, if
+        the version changed since the last check. Returns whether it did.
+        """
+        if not self.enabled:
+            return False
+
+        version = self.version()
+        with self._lock:
+            changed = self._version is not None and version != self._version
+            if changed:
+                self._schema = None
+            self._version = version
+        if changed:
+            _advance()
+            identity_map.clear()
+        return changed
+
+    def get(self) -> Schema | None:
+        """
+        Return the current schema, loading it from the cache, or from the
+        database if it isn't cached yet. None if the cache is disabled.
+        """
+        if not self.enabled:
+            return None
+
+        self.check()
+        schema = self._schema
+        if schema is None:
+            cache = caches[self.alias]
+            key = SCHEMA_KEY.format(version=self._version)
+            data = None if self._dirty else cache.get(key)
+            if data is None:
+                data = Schema.dump()
+                if not self._dirty:
+                    cache.set(key, data, timeout=None)
+            schema = self._schema = Schema.load(data, DEFAULT_DB_ALIAS)
+        return schema
+
+    def bump(self) -> None:
+        """Set a new version, invalidating the schema of every process."""
+        if not self.enabled:
+            return
+
+        version = uuid.uuid4().hex
+        caches[self.alias].set(VERSION_KEY, version, timeout=None)
+        with self._lock:
+            self._version = version
+            self._schema = None
+            self._dirty = False
+        identity_map.clear()
+
+    def changed(self, using: str) -> None:
+        """
+        Called when the schema was changed in the database *using*: drops
+        the local copy now and sets a new version on commit.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._schema = None
+            self._dirty = True
+        identity_map.clear()
+        transaction.on_commit(self.bump, using=using)
+
+
+#: The schema cache used by the identity map.
+schema_cache = SchemaCache()
+
+
+def generation() -> int:
+    """
+    Return a number that changes whenever this process changes the schema,
+    or sees that another process did (through the schema cache). Anything
+    derived from the schema and memoized should be dropped when it changes.
+    """
+    return _generation
+
+
+def schema_changed(using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Tell eav that the schema was changed without sending model signals, e.g.
+    with ``bulk_create()``, ``QuerySet.update()`` or raw SQL. Drops what this
+    process memoized and, with the schema cache enabled, sets a new version
+    once the transaction is committed.
+    """
+    _advance()
+    identity_map.clear()
+    schema_cache.changed(using)
+
+
+def _advance():
+    global _generation  # noqa: PLW0603
+    _generation += 1
+
+
+def _changed(sender, using, **kwargs):
+    _advance()
+    schema_cache.changed(using)
+
+
+def _m2m_changed(sender, action, using, **kwargs):
+    if sender._meta.app_label == "eav" and action.startswith("post_"):  # noqa: SLF001
+        _advance()
+        schema_cache.changed(using)
+
+
+def _check(sender, **kwargs):
+    schema_cache.check()
+
+
+for _name in _MODELS:
+    _uid = f"eav_schema_{_name}"
+    post_save.connect(_changed, sender=f"eav.{_name}", dispatch_uid=_uid)
+    post_delete.connect(_changed, sender=f"eav.{_name}", dispatch_uid=_uid)
+m2m_changed.connect(_m2m_changed, dispatch_uid="eav_schema_m2m")
+request_started.connect(_check, dispatch_uid="eav_schema_check")
@@ -1,3 +1,20 @@
 from typing import Final
 
 CHARFIELD_LENGTH: Final = 100
+
+#: Defaults of the N+1 detector settings, see :mod:`eav.nplusone`.
+N_PLUS_ONE_ACTION: Final = "warn"
+N_PLUS_ONE_THRESHOLD: Final = 5
+
+#: Default of ``EAV2_IDENTITY_MAP_SIZE``, see :mod:`eav.identity`.
+IDENTITY_MAP_SIZE: Final = 1024
+
+#: Defaults of the filter planner settings, see :mod:`eav.planner`.
+PLANNER_IN_SELECTIVITY: Final = 0.05
+PLANNER_EXISTS_SELECTIVITY: Final = 0.5
+
+#: Default of ``EAV2_CSV_ITEMS``, see :class:`eav.models.CSVItem`.
+CSV_ITEMS: Final = False
+
+#: Default of ``EAV2_COMPRESSION_THRESHOLD``, see :mod:`eav.logic.compression`.
+COMPRESSION_THRESHOLD: Final = 4096
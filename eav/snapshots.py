@@ -0,0 +1,197 @@
+"""
+This module contains the optional cache of entity snapshots.
+
+Pages reading the EAV values of the same entities over and over query
+``eav_value`` every time, even though the values rarely change. Setting
+``EAV2_ENTITY_CACHE`` to the alias of a Django cache stores a snapshot of
+every entity read, its attribute slugs and ``{slug: value}``, in that cache,
+keyed by content type and primary key. ``instance.eav.<slug>`` then reads the
+snapshot, and :meth:`~eav.queryset.EavQuerySet.prefetch_eav` called without
+slugs loads the snapshots of all its entities with one ``get_many()``,
+querying the database only for the entities that aren't cached.
+
+Snapshots expire after ``EAV2_ENTITY_CACHE_TIMEOUT`` seconds (the default
+timeout of the cache if unset) and are deleted when the values of their
+entity change through :meth:`Entity.save <eav.models.Entity.save>`,
+:meth:`Attribute.save_value <eav.models.Attribute.save_value>`,
+``Value.save()``, ``Value.delete()``, or the ``update()``, ``delete()``,
+``bulk_create()`` and ``bulk_update()`` methods of ``Value`` querysets. Any
+change to the attributes or enum values invalidates all snapshots at once.
+Snapshots taken in a transaction are cached once it is committed, so that
+values rolled back are never seen by other processes. Values of *object*
+attributes are cached as they were when the snapshot was taken.
+
+Snapshots are also shared, independently of the cache, by the instances of an
+entity loaded inside a :func:`~eav.unit_of_work.unit_of_work` block.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from eav.unit_of_work import current_unit_of_work
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+GENERATION_KEY = "eav:entity:generation"
+ENTITY_KEY = "eav:entity:{generation}:{ct}:{pk}"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """The attribute slugs of an entity and the values it has for them."""
+
+    slugs: frozenset
+    values: dict
+
+
+class EntityCache:
+    """
+    Entity snapshots stored in the Django cache with the *alias* given,
+    which defaults to the ``EAV2_ENTITY_CACHE`` setting. Disabled if it is
+    None.
+    """
+
+    def __init__(self, alias: str | None = None):
+        self._alias = alias
+
+    @property
+    def alias(self) -> str | None:
+        if self._alias is not None:
+            return self._alias
+        return getattr(settings, "EAV2_ENTITY_CACHE", None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.alias is not None
+
+    @property
+    def active(self) -> bool:
+        """Whether snapshots are kept, in the cache or a unit of work."""
+        return self.enabled or current_unit_of_work() is not None
+
+    @property
+    def timeout(self):
+        return getattr(settings, "EAV2_ENTITY_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+    def _generation(self, cache) -> str:
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+            generation = cache.get(GENERATION_KEY)
+        return generation
+
+    def _keys(self, generation, ct_id, pks) -> dict[str, object]:
+        return {
+            ENTITY_KEY.format(generation=generation, ct=ct_id, pk=pk): pk for pk in pks
+        }
+
+    def get_many(self, ct_id: int, pks: Iterable) -> dict[object, Snapshot]:
+        """Return the cached snapshots of the entities of *ct_id* with *pks*."""
+        cache = caches[self.alias]
+        keys = self._keys(self._generation(cache), ct_id, pks)
+        return {keys[key]: snapshot for key, snapshot in cache.get_many(keys).items()}
+
+    def set_many(
+        self,
+        ct_id: int,
+        snapshots: dict[object, Snapshot],
+        using: str = DEFAULT_DB_ALIAS,
+    ) -> None:
+        """
+        Cache the *snapshots* of entities of *ct_id*, by primary key. In a
+        transaction of the database *using*, they are cached once it is
+        committed, since they may hold values it wrote.
+        """
+        if not snapshots:
+            return
+        cache = caches[self.alias]
+
+        def store():
+            keys = self._keys(self._generation(cache), ct_id, snapshots)
+            cache.set_many(
+                {key: snapshots[pk] for key, pk in keys.items()},
+                timeout=self.timeout,
+            )
+
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(store, using=using)
+        else:
+            store()
+
+    def invalidate(
+        self,
+        ct_id: int,
+        pks: Iterable,
+        using: str = DEFAULT_DB_ALIAS,
+    ) -> None:
+        """
+        Delete the snapshots of the entities of *ct_id* with *pks*, now and,
+        in a transaction, once it is committed, since other processes may
+        cache the values they read before.
+        """
+        pks = list(pks)
+        scope = current_unit_of_work()
+        if scope is not None:
+            scope.discard(ct_id, pks)
+        if not self.enabled:
+            return
+        cache = caches[self.alias]
+        keys = list(self._keys(self._generation(cache), ct_id, pks))
+        if not keys:
+            return
+        cache.delete_many(keys)
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(lambda: cache.delete_many(keys), using=using)
+
+    def invalidate_rows(self, rows: Iterable[tuple], using: str = DEFAULT_DB_ALIAS):
+        """
+        Delete the snapshots of the entities of value *rows*, tuples of
+        ``entity_ct_id``, ``entity_id`` and ``entity_uuid``.
+        """
+        if not self.active:
+            return
+        pks = {}
+        for ct_id, entity_id, entity_uuid in rows:
+            pks.setdefault(ct_id, set()).add(
+                entity_id if entity_uuid is None else entity_uuid,
+            )
+        for ct_id, entity_pks in pks.items():
+            self.invalidate(ct_id, entity_pks, using)
+
+    def clear(self) -> None:
+        """Invalidate all snapshots."""
+        if self.enabled:
+            caches[self.alias].set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+#: The entity snapshot cache.
+entity_cache = EntityCache()
+
+
+def _schema_changed(sender, using, **kwargs):
+    if entity_cache.enabled:
+        entity_cache.clear()
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(entity_cache.clear, using=using)
+
+
+def _m2m_changed(sender, action, using, **kwargs):
+    if sender._meta.app_label == "eav" and action.startswith("post_"):  # noqa: SLF001
+        _schema_changed(sender, using)
+
+
+for _name in ("Attribute", "EnumGroup", "EnumValue"):
+    _uid = f"eav_snapshots_{_name}"
+    post_save.connect(_schema_changed, sender=f"eav.{_name}", dispatch_uid=_uid)
+    post_delete.connect(_schema_changed, sender=f"eav.{_name}", dispatch_uid=_uid)
+m2m_changed.connect(_m2m_changed, dispatch_uid="eav_snapshots_m2m")
@@ -0,0 +1,244 @@
+"""
+This module contains the tracer interface EAV internals report spans to.
+
+Filter expansion in :class:`~eav.queryset.EavQuerySet`,
+:meth:`Entity.save() <eav.models.Entity.save>`,
+:meth:`Entity.validate_attributes() <eav.models.Entity.validate_attributes>`
+and :meth:`Attribute.save_value() <eav.models.Attribute.save_value>` each run
+inside a span carrying the entity content type, the attribute slugs involved
+and, where EAV picks one, the strategy it chose. Spans are started through the
+tracer returned by :func:`get_tracer`:
+
+* :class:`NoOpTracer` is the default and records nothing.
+* :class:`InMemoryTracer` keeps finished spans in a list, for tests.
+* :class:`OpenTelemetryTracer` forwards spans to an OpenTelemetry tracer.
+
+Any other tracing library can be plugged in by subclassing :class:`Tracer`
+and implementing :meth:`Tracer.start_span`. The tracer is configured either
+with :func:`set_tracer` or with the ``EAV2_TRACER`` setting, the dotted path
+of a :class:`Tracer` subclass (instantiated without arguments) or instance.
+"""
+
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils.module_loading import import_string
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+#: Span names.
+FILTER_SPAN = "eav.filter"
+SAVE_SPAN = "eav.entity.save"
+VALIDATE_SPAN = "eav.entity.validate_attributes"
+SAVE_VALUE_SPAN = "eav.attribute.save_value"
+
+#: Span attribute keys.
+CONTENT_TYPE = "eav.content_type"
+SLUGS = "eav.slugs"
+STRATEGY = "eav.strategy"
+
+
+class Span:
+    """
+    A span being recorded. The base class discards everything; it is falsy so
+    call sites can skip computing attributes nobody records.
+    """
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Mapping[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+
+_NOOP_SPAN = Span()
+
+
+class _NoOpContext:
+    __slots__ = ()
+
+    def __enter__(self) -> Span:
+        return _NOOP_SPAN
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NOOP_CONTEXT = _NoOpContext()
+
+
+class Tracer(ABC):
+    """Interface EAV starts its spans through."""
+
+    @abstractmethod
+    def start_span(self, name: str, attributes: Mapping[str, Any] | None = None):
+        """
+        Return a context manager that yields a :class:`Span` named *name*,
+        started with *attributes*, and ends it on exit. Spans started while
+        another one is open are its children.
+        """
+
+
+class NoOpTracer(Tracer):
+    """The default tracer. Every span is a shared, falsy no-op."""
+
+    def start_span(self, name: str, attributes: Mapping[str, Any] | None = None):
+        return _NOOP_CONTEXT
+
+
+@dataclass(eq=False)
+class RecordedSpan(Span):
+    """A span recorded by :class:`InMemoryTracer`."""
+
+    name: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    parent: RecordedSpan | None = None
+    start: float = 0.0
+    end: float | None = None
+    error: BaseException | None = None
+
+    def __bool__(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float | None:
+        return None if self.end is None else self.end - self.start
+
+
+class InMemoryTracer(Tracer):
+    """Tracer keeping every finished span in :attr:`spans`, in end order."""
+
+    def __init__(self) -> None:
+        self.spans: list[RecordedSpan] = []
+        self._current: ContextVar[RecordedSpan | None] = ContextVar(
+            "eav_tracing_current_span",
+            default=None,
+        )
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Mapping[str, Any] | None = None,
+    ) -> Iterator[RecordedSpan]:
+        span = RecordedSpan(
+            name=name,
+            attributes=dict(attributes or {}),
+            parent=self._current.get(),
+            start=time.perf_counter(),
+        )
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as err:
+            span.error = err
+            raise
+        finally:
+            span.end = time.perf_counter()
+            self._current.reset(token)
+            self.spans.append(span)
+
+    def find(self, name: str) -> list[RecordedSpan]:
+        """Return the finished spans named *name*."""
+        return [span for span in self.spans if span.name == name]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class _OpenTelemetrySpan(Span):
+    __slots__ = ("_span",)
+
+    def __init__(self, span) -> None:
+        self._span = span
+
+    def __bool__(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self._span.set_attribute(key, value)
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Adapter forwarding spans to an OpenTelemetry *tracer*, e.g.
+    ``opentelemetry.trace.get_tracer("eav")``. Without a *tracer*, the one
+    named ``eav`` is looked up when the adapter is created.
+    """
+
+    def __init__(self, tracer=None) -> None:
+        if tracer is None:
+            from opentelemetry import trace  # noqa: PLC0415
+
+            tracer = trace.get_tracer("eav")
+        self.tracer = tracer
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Mapping[str, Any] | None = None,
+    ) -> Iterator[Span]:
+        with self.tracer.start_as_current_span(
+            name,
+            attributes=dict(attributes or {}),
+        ) as span:
+            yield _OpenTelemetrySpan(span)
+
+
+_tracer: Tracer | None = None
+
+
+def _load_tracer() -> Tracer:
+    path = getattr(settings, "EAV2_TRACER", None)
+    if not path:
+        return NoOpTracer()
+    tracer = import_string(path)
+    return tracer() if isinstance(tracer, type) else tracer
+
+
+def get_tracer() -> Tracer:
+    """Return the tracer EAV reports its spans to."""
+    global _tracer  # noqa: PLW0603
+    if _tracer is None:
+        _tracer = _load_tracer()
+    return _tracer
+
+
+def set_tracer(tracer: Tracer | None) -> None:
+    """
+    Report spans to *tracer*. ``None`` goes back to the tracer configured by
+    the ``EAV2_TRACER`` setting.
+    """
+    global _tracer  # noqa: PLW0603
+    _tracer = tracer
+
+
+def start_span(name: str, attributes: Mapping[str, Any] | None = None):
+    """Start a span named *name* on the current tracer."""
+    return get_tracer().start_span(name, attributes)
+
+
+def content_type_label(content_type) -> str:
+    """Return ``app_label.model`` for a ``ContentType`` or a model."""
+    if isinstance(content_type, ContentType):
+        return f"{content_type.app_label}.{content_type.model}"
+    return content_type._meta.label_lower  # noqa: SLF001
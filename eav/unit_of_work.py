@@ -0,0 +1,106 @@
+"""
+This module contains the request-scoped unit of work.
+
+Within a request, views, serializers and templates often read the same entity
+through different instances, each loading its values again. A
+:func:`unit_of_work` block (or a request handled by
+:class:`~eav.middleware.UnitOfWorkMiddleware`) shares the
+:class:`~eav.snapshots.Snapshot` of every entity loaded while it is open
+between all its instances, and memoizes the attributes available to entities.
+Writes of the values of an entity discard its snapshot, and any change to the
+attributes or enum values discards everything. Both are discarded when the
+block ends. The scope is stored in a context variable, so concurrent threads
+and asyncio tasks each have their own.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from eav.snapshots import Snapshot
+
+
+@dataclass
+class UnitOfWork:
+    """What was loaded inside a :func:`unit_of_work` block."""
+
+    #: Snapshots by content type id and entity primary key.
+    snapshots: dict[tuple, Snapshot] = field(default_factory=dict)
+    #: Attribute lists by the SQL of the queryset they were loaded with.
+    attributes: dict[str, list] = field(default_factory=dict)
+
+    def get_attributes(self, queryset) -> list:
+        """Return the attributes of *queryset*, evaluating it only once."""
+        key = str(queryset.query)
+        attributes = self.attributes.get(key)
+        if attributes is None:
+            attributes = self.attributes[key] = list(queryset)
+        return attributes
+
+    def discard(self, ct_id: int, pks: Iterable) -> None:
+        """Discard the snapshots of the entities of *ct_id* with *pks*."""
+        for pk in pks:
+            self.snapshots.pop((ct_id, pk), None)
+
+    def clear(self) -> None:
+        self.snapshots.clear()
+        self.attributes.clear()
+
+
+_unit_of_work: ContextVar[UnitOfWork | None] = ContextVar(
+    "eav_unit_of_work",
+    default=None,
+)
+
+
+def current_unit_of_work() -> UnitOfWork | None:
+    """Return the :class:`UnitOfWork` of the enclosing block, if any."""
+    return _unit_of_work.get()
+
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork]:
+    """
+    Share the EAV values and attributes loaded inside the ``with`` block
+    between all instances of an entity. A nested block joins the enclosing
+    one::
+
+        with unit_of_work():
+            render_patient(Patient.objects.get(pk=1))
+    """
+    current = _unit_of_work.get()
+    if current is not None:
+        yield current
+        return
+
+    token = _unit_of_work.set(UnitOfWork())
+    try:
+        yield _unit_of_work.get()
+    finally:
+        _unit_of_work.reset(token)
+
+
+def _schema_changed(sender, **kwargs):
+    scope = _unit_of_work.get()
+    if scope is not None:
+        scope.clear()
+
+
+def _m2m_changed(sender, action, **kwargs):
+    if sender._meta.app_label == "eav" and action.startswith("post_"):  # noqa: SLF001
+        _schema_changed(sender)
+
+
+for _name in ("Attribute", "EnumGroup", "EnumValue"):
+    _uid = f"eav_unit_of_work_{_name}"
+    post_save.connect(_schema_changed, sender=f"eav.{_name}", dispatch_uid=_uid)
+    post_delete.connect(_schema_changed, sender=f"eav.{_name}", dispatch_uid=_uid)
+m2m_changed.connect(_m2m_changed, dispatch_uid="eav_unit_of_work_m2m")
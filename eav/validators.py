@@ -110,3 +110,16 @@ def validate_csv(value):
         value = value.split(";")
     if not isinstance(value, list):
         raise ValidationError(_("Must be Comma-Separated-Value."))
+
+
+def validate_multi_enum(value):
+    """
+    Raises ``ValidationError`` unless *value* is a list of saved
+    :class:`~eav.models.EnumValue` model instances or their values.
+    """
+    from eav.models import EnumValue  # noqa: PLC0415
+
+    if not isinstance(value, (list, tuple, set, frozenset)):
+        raise ValidationError(_("Must be a list of choices."))
+    if any(isinstance(v, EnumValue) and not v.pk for v in value):
+        raise ValidationError(_("EnumValue has not been saved yet"))
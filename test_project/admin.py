@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from eav.admin import BaseEntityAdmin
+from eav.forms import BaseDynamicEntityForm
+from test_project.models import Doctor, ExampleModel
+
+
+class EntityAdmin(BaseEntityAdmin):
+    form = BaseDynamicEntityForm
+
+
+admin.site.register(Doctor, EntityAdmin)
+admin.site.register(ExampleModel, EntityAdmin)
@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks.data import DATATYPES, MODELS
+from benchmarks.runner import BENCHMARKS, Result, compare, run_benchmarks
+
+
+@pytest.mark.django_db
+def test_benchmarks_run_on_tiny_dataset() -> None:
+    """Every benchmark case runs against both primary key flavours."""
+    results = run_benchmarks(entities=2, attributes=len(DATATYPES), repeat=1)
+
+    assert {r.name for r in results} == {
+        f"{name}[{kind}]" for name in BENCHMARKS for kind in MODELS
+    }
+    assert all(r.queries > 0 for r in results)
+    assert all(r.fetched > 0 for r in results)
+
+
+def test_compare_reports_regressions() -> None:
+    """Extra queries always regress, wall time only beyond the tolerance."""
+    baseline = {
+        "a": {"queries": 2, "seconds": 1.0},
+        "b": {"queries": 2, "seconds": 1.0},
+    }
+    results = [
+        Result("a", queries=3, seconds=1.2),
+        Result("b", queries=2, seconds=1.6),
+        Result("c", queries=9, seconds=9.0),
+    ]
+
+    regressions = compare(results, baseline, tolerance=0.5)
+
+    assert [(r.name, r.metric) for r in regressions] == [
+        ("a", "queries"),
+        ("b", "seconds"),
+    ]
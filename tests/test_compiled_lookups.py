@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from types import SimpleNamespace
+
+import pytest
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q
+
+from eav import queryset
+from eav.models import Attribute, EnumGroup, EnumValue
+from eav.queryset import (
+    compile_eav_lookup,
+    expand_q_filters,
+    rewrite_q_expr,
+)
+from eav.schema import schema_changed
+from test_project.models import Doctor, ExampleModel, M2MModel
+
+
+@pytest.fixture
+def doctors(db):
+    group = EnumGroup.objects.create(name="Yes / No")
+    yes = EnumValue.objects.create(value="yes")
+    group.values.add(yes)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(
+        name="fever",
+        datatype=Attribute.TYPE_ENUM,
+        enum_group=group,
+    )
+    Doctor.objects.create(name="Anne", eav__age=30, eav__fever=yes)
+    Doctor.objects.create(name="Bob", eav__age=40)
+    return yes
+
+
+def test_compiled_once_per_shape(doctors, django_assert_num_queries) -> None:
+    with django_assert_num_queries(2):
+        assert Doctor.objects.filter(eav__age__gte=35).count() == 1
+
+    # Only the filtered query runs for a known shape, whatever the value.
+    with django_assert_num_queries(1):
+        assert Doctor.objects.filter(eav__age__gte=25).count() == 2
+
+    compiled = compile_eav_lookup(Doctor, "eav__age__gte")
+    assert compile_eav_lookup(Doctor, "eav__age__gte") is compiled
+    assert compiled.value_key == "value_int__gte"
+    assert compiled.relation == "eav_values__in"
+    assert compile_eav_lookup(Doctor, "name__startswith") is None
+    assert compile_eav_lookup(Doctor, "eav") is None
+
+
+def test_compiled_per_database(doctors, monkeypatch) -> None:
+    default = compile_eav_lookup(Doctor, "eav__age", using="default")
+    assert compile_eav_lookup(Doctor, "eav__age") is default
+    assert default.vendor == "sqlite"
+
+    # The SQL of some lookups depends on the vendor of the database.
+    databases = {"default": connections["default"]}
+    databases["replica"] = SimpleNamespace(vendor="postgresql")
+    monkeypatch.setattr(queryset, "connections", databases)
+    replica = compile_eav_lookup(Doctor, "eav__age", using="replica")
+    assert replica.vendor == "postgresql"
+    assert compile_eav_lookup(Doctor, "eav__age", using="default") is default
+
+
+def test_enum_lookups(doctors) -> None:
+    by_instance = compile_eav_lookup(Doctor, "eav__fever", enum_value=True)
+    by_value = compile_eav_lookup(Doctor, "eav__fever")
+
+    assert by_instance.value_key == "value_enum"
+    assert by_value.value_key == "value_enum__value"
+    assert Doctor.objects.get(eav__fever=doctors).name == "Anne"
+    assert Doctor.objects.get(eav__fever="yes").name == "Anne"
+
+
+def test_schema_change_recompiles(doctors) -> None:
+    compiled = compile_eav_lookup(Doctor, "eav__age")
+
+    age = Attribute.objects.get(slug="age")
+    age.display_order = 2
+    age.save()
+    assert compile_eav_lookup(Doctor, "eav__age") is not compiled
+
+    compiled = compile_eav_lookup(Doctor, "eav__age")
+    schema_changed()
+    assert compile_eav_lookup(Doctor, "eav__age") is not compiled
+
+
+def test_rollback_recompiles(doctors) -> None:
+    compiled = []
+
+    def compile_and_roll_back():
+        with transaction.atomic():
+            compiled.append(compile_eav_lookup(Doctor, "eav__age"))
+            raise DatabaseError
+
+    with pytest.raises(DatabaseError):
+        compile_and_roll_back()
+    assert compile_eav_lookup(Doctor, "eav__age") is not compiled[0]
+
+
+def test_unknown_attribute(doctors) -> None:
+    with pytest.raises(Attribute.DoesNotExist):
+        compile_eav_lookup(Doctor, "eav__nope")
+
+
+def test_bounded(doctors, monkeypatch) -> None:
+    monkeypatch.setattr(queryset._CompiledLookups, "maxsize", 1)
+    first = compile_eav_lookup(Doctor, "eav__age")
+    compile_eav_lookup(Doctor, "eav__age__lt")
+
+    assert compile_eav_lookup(Doctor, "eav__age") is not first
+
+
+def test_q_tree_not_mutated(doctors) -> None:
+    tree = (Q(eav__age=30) & Q(eav__age__lt=50)) | Q(eav__fever="yes")
+    original = deepcopy(tree)
+
+    expanded = expand_q_filters(tree, Doctor)
+    rewritten = rewrite_q_expr(Doctor, expanded)
+
+    assert tree == original
+    assert rewritten is not expanded
+    assert set(Doctor.objects.filter(rewritten).values_list("name", flat=True)) == {
+        "Anne",
+    }
+
+
+def test_object_lookups(db) -> None:
+    Attribute.objects.create(name="related", datatype=Attribute.TYPE_OBJECT)
+    first, second = (ExampleModel.objects.create(name=n) for n in ("e1", "e2"))
+    other = M2MModel.objects.create(name="m")
+    Doctor.objects.create(name="a", eav__related=first)
+    Doctor.objects.create(name="b", eav__related=second)
+    Doctor.objects.create(name="c", eav__related=other)
+
+    def names(**kwargs):
+        return sorted(Doctor.objects.filter(**kwargs).values_list("name", flat=True))
+
+    # Objects of different models may share primary keys.
+    assert other.pk == first.pk
+    assert names(eav__related=first) == ["a"]
+    assert names(eav__related=other) == ["c"]
+    assert names(eav__related__in=[second, other]) == ["b", "c"]
+    assert names(eav__related__in=[]) == []
+    assert names(eav__related=first.pk) == ["a", "c"]
+    assert names(eav__related__gt=first.pk) == ["b"]
+
+    sql = str(Doctor.objects.filter(eav__related=first).query)
+    assert '"generic_value_ct_id" = ' in sql
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db.utils import NotSupportedError
+
+from eav.logic.compression import compress, decompress
+from eav.models import Attribute, Value
+from test_project.models import Doctor
+
+NOTES = "lorem ipsum " * 50
+META = {"rows": [{"row": i, "text": "x" * 20} for i in range(20)]}
+
+
+@pytest.fixture
+def attributes(db, settings):
+    settings.EAV2_COMPRESSION_THRESHOLD = 100
+    Attribute.objects.create(
+        name="notes",
+        datatype=Attribute.TYPE_TEXT,
+        compression="zlib",
+    )
+    Attribute.objects.create(
+        name="meta",
+        datatype=Attribute.TYPE_JSON,
+        compression="lzma",
+    )
+
+
+def stored(slug):
+    return Value.objects.get(attribute__slug=slug)
+
+
+def names_with(notes):
+    return sorted(
+        Doctor.objects.filter(eav__notes=notes).values_list("name", flat=True),
+    )
+
+
+def test_codecs(settings) -> None:
+    settings.EAV2_COMPRESSION_THRESHOLD = 100
+    blob = compress("zlib", "text", NOTES)
+    assert blob.startswith(b"zlib:")
+    assert len(blob) < len(NOTES)
+    assert decompress("text", blob) == NOTES
+    assert decompress("json", memoryview(compress("lzma", "json", META))) == META
+    assert compress("zlib", "text", "short") is None
+
+
+def test_values(attributes) -> None:
+    doctor = Doctor.objects.create(name="a", eav__notes=NOTES, eav__meta=META)
+
+    notes, meta = stored("notes"), stored("meta")
+    assert notes.value_text == ""
+    assert bytes(notes.value_compressed).startswith(b"zlib:")
+    assert meta.value_json is None
+    assert bytes(meta.value_compressed).startswith(b"lzma:")
+
+    doctor = Doctor.objects.get(pk=doctor.pk)
+    assert (doctor.eav.notes, doctor.eav.meta) == (NOTES, META)
+    prefetched = Doctor.objects.prefetch_eav().get(pk=doctor.pk)
+    assert prefetched.eav.notes == NOTES
+
+    # Values below the threshold are stored as usual.
+    doctor.eav.notes = "short"
+    doctor.save()
+    notes = stored("notes")
+    assert (notes.value_text, notes.value_compressed) == ("short", None)
+    assert Doctor.objects.get(pk=doctor.pk).eav.notes == "short"
+
+
+def test_filter_and_order(attributes) -> None:
+    Doctor.objects.create(name="a", eav__notes=NOTES)
+
+    with pytest.raises(NotSupportedError, match='"notes" is compressed'):
+        Doctor.objects.filter(eav__notes__contains="lorem")
+    with pytest.raises(NotSupportedError, match='"meta" is compressed'):
+        Doctor.objects.order_by("eav__meta")
+
+
+def test_only_text_and_json(db) -> None:
+    attribute = Attribute(name="age", datatype=Attribute.TYPE_INT, compression="zlib")
+    with pytest.raises(ValidationError, match="Only text and JSON"):
+        attribute.full_clean()
+
+
+def test_command(db, settings) -> None:
+    settings.EAV2_COMPRESSION_THRESHOLD = 100
+    notes = Attribute.objects.create(name="notes", datatype=Attribute.TYPE_TEXT)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    for name in ("a", "b", "c"):
+        Doctor.objects.create(name=name, eav__notes=NOTES, eav__age=1)
+    Doctor.objects.create(name="d", eav__notes="short")
+
+    def run(*args):
+        out = StringIO()
+        call_command("eav_compress", *args, stdout=out)
+        return out.getvalue()
+
+    assert "Rewrote 0 values." in run()
+    notes.compression = "zlib"
+    notes.save()
+    assert "Rewrote 3 values." in run("notes", "--batch-size", "2")
+    assert Value.objects.filter(value_compressed__isnull=False).count() == 3
+    assert {d.eav.notes for d in Doctor.objects.all()} == {NOTES, "short"}
+
+    notes.compression = ""
+    notes.save()
+    assert "Rewrote 3 values." in run()
+    assert not Value.objects.filter(value_compressed__isnull=False).exists()
+    assert names_with(NOTES) == ["a", "b", "c"]
+
+    with pytest.raises(CommandError, match="No text or JSON attribute age"):
+        run("age")
+    with pytest.raises(CommandError, match="--batch-size"):
+        run("--batch-size", "0")
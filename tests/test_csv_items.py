@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Q
+
+from eav.models import Attribute, CSVItem, Value
+from test_project.models import Doctor
+
+TAGS = {
+    "a": "red;green",
+    "b": "green;blue",
+    "c": "red;greenish",
+    "d": "re_d",
+}
+
+
+def names(queryset):
+    return sorted(queryset.values_list("name", flat=True))
+
+
+def items():
+    return sorted(CSVItem.objects.values_list("value__entity_uuid", "item"))
+
+
+@pytest.fixture(params=[False, True], ids=["text", "items"])
+def doctors(request, db, settings):
+    settings.EAV2_CSV_ITEMS = request.param
+    Attribute.objects.create(name="tags", datatype=Attribute.TYPE_CSV)
+    for name, tags in TAGS.items():
+        Doctor.objects.create(name=name, eav__tags=tags)
+    return request.param
+
+
+def test_lookups(doctors) -> None:
+    assert names(Doctor.objects.filter(eav__tags__has="red")) == ["a", "c"]
+    assert names(Doctor.objects.filter(eav__tags__has="green")) == ["a", "b"]
+    # Items aren't matched as substrings or patterns.
+    assert names(Doctor.objects.filter(eav__tags__has="gree")) == []
+    assert names(Doctor.objects.filter(eav__tags__has="r_d")) == []
+    assert names(Doctor.objects.filter(eav__tags__has="re_d")) == ["d"]
+
+    assert names(Doctor.objects.filter(eav__tags__has_any=["blue", "red"])) == [
+        "a",
+        "b",
+        "c",
+    ]
+    assert names(Doctor.objects.filter(eav__tags__has_all=["red", "green"])) == ["a"]
+    assert names(Doctor.objects.filter(eav__tags__has_all=["red", "red"])) == [
+        "a",
+        "c",
+    ]
+    assert names(Doctor.objects.filter(eav__tags__has_any=[])) == []
+    assert len(names(Doctor.objects.filter(eav__tags__has_all=[]))) == len(TAGS)
+
+    either = Q(eav__tags__has="blue") | Q(eav__tags__has="greenish")
+    assert names(Doctor.objects.filter(either)) == ["b", "c"]
+    assert names(Doctor.objects.exclude(eav__tags__has="green")) == ["c", "d"]
+
+
+def test_items_query(doctors) -> None:
+    sql = str(Doctor.objects.filter(eav__tags__has="red").query)
+    assert ("eav_csvitem" in sql) is doctors
+    assert ("LIKE" in sql) is not doctors
+
+
+def test_writes_sync_items(db, settings) -> None:
+    settings.EAV2_CSV_ITEMS = True
+    Attribute.objects.create(name="tags", datatype=Attribute.TYPE_CSV)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    doctor = Doctor.objects.create(name="a", eav__tags=["x", "y", "x"], eav__age=3)
+    assert items() == [(doctor.pk, "x"), (doctor.pk, "y")]
+
+    doctor.eav.tags = "y;z"
+    doctor.save()
+    assert items() == [(doctor.pk, "y"), (doctor.pk, "z")]
+
+    values = Value.objects.filter(attribute__slug="tags")
+    values.update(value_csv="w")
+    assert items() == [(doctor.pk, "w")]
+
+    value = values.get()
+    value.value_csv = ["v", ""]
+    Value.objects.bulk_update([value], ["value_csv"])
+    assert items() == [(doctor.pk, "v")]
+
+    values.delete()
+    assert items() == []
+
+
+def test_command(db, settings) -> None:
+    Attribute.objects.create(name="tags", datatype=Attribute.TYPE_CSV)
+    for name, tags in TAGS.items():
+        Doctor.objects.create(name=name, eav__tags=tags)
+    assert items() == []
+
+    with pytest.raises(CommandError, match="EAV2_CSV_ITEMS"):
+        call_command("eav_csv_items")
+
+    settings.EAV2_CSV_ITEMS = True
+    with pytest.raises(CommandError, match="--batch-size"):
+        call_command("eav_csv_items", "--batch-size", "0")
+
+    out = StringIO()
+    call_command("eav_csv_items", "--batch-size", "3", stdout=out)
+    assert "Stored 7 csv items." in out.getvalue()
+    assert len(items()) == 7
+    assert names(Doctor.objects.filter(eav__tags__has_all=["green", "blue"])) == ["b"]
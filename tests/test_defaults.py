@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from eav.forms import BaseDynamicEntityForm
+from eav.models import Attribute, Value
+from eav.unit_of_work import unit_of_work
+from test_project.models import Doctor
+
+
+@pytest.fixture
+def priority(db):
+    attribute = Attribute.objects.create(
+        name="priority",
+        datatype=Attribute.TYPE_INT,
+        default=3,
+    )
+    Doctor.objects.create(name="a", eav__priority=1)
+    Doctor.objects.create(name="b", eav__priority=5)
+    Doctor.objects.create(name="c")
+    return attribute
+
+
+def names(queryset):
+    return sorted(queryset.values_list("name", flat=True))
+
+
+def test_reads(priority, settings) -> None:
+    assert Doctor.objects.get(name="c").eav.priority == 3
+    prefetched = Doctor.objects.prefetch_eav("priority").order_by("name")
+    assert [d.eav.priority for d in prefetched] == [1, 5, 3]
+
+    with unit_of_work():
+        assert Doctor.objects.get(name="c").eav.priority == 3
+
+    settings.EAV2_ENTITY_CACHE = "default"
+    cache.clear()
+    assert Doctor.objects.get(name="c").eav.priority == 3
+    cached = Doctor.objects.prefetch_eav().order_by("name")
+    assert [d.eav.priority for d in cached] == [1, 5, 3]
+
+
+def test_defaults_are_not_stored(priority) -> None:
+    Doctor.objects.create(name="d", eav__priority=3)
+    assert Value.objects.filter(attribute=priority).count() == 2
+
+    # Stored values set to the default are kept, the default may change.
+    doctor = Doctor.objects.get(name="a")
+    doctor.eav.priority = 3
+    doctor.save()
+    assert Value.objects.filter(attribute=priority).count() == 2
+    priority.default = 4
+    priority.save()
+    assert Doctor.objects.get(name="a").eav.priority == 3
+    assert Doctor.objects.get(name="d").eav.priority == 4
+
+
+def test_required(priority) -> None:
+    priority.required = True
+    priority.save()
+    Doctor.objects.create(name="d")
+    assert Doctor.objects.get(name="d").eav.priority == 3
+
+
+def test_filter_and_order(priority) -> None:
+    doctors = Doctor.objects.all()
+    assert names(doctors.filter(eav__priority=3)) == ["c"]
+    assert names(doctors.filter(eav__priority=1)) == ["a"]
+    assert names(doctors.filter(eav__priority__gte=3)) == ["b", "c"]
+    assert names(doctors.filter(eav__priority__in=[1, 3])) == ["a", "c"]
+    assert names(doctors.filter(eav__priority__isnull=True)) == []
+    assert names(doctors.exclude(eav__priority=3)) == ["a", "b"]
+    assert names(doctors.filter(Q(eav__priority=3) | Q(name="a"))) == ["a", "c"]
+    assert names(doctors.filter(Q(eav__priority__lt=5) & Q(eav__priority__gt=1))) == [
+        "c",
+    ]
+    assert [d.name for d in doctors.order_by("eav__priority")] == ["a", "c", "b"]
+
+    # Dates are ordered by the database, like the stored values.
+    Attribute.objects.create(
+        name="since",
+        datatype=Attribute.TYPE_DATE,
+        default=date(2020, 1, 1),
+    )
+    for name, since in (("a", date(2021, 1, 1)), ("b", date(2019, 1, 1))):
+        doctor = Doctor.objects.get(name=name)
+        doctor.eav.since = since
+        doctor.save()
+    assert [d.name for d in doctors.order_by("eav__since")] == ["b", "c", "a"]
+
+
+def test_form(priority) -> None:
+    class Form(BaseDynamicEntityForm):
+        class Meta:
+            model = Doctor
+            fields = "__all__"
+
+    priority.required = True
+    priority.save()
+    form = Form(instance=Doctor(name="d"))
+    assert form.initial["priority"] == 3
+    assert not form.fields["priority"].required
+
+    form = Form({"name": "d", "priority": ""}, instance=Doctor())
+    assert form.is_valid(), form.errors
+    doctor = form.save()
+    assert Doctor.objects.get(pk=doctor.pk).eav.priority == 3
+    assert not Value.objects.filter(entity_uuid=doctor.pk).exists()
+
+
+def test_clean(db) -> None:
+    attribute = Attribute(name="meta", datatype=Attribute.TYPE_JSON, default={})
+    with pytest.raises(ValidationError, match="can have a default"):
+        attribute.full_clean()
+
+    attribute = Attribute(name="age", datatype=Attribute.TYPE_INT, default="old")
+    with pytest.raises(ValidationError, match="Invalid default"):
+        attribute.full_clean()
+
+    attribute = Attribute(
+        name="since",
+        slug="since",
+        datatype=Attribute.TYPE_DATE,
+        default="2020-01-02T03:04:05+00:00",
+    )
+    attribute.full_clean()
+    assert attribute.get_default().year == 2020
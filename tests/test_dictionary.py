@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+
+from eav.models import Attribute, InternedText, Value
+from test_project.models import Doctor
+
+LONG = "x" * 300
+
+
+@pytest.fixture
+def status(db):
+    return Attribute.objects.create(
+        name="status",
+        datatype=Attribute.TYPE_TEXT,
+        dictionary=True,
+    )
+
+
+def stored(name):
+    return Value.objects.get(entity_uuid=Doctor.objects.get(name=name).pk)
+
+
+def names(**filters):
+    return sorted(Doctor.objects.filter(**filters).values_list("name", flat=True))
+
+
+def test_values(status) -> None:
+    for name in ("a", "b"):
+        Doctor.objects.create(name=name, eav__status="active")
+    Doctor.objects.create(name="c", eav__status=LONG)
+
+    # Equal strings share one interned text, long strings stay plain.
+    assert list(InternedText.objects.values_list("text", flat=True)) == ["active"]
+    a, c = stored("a"), stored("c")
+    assert (a.value_text, a.value_interned.text) == ("", "active")
+    assert stored("b").value_interned_id == a.value_interned_id
+    assert (c.value_text, c.value_interned) == (LONG, None)
+
+    assert Doctor.objects.get(name="a").eav.status == "active"
+    prefetched = Doctor.objects.prefetch_eav().order_by("name")
+    assert [d.eav.status for d in prefetched] == ["active", "active", LONG]
+
+
+def test_prefetch_shares_interned_texts(status, django_assert_num_queries) -> None:
+    for name in ("a", "b"):
+        Doctor.objects.create(name=name, eav__status="active")
+
+    a, b = Doctor.objects.prefetch_eav()
+    with django_assert_num_queries(0):
+        assert a.eav.status == b.eav.status == "active"
+    first, second = a.eav._prefetched_values, b.eav._prefetched_values
+    assert first["status"].value_interned is second["status"].value_interned
+
+
+def test_interned_when_saved(status) -> None:
+    value = Value(entity_pk_uuid=Doctor.objects.create(name="a"), attribute=status)
+    value.value = "active"
+    assert not InternedText.objects.exists()
+    value.save()
+    assert (value.value_text, value.value_interned.text) == ("", "active")
+
+    # Reassigning the same string keeps its key, other strings are interned.
+    value.value = "active"
+    assert value.value_interned is not None
+    value.value = "retired"
+    assert value.value_interned is None
+    assert value.value == "retired"
+    Value.objects.bulk_update([value], ["value_text", "value_interned"])
+    assert stored("a").value_interned.text == "retired"
+
+    other = Value(entity_pk_uuid=Doctor.objects.create(name="b"), attribute=status)
+    other.value = "active"
+    Value.objects.bulk_create([other])
+    assert stored("b").value_interned.text == "active"
+
+
+def test_filter_and_order(status) -> None:
+    Doctor.objects.create(name="a", eav__status="active")
+    Doctor.objects.create(name="b", eav__status="retired")
+    Doctor.objects.create(name="c", eav__status=LONG)
+    Doctor.objects.create(name="d")
+
+    assert names(eav__status="active") == ["a"]
+    assert names(eav__status__in=["retired", LONG]) == ["b", "c"]
+    assert names(eav__status__contains="x") == ["c"]
+    assert names(eav__status__startswith="ret") == ["b"]
+    assert names(eav__status="") == []
+    assert sorted(
+        Doctor.objects.exclude(eav__status="active").values_list("name", flat=True),
+    ) == ["b", "c", "d"]
+    ordered = Doctor.objects.filter(eav__status__isnull=False).order_by("eav__status")
+    assert [d.name for d in ordered] == ["a", "b", "c"]
+
+
+def test_clean(db) -> None:
+    attribute = Attribute(name="age", datatype=Attribute.TYPE_INT, dictionary=True)
+    with pytest.raises(ValidationError, match="Only text attributes"):
+        attribute.full_clean()
+
+    attribute = Attribute(
+        name="notes",
+        datatype=Attribute.TYPE_TEXT,
+        dictionary=True,
+        compression="zlib",
+    )
+    with pytest.raises(ValidationError, match="can't be compressed"):
+        attribute.full_clean()
+
+
+def test_command(db) -> None:
+    status = Attribute.objects.create(name="status", datatype=Attribute.TYPE_TEXT)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    for name in ("a", "b", "c"):
+        Doctor.objects.create(name=name, eav__status="active", eav__age=1)
+    Doctor.objects.create(name="d", eav__status=LONG)
+
+    def run(*args):
+        out = StringIO()
+        call_command("eav_dictionary", *args, stdout=out)
+        return out.getvalue()
+
+    assert "Rewrote 0 values." in run()
+    status.dictionary = True
+    status.save()
+    assert "Rewrote 3 values." in run("status", "--batch-size", "2")
+    assert Value.objects.filter(value_interned__isnull=False).count() == 3
+    assert {d.eav.status for d in Doctor.objects.all()} == {"active", LONG}
+
+    status.dictionary = False
+    status.save()
+    assert "Rewrote 3 values." in run()
+    assert not Value.objects.filter(value_interned__isnull=False).exists()
+    assert names(eav__status="active") == ["a", "b", "c"]
+
+    with pytest.raises(CommandError, match="No text attribute age"):
+        run("age")
+    with pytest.raises(CommandError, match="--batch-size"):
+        run("--batch-size", "0")
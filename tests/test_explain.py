@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import pytest
+from django.db.models import Q
+
+from eav.explain import FilterStep, OrderStep, PlannedLookup
+from eav.models import Attribute
+from eav.planner import IN, JOIN, analyze
+from test_project.models import Doctor
+
+
+@pytest.fixture
+def doctors(db):
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="city", datatype=Attribute.TYPE_TEXT)
+    for i in range(30):
+        Doctor.objects.create(
+            name=f"d{i:02}",
+            eav__age=30 + i,
+            eav__city="Oslo" if i < 3 else "Bergen",
+        )
+
+
+def test_report(doctors, django_assert_num_queries) -> None:
+    queryset = Doctor.objects.filter(
+        Q(eav__age=30) | Q(eav__age=31),
+        eav__city="Oslo",
+    ).exclude(name="d00")
+    with django_assert_num_queries(0):
+        str(queryset.query)
+
+    report = queryset.explain_eav()
+
+    first, second = report.filters
+    assert first.method == "filter"
+    assert first.kwargs == {"eav__city": "Oslo"}
+    assert second == FilterStep("exclude", (), {"name": "d00"}, second.rewritten)
+    # The two lookups on age share a single join.
+    assert len(first.merged) == 1
+    assert (first.merged[0].connector, first.merged[0].leaves) == ("OR", 2)
+    assert report.lookups == [
+        PlannedLookup("eav__age", "value_int", JOIN),
+        PlannedLookup("eav__age", "value_int", JOIN),
+        PlannedLookup("eav__city", "value_text", JOIN),
+    ]
+    assert report.sql == str(queryset.query)
+    assert report.plan
+    assert report.orderings == []
+    assert [w.split(":")[0] for w in report.warnings] == [
+        "No index on eav_value.value_int",
+        "No index on eav_value.value_text",
+    ]
+    assert list(queryset.values_list("name", flat=True)) == ["d01"]
+
+    text = str(report)
+    assert "1. filter((OR: eav__age=30, eav__age=31), eav__city='Oslo')" in text
+    assert "merged: OR of 2 lookups into pk__in <Doctor subquery>" in text
+    assert "eav__city on value_text: join, selectivity unknown" in text
+    assert "pk__in=<Doctor subquery>" in text
+
+
+def test_planned_strategies(doctors) -> None:
+    analyze([Doctor])
+    report = Doctor.objects.filter(eav__city="Oslo", eav__age=31).explain_eav()
+
+    assert [(lookup.key, lookup.strategy) for lookup in report.lookups] == [
+        ("eav__age", IN),
+        ("eav__city", JOIN),
+    ]
+    assert report.lookups[0].selectivity == pytest.approx(1 / 30)
+    assert "eav__age on value_int: in, selectivity 3.3%" in str(report)
+
+
+def test_reported_strategies_are_the_executed_ones(doctors, settings) -> None:
+    Attribute.objects.filter(slug="age").update(default=0)
+    analyze([Doctor])
+
+    # Attributes with a default are matched by the primary keys of the
+    # entities, even when the statistics would join them.
+    report = Doctor.objects.filter(Q(eav__age=40), eav__age__gte=31).explain_eav()
+    assert [(lookup.key, lookup.strategy) for lookup in report.lookups] == [
+        ("eav__age", IN),
+        ("eav__age__gte", IN),
+    ]
+
+    settings.EAV2_FILTER_CACHE = "default"
+    report = (
+        Doctor.objects.cache_eav_filter()
+        .filter(Q(eav__city="Oslo") | Q(eav__city="Bergen"), eav__city="Oslo")
+        .explain_eav()
+    )
+    assert [lookup.strategy for lookup in report.lookups] == ["cached"] * 3
+    assert report.filters[0].lookups == tuple(report.lookups)
+
+
+def test_anti_patterns(doctors) -> None:
+    queryset = (
+        Doctor.objects.filter(Q(eav__city="Oslo") & ~Q(eav__age=30))
+        .exclude(~Q(eav__age=31))
+        .order_by("eav__age", "name")
+    )
+
+    report = queryset.explain_eav()
+
+    assert report.orderings == [OrderStep("age", 1)]
+    negations = [w for w in report.warnings if "negates" in w]
+    # Negating in exclude() is fine.
+    assert negations == [
+        "filter() negates eav__age per value row, not per entity: entities "
+        + "with other values still match. Use exclude(eav__age=...) instead.",
+    ]
+    assert any(w.startswith("order_by('eav__age') loaded 1") for w in report.warnings)
+    assert "eav__age: 1 values" in str(report)
+    assert list(queryset.values_list("name", flat=True)) == ["d01"]
+
+
+def test_empty_and_cached(doctors, settings) -> None:
+    report = Doctor.objects.filter(pk__in=[]).explain_eav()
+    assert (report.sql, report.plan, report.lookups, report.warnings) == (
+        "",
+        "",
+        [],
+        [],
+    )
+
+    settings.EAV2_FILTER_CACHE = "default"
+    step = Doctor.objects.cache_eav_filter().filter(eav__age=30).explain_eav()
+    assert step.filters[0].cached
+    assert "cached: yes" in str(step)
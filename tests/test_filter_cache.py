@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import pytest
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+
+from eav.filter_cache import ATTRIBUTE_TAG_KEY, FilterCache
+from eav.models import Attribute, EnumGroup, EnumValue, Value
+from test_project.models import Doctor
+
+
+# Results are cached once the transactions they are read in are committed.
+@pytest.fixture
+def doctors(transactional_db, settings):
+    settings.EAV2_FILTER_CACHE = "default"
+    cache.clear()
+    group = EnumGroup.objects.create(name="Yes / No")
+    yes = EnumValue.objects.create(value="yes")
+    group.values.add(yes)
+    Attribute.objects.create(name="category", datatype=Attribute.TYPE_TEXT)
+    Attribute.objects.create(name="active", datatype=Attribute.TYPE_BOOLEAN)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(
+        name="fever",
+        datatype=Attribute.TYPE_ENUM,
+        enum_group=group,
+    )
+    Doctor.objects.create(name="Anne", eav__category="x", eav__active=True)
+    Doctor.objects.create(name="Bob", eav__category="x", eav__active=False)
+    Doctor.objects.create(name="Cyd", eav__category="y", eav__active=True)
+    return yes
+
+
+def names(queryset):
+    return sorted(queryset.values_list("name", flat=True))
+
+
+def hot(**kwargs):
+    return Doctor.objects.cache_eav_filter().filter(**kwargs)
+
+
+def test_hits_skip_the_subquery(doctors, django_assert_num_queries) -> None:
+    assert names(hot(eav__category="x", eav__active=True)) == ["Anne"]
+
+    with django_assert_num_queries(1) as ctx:
+        assert names(hot(eav__active=True, eav__category="x")) == ["Anne"]
+    assert "eav_value" not in ctx.captured_queries[0]["sql"]
+
+    # Other values are other entries.
+    assert names(hot(eav__category="y", eav__active=True)) == ["Cyd"]
+    assert names(hot(eav__category="x")) == ["Anne", "Bob"]
+
+
+def test_writes_invalidate_their_attributes(
+    doctors,
+    django_assert_num_queries,
+) -> None:
+    assert names(hot(eav__category="x", eav__active=True)) == ["Anne"]
+
+    # Writing another attribute keeps the entry.
+    Doctor.objects.create(name="Dan", eav__age=40)
+    with django_assert_num_queries(1):
+        assert names(hot(eav__category="x", eav__active=True)) == ["Anne"]
+
+    bob = Doctor.objects.get(name="Bob")
+    bob.eav.active = True
+    bob.save()
+    assert names(hot(eav__category="x", eav__active=True)) == ["Anne", "Bob"]
+
+    Value.objects.filter(attribute__slug="active").update(value_bool=False)
+    assert names(hot(eav__category="x", eav__active=True)) == []
+
+    values = list(Value.objects.filter(attribute__slug="active"))
+    for value in values:
+        value.value_bool = True
+    Value.objects.bulk_update(values, ["value_bool"])
+    assert names(hot(eav__category="x", eav__active=True)) == ["Anne", "Bob"]
+
+    Value.objects.filter(attribute__slug="category", value_text="y").delete()
+    Value.objects.filter(attribute__slug="category").first().delete()
+    assert names(hot(eav__category="x", eav__active=True)) == ["Bob"]
+
+    cyd = Doctor.objects.get(name="Cyd")
+    category = Attribute.objects.get(slug="category")
+    Value.objects.bulk_create(
+        [
+            Value(
+                entity_ct=cyd.eav.ct,
+                entity_uuid=cyd.pk,
+                attribute=category,
+                value_text="x",
+            ),
+        ],
+    )
+    assert names(hot(eav__category="x", eav__active=True)) == ["Bob", "Cyd"]
+
+
+def test_moving_values_invalidates_all(doctors) -> None:
+    assert names(hot(eav__age=3)) == []
+
+    Value.objects.filter(attribute__slug="active").update(
+        attribute=Attribute.objects.get(slug="age"),
+        value_bool=None,
+        value_int=3,
+    )
+    assert names(hot(eav__age=3)) == ["Anne", "Bob", "Cyd"]
+
+
+def test_schema_change_invalidates_all(doctors) -> None:
+    assert names(hot(eav__fever="yes")) == []
+
+    yes = EnumValue.objects.get(value="yes")
+    anne = Doctor.objects.get(name="Anne")
+    Attribute.objects.get(slug="fever").save_value(anne, yes)
+    assert names(hot(eav__fever="yes")) == ["Anne"]
+
+    yes.value = "oui"
+    yes.save()
+    assert names(hot(eav__fever="yes")) == []
+    assert names(hot(eav__fever=yes)) == ["Anne"]
+
+
+def test_q_expressions(doctors, django_assert_num_queries) -> None:
+    either = Q(eav__category="y") | Q(eav__active=False)
+    assert names(Doctor.objects.cache_eav_filter().filter(either)) == ["Bob", "Cyd"]
+    with django_assert_num_queries(1):
+        cached = Doctor.objects.cache_eav_filter().filter(either, name__gt="B")
+        assert names(cached) == ["Bob", "Cyd"]
+
+    # Q-expressions with other lookups aren't cached, but still work.
+    mixed = Q(eav__category="x") & Q(name="Bob")
+    with django_assert_num_queries(2):
+        assert names(Doctor.objects.cache_eav_filter().filter(mixed)) == ["Bob"]
+        assert names(Doctor.objects.cache_eav_filter().filter(mixed)) == ["Bob"]
+
+
+def test_exclude_and_get(doctors) -> None:
+    cached = Doctor.objects.cache_eav_filter()
+    assert names(cached.exclude(eav__category="x", eav__active=True)) == [
+        "Bob",
+        "Cyd",
+    ]
+    assert cached.get(eav__category="y").name == "Cyd"
+
+
+def test_uncacheable_lookups(doctors, django_assert_num_queries) -> None:
+    categories = Value.objects.filter(value_text="x").values("value_text")
+    assert names(hot(eav__category__in=categories)) == ["Anne", "Bob"]
+    with django_assert_num_queries(2):
+        assert names(hot(eav__category__in=categories)) == ["Anne", "Bob"]
+        assert names(hot(eav__category__in=categories)) == ["Anne", "Bob"]
+
+    assert names(hot(eav__category__in=["y", "z"])) == ["Cyd"]
+    assert names(hot(eav__category__in={"y", "z"})) == ["Cyd"]
+
+
+def test_lookups_on_defaults_not_cached(doctors) -> None:
+    category = Attribute.objects.get(slug="category")
+    category.default = "x"
+    category.save()
+    assert names(hot(eav__category="x")) == ["Anne", "Bob"]
+
+    Doctor.objects.create(name="Dan")
+    assert names(hot(eav__category="x")) == ["Anne", "Bob", "Dan"]
+
+
+def test_invalidated_again_on_commit(doctors) -> None:
+    active = Attribute.objects.get(slug="active")
+    key = ATTRIBUTE_TAG_KEY.format(id=active.pk)
+    with transaction.atomic():
+        Value.objects.filter(attribute=active).update(value_bool=False)
+        assert names(hot(eav__active=False)) == ["Anne", "Bob", "Cyd"]
+        # Another process could cache the old results before the commit.
+        cache.add(key, "other")
+    assert cache.get(key) is None
+
+
+def test_rolled_back_results_not_cached(doctors) -> None:
+    assert names(hot(eav__active=False)) == ["Bob"]
+
+    def write_and_roll_back():
+        with transaction.atomic():
+            Value.objects.filter(attribute__slug="active").update(value_bool=False)
+            assert names(hot(eav__active=False)) == ["Anne", "Bob", "Cyd"]
+            raise DatabaseError
+
+    with pytest.raises(DatabaseError):
+        write_and_roll_back()
+    assert names(hot(eav__active=False)) == ["Bob"]
+
+
+def test_disabled(db, django_assert_num_queries) -> None:
+    disabled = FilterCache()
+    assert not disabled.enabled
+    disabled.invalidate([1])
+    disabled.clear()
+
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Doctor.objects.create(name="Who", eav__age=3)
+    assert names(hot(eav__age=3)) == ["Who"]
+    with django_assert_num_queries(1):
+        assert names(hot(eav__age=3)) == ["Who"]
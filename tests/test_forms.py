@@ -190,6 +190,20 @@ def test_entity_admin_form(patient, define_fieldsets):
     assert len(adminform.fieldsets) == expected_fieldsets
 
 
+@pytest.mark.django_db
+def test_entity_admin_form_skips_object_attributes(patient):
+    """Object attributes have no form field, so they are left out of fieldsets."""
+    Attribute.objects.create(name="color", datatype=Attribute.TYPE_TEXT)
+    Attribute.objects.create(name="related", datatype=Attribute.TYPE_OBJECT)
+    admin = BaseEntityAdmin(Patient, AdminSite())
+    admin.form = BaseDynamicEntityForm
+
+    view = admin.change_view(request, str(patient.pk))
+
+    eav_fieldset = view.context_data["adminform"].fieldsets[-1]
+    assert eav_fieldset[1]["fields"] == ["color"]
+
+
 @pytest.mark.django_db
 def test_entity_admin_form_no_attributes(patient):
     """Test the BaseEntityAdmin form with no Attributes created."""
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from eav.logic.generate import create_schema, generate
+from eav.models import Attribute, EnumGroup, Value
+from test_project.models import Doctor, ExampleModel, Patient
+
+
+def run(*args) -> str:
+    out = StringIO()
+    call_command("eav_generate", *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_default_schema() -> None:
+    output = run("test_project.ExampleModel", "--entities", "10", "-v", "2")
+
+    assert ExampleModel.objects.count() == 10
+    assert Attribute.objects.filter(slug__startswith="gen_").count() == 8
+    assert Value.objects.count() == 80
+    assert "Created 10 ExampleModel entities and 80 values for 8 attributes" in output
+    assert "rows/s" in output
+
+    # Every datatype reads back through the entity.
+    entity = ExampleModel.objects.first()
+    for attribute in Attribute.objects.all():
+        assert getattr(entity.eav, attribute.slug) is not None
+
+
+@pytest.mark.django_db
+def test_configured_schema() -> None:
+    run(
+        "test_project.ExampleModel",
+        "--entities=25",
+        "--attributes=int=3",
+        "--attributes=enum=2",
+        "--attributes=object=1",
+        "--enum-groups=2",
+        "--enum-cardinality=3",
+        "--sparsity=0.5",
+        "--batch-size=7",
+        "--prefix=load",
+        "--field=name=entity {n}",
+    )
+
+    assert ExampleModel.objects.count() == 25
+    assert ExampleModel.objects.filter(name="entity 24").exists()
+    assert sorted(Attribute.objects.values_list("slug", flat=True)) == [
+        "load_enum_0",
+        "load_enum_1",
+        "load_int_0",
+        "load_int_1",
+        "load_int_2",
+        "load_object_0",
+    ]
+    assert EnumGroup.objects.count() == 2
+    assert all(g.values.count() == 3 for g in EnumGroup.objects.all())
+    # Roughly half of the 150 possible values are left out.
+    assert 40 < Value.objects.count() < 110
+
+    enum_values = Value.objects.filter(attribute__slug="load_enum_1")
+    assert {v.value_enum.value for v in enum_values} <= {
+        "load_1_0",
+        "load_1_1",
+        "load_1_2",
+    }
+
+    value = Value.objects.filter(attribute__slug="load_object_0").first()
+    assert isinstance(value.value, ExampleModel)
+
+
+@pytest.mark.django_db
+def test_multi_attributes() -> None:
+    run("test_project.ExampleModel", "--entities=20", "--attributes=multi=2")
+
+    assert EnumGroup.objects.count() == 1
+    group = EnumGroup.objects.get()
+    assert len(group.ordinals) == 5
+    choices = set(group.values.all())
+    selections = [
+        entity.eav.gen_multi_1 for entity in ExampleModel.objects.prefetch_eav()
+    ]
+    assert all(set(selected) <= choices for selected in selections)
+    assert len({len(selected) for selected in selections}) > 1
+
+
+@pytest.mark.django_db
+def test_seed_is_deterministic() -> None:
+    def values():
+        return list(
+            Value.objects.order_by("entity_uuid", "attribute__slug").values_list(
+                "entity_uuid",
+                "attribute__slug",
+                "value_int",
+                "value_text",
+            ),
+        )
+
+    run("test_project.Doctor", "--entities=5", "--seed=3", "--sparsity=0.3")
+    first = values()
+    Value.objects.all().delete()
+    Doctor.objects.all().delete()
+
+    run("test_project.Doctor", "--entities=5", "--seed=3", "--sparsity=0.3")
+    assert values() == first
+    assert len(first) < 40
+
+
+@pytest.mark.django_db
+def test_rerun_reuses_schema() -> None:
+    run("test_project.ExampleModel", "--entities=2", "--attributes=text=2")
+    run("test_project.ExampleModel", "--entities=2", "--attributes=text=2")
+
+    assert Attribute.objects.count() == 2
+    assert Value.objects.count() == 8
+
+
+@pytest.mark.parametrize(
+    ("args", "message"),
+    [
+        (["nope.Model"], "No installed app"),
+        (["contenttypes.ContentType"], "not registered with eav"),
+        (["test_project.Doctor", "--attributes=object=1"], "integer keys"),
+        (["test_project.ExampleModel", "--attributes=color=1"], "Unknown datatype"),
+        (["test_project.ExampleModel", "--attributes=int=x"], "Invalid attribute"),
+        (["test_project.ExampleModel", "--sparsity=1"], "--sparsity"),
+        (["test_project.ExampleModel", "--batch-size=0"], "--batch-size"),
+        (
+            [
+                "test_project.ExampleModel",
+                "--attributes=multi=1",
+                "--enum-cardinality=64",
+            ],
+            "--enum-cardinality",
+        ),
+    ],
+)
+@pytest.mark.django_db
+def test_invalid_arguments(args, message) -> None:
+    with pytest.raises(CommandError, match=message):
+        run(*args)
+
+
+def test_invalid_pair() -> None:
+    with pytest.raises(CommandError):
+        run("test_project.ExampleModel", "--attributes=int")
+
+
+@pytest.mark.django_db
+def test_generate_reports_progress() -> None:
+    schema = create_schema({Attribute.TYPE_FLOAT: 1, Attribute.TYPE_DATE: 1})
+    seen = []
+
+    stats = generate(Patient, schema, 5, batch_size=2, progress=seen.append)
+
+    assert len(seen) == 3
+    assert (stats.entities, stats.values) == (5, 10)
+    assert stats.rows_per_second > 0
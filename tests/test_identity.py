@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+from django.db import DatabaseError, transaction
+
+from eav import identity
+from eav.fields import IdentityMapForeignKey
+from eav.identity import IdentityMap, identity_map
+from eav.models import Attribute, EnumGroup, EnumValue, Value
+from test_project.models import Doctor
+
+
+@pytest.fixture
+def values(db):
+    identity_map.clear()
+    group = EnumGroup.objects.create(name="Yes / No")
+    yes = EnumValue.objects.create(value="yes")
+    group.values.add(yes)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(
+        name="fever",
+        datatype=Attribute.TYPE_ENUM,
+        enum_group=group,
+    )
+    for age in range(5):
+        Doctor.objects.create(name=str(age), eav__age=age, eav__fever=yes)
+    identity_map.clear()
+
+
+def test_values_share_attributes(values, django_assert_num_queries) -> None:
+    # One query for the values, one per distinct attribute and enum value.
+    with django_assert_num_queries(4):
+        loaded = list(Value.objects.order_by("pk"))
+        read = [(v.attribute.slug, v.value) for v in loaded]
+
+    assert sorted(value for slug, value in read if slug == "age") == [0, 1, 2, 3, 4]
+    assert {value.value for slug, value in read if slug == "fever"} == {"yes"}
+    assert len({id(v.attribute) for v in loaded}) == 2
+    assert len({id(v.value_enum) for v in loaded if v.value_enum_id}) == 1
+
+    with django_assert_num_queries(1):
+        assert all(str(v.attribute) for v in Value.objects.all())
+
+
+def test_save_and_delete_evict(values) -> None:
+    value = Value.objects.filter(attribute__slug="age").first()
+    attribute = Attribute.objects.get(slug="age")
+    attribute.name = "years"
+    attribute.save()
+
+    assert Value.objects.get(pk=value.pk).attribute.name == "years"
+
+    yes = EnumValue.objects.get()
+    assert Value.objects.filter(value_enum=yes).first().value_enum is not yes
+    Value.objects.filter(value_enum=yes).delete()
+    yes.delete()
+    assert identity_map.get(EnumValue, yes.pk) is None
+
+
+def test_disabled(values, settings, django_assert_num_queries) -> None:
+    settings.EAV2_IDENTITY_MAP_SIZE = 0
+
+    with django_assert_num_queries(11):
+        assert all(v.attribute for v in Value.objects.all())
+    assert not identity_map
+
+
+def test_least_recently_used_evicted() -> None:
+    mapping = IdentityMap(maxsize=2)
+    first, second, third = (Attribute(pk=pk) for pk in range(1, 4))
+    for attribute in (first, second):
+        mapping.add(attribute)
+
+    assert mapping.get(Attribute, 1) is first
+    mapping.add(third)
+
+    assert mapping.get(Attribute, 2) is None
+    assert mapping.get(Attribute, 1, "default") is first
+    assert len(mapping) == 2
+    assert (mapping.hits, mapping.misses) == (2, 1)
+
+    mapping.clear()
+    assert (len(mapping), mapping.hits) == (0, 0)
+
+
+def test_add_keeps_mapped_instance() -> None:
+    mapping = IdentityMap(maxsize=10)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def add():
+        barrier.wait()
+        results.append(mapping.add(Attribute(pk=1)))
+
+    threads = [threading.Thread(target=add) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(obj) for obj in results}) == 1
+    assert mapping.add(Attribute()).pk is None
+    assert len(mapping) == 1
+
+
+def test_rollback_evicts(values) -> None:
+    value = Value.objects.filter(attribute__slug="age").first()
+
+    loaded = []
+
+    def load_and_roll_back():
+        with transaction.atomic():
+            loaded.append(value.attribute)
+            assert identity_map.get(Attribute, value.attribute_id) is loaded[0]
+            raise DatabaseError
+
+    with pytest.raises(DatabaseError):
+        load_and_roll_back()
+    attribute = loaded[0]
+
+    assert identity_map.get(Attribute, attribute.pk) is None
+
+    kept = Value.objects.get(pk=value.pk).attribute
+    with transaction.atomic():
+        assert identity_map.get(Attribute, kept.pk) is kept
+    assert identity_map.get(Attribute, kept.pk) is kept
+
+
+def test_uncommitted_not_shared_between_threads(values) -> None:
+    attribute = Value.objects.filter(attribute__slug="age").first().attribute
+    seen = []
+    thread = threading.Thread(
+        target=lambda: seen.append(identity_map.get(Attribute, attribute.pk)),
+    )
+    thread.start()
+    thread.join()
+
+    assert seen == [None]
+    assert identity_map.get(Attribute, attribute.pk) is attribute
+
+
+def test_unknown_commit_hooks(
+    values,
+    monkeypatch,
+    django_capture_on_commit_callbacks,
+) -> None:
+    # Without a known layout of the commit hooks of Django, instances mapped
+    # in a transaction are only used once it is committed.
+    monkeypatch.setattr(identity, "_KNOWN_HOOKS", False)
+    attribute = Attribute.objects.get(slug="age")
+    capture = django_capture_on_commit_callbacks(execute=True)
+    with capture as callbacks, transaction.atomic():
+        pending = identity.uncommitted("default")
+        assert identity.uncommitted("default") is pending
+        assert not pending.valid()
+        assert pending.rolled_back()
+        identity_map.add(attribute)
+        assert identity_map.get(Attribute, attribute.pk) is None
+    assert callbacks == [pending]
+    assert pending.valid()
+
+
+def test_migrations_see_a_foreign_key() -> None:
+    field = Value._meta.get_field("attribute")
+    assert isinstance(field, IdentityMapForeignKey)
+    assert field.deconstruct()[1] == "django.db.models.ForeignKey"
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.utils import NotSupportedError
+from django.test.utils import CaptureQueriesContext
+
+from eav.models import Attribute, Value
+from test_project.models import Doctor, ExampleModel
+
+
+@pytest.fixture
+def counters(db):
+    Attribute.objects.create(name="views", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="retries", datatype=Attribute.TYPE_INT, default=10)
+    Attribute.objects.create(name="score", datatype=Attribute.TYPE_FLOAT)
+    Doctor.objects.create(name="a", eav__views=1)
+    Doctor.objects.create(name="b")
+
+
+def views(name):
+    return Doctor.objects.get(name=name).eav.views
+
+
+@pytest.fixture(params=[True, False], ids=["returning", "select"])
+def returning(request, monkeypatch):
+    monkeypatch.setattr(
+        "eav.logic.managers._update_returning",
+        lambda connection: request.param,
+    )
+
+
+def test_increment(counters, returning) -> None:
+    doctor = Doctor.objects.get(name="a")
+    assert doctor.eav.increment("views", 2) == 3
+    assert doctor.eav.views == 3
+    assert doctor.eav.increment("score", 0.5) == 0.5
+
+    # Missing values start from the default.
+    doctor = Doctor.objects.get(name="b")
+    assert doctor.eav.increment("retries") == 11
+    assert doctor.eav.increment("views") == 1
+    assert Value.objects.filter(attribute__slug="views").count() == 2
+
+
+def test_increment_queries(counters, django_assert_num_queries) -> None:
+    doctor = Doctor.objects.get(name="a")
+    with django_assert_num_queries(2):
+        assert doctor.eav.increment("views") == 2
+
+
+def test_increment_eav(counters, returning) -> None:
+    Doctor.objects.create(name="c", eav__views=5)
+    doctors = Doctor.objects.filter(name__in=["a", "b", "c"])
+    incremented = doctors.increment_eav("views", 10)
+    pks = dict(doctors.values_list("name", "pk"))
+    assert incremented == {pks["a"]: 11, pks["b"]: 10, pks["c"]: 15}
+    assert [views(name) for name in "abc"] == [11, 10, 15]
+
+    examples = [ExampleModel.objects.create(name=n) for n in ("e1", "e2")]
+    ExampleModel.objects.filter(name="e1").increment_eav("views")
+    assert ExampleModel.objects.all().increment_eav("views") == {
+        examples[0].pk: 2,
+        examples[1].pk: 1,
+    }
+
+
+def test_increment_eav_filters_with_a_subquery(counters) -> None:
+    doctors = Doctor.objects.filter(name="a")
+    with CaptureQueriesContext(connection) as queries:
+        doctors.increment_eav("views")
+
+    (update,) = (q["sql"] for q in queries if q["sql"].startswith("UPDATE"))
+    assert '"name" = ' in update
+    # Entity keys aren't read on their own, only the entities without a value.
+    assert len(queries) == 3
+
+
+def test_invalidates_reads(counters, settings) -> None:
+    prefetched = Doctor.objects.prefetch_eav().get(name="a")
+    prefetched.eav.increment("views")
+    assert prefetched.eav.views == 2
+
+    settings.EAV2_ENTITY_CACHE = "default"
+    cache.clear()
+    assert views("a") == 2
+    Doctor.objects.filter(name="a").increment_eav("views")
+    assert views("a") == 3
+
+
+def test_only_numbers(counters) -> None:
+    Attribute.objects.create(name="city", datatype=Attribute.TYPE_TEXT)
+    with pytest.raises(NotSupportedError, match='"city" is not a number'):
+        Doctor.objects.get(name="a").eav.increment("city")
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import logging
+import threading
+
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+import eav
+from eav import instrumentation
+from eav.forms import BaseDynamicEntityForm
+from eav.instrumentation import (
+    FILTER,
+    FORM,
+    ORDER,
+    READ,
+    VALIDATE,
+    WRITE,
+    LoggingSubscriber,
+    OperationStats,
+    collect,
+    instrument,
+    subscribe,
+    unsubscribe,
+)
+from eav.models import Attribute
+from test_project.models import Patient
+
+
+class PatientForm(BaseDynamicEntityForm):
+    class Meta:
+        model = Patient
+        fields = ("name",)
+
+
+@pytest.fixture
+def patient(db):
+    eav.register(Patient)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="city", datatype=Attribute.TYPE_TEXT)
+    patient = Patient.objects.create(name="Anne", eav__age=3, eav__city="Oslo")
+    yield Patient.objects.get(pk=patient.pk)
+    eav.unregister(Patient)
+
+
+def test_instrument_is_a_no_op_without_listeners() -> None:
+    operation = instrument(READ)
+    assert not operation
+
+    with operation as entered:
+        entered.add_slugs("age")
+        entered.add_rows(1)
+
+    assert instrument(READ) is operation
+
+
+def test_collect_read(patient) -> None:
+    with collect() as stats:
+        assert patient.eav.age == 3
+
+    (read,) = stats
+    assert read.operation == READ
+    assert read.slugs == ("age",)
+    assert read.content_type == ContentType.objects.get_for_model(Patient)
+    assert read.queries == 2
+    assert read.rows == 1
+    assert read.elapsed >= 0
+    assert stats.queries == 2
+    assert stats.rows == 1
+    assert stats.elapsed == read.elapsed
+
+
+def test_collect_read_missing_value(patient) -> None:
+    Attribute.objects.create(name="weight", datatype=Attribute.TYPE_FLOAT)
+
+    with collect() as stats:
+        assert patient.eav.weight is None
+
+    assert stats.filter(READ)[0].rows == 0
+
+
+def test_collect_write_and_validate(patient) -> None:
+    patient.eav.age = 4
+
+    with collect() as stats:
+        patient.save()
+
+    (validate,) = stats.filter(VALIDATE)
+    assert validate.slugs == ("age", "city")
+    assert validate.rows == 2
+
+    (write,) = stats.filter(WRITE)
+    assert write.slugs == ("age",)
+    assert write.rows == 1
+    assert write.queries > 0
+
+
+def test_collect_filter(patient) -> None:
+    with collect() as stats:
+        queryset = Patient.objects.filter(
+            Q(eav__age=3) | Q(eav__city="Oslo"),
+            name="Anne",
+            eav__age__gte=1,
+        )
+
+    (compiled,) = stats.filter(FILTER)
+    assert compiled.slugs == ("age", "city")
+    assert compiled.content_type.model == "patient"
+
+    # Only the expansion is measured, evaluating the queryset is not.
+    with collect() as evaluated:
+        assert list(queryset) == [patient]
+    assert not evaluated.operations
+
+
+def test_nested_operations_are_not_reported(patient) -> None:
+    with collect() as stats, instrument(FILTER, Patient) as outer:
+        Patient.objects.filter(eav__age=3)
+        with instrument(READ, Patient) as inner:
+            inner.add_rows(1)
+
+    assert outer
+    assert [s.operation for s in stats] == [READ, FILTER]
+
+
+def test_nested_queries_are_counted_once(patient) -> None:
+    with collect() as stats, instrument(FILTER, Patient):
+        Patient.objects.count()
+        with instrument(READ, Patient):
+            Patient.objects.count()
+            Patient.objects.count()
+
+    read, filtered = stats
+    assert (read.queries, filtered.queries) == (2, 1)
+    assert stats.queries == 3
+
+
+def test_collect_order(patient) -> None:
+    Patient.objects.create(name="Bob", eav__age=1)
+
+    with collect() as stats:
+        ordered = Patient.objects.order_by("eav__age")
+
+    (order,) = stats.filter(ORDER)
+    assert order.slugs == ("age",)
+    assert order.rows == 2
+    assert [p.name for p in ordered] == ["Bob", "Anne"]
+
+
+def test_collect_form(patient) -> None:
+    with collect() as stats:
+        PatientForm(instance=patient)
+
+    (form,) = stats.filter(FORM)
+    assert form.slugs == ("age", "city")
+    assert form.rows == 2
+    assert form.content_type.model == "patient"
+
+
+def test_nested_collect(patient) -> None:
+    with collect() as outer:
+        patient.eav.age  # noqa: B018
+        with collect() as inner:
+            patient.eav.city  # noqa: B018
+
+    assert [s.slugs for s in outer] == [("age",), ("city",)]
+    assert [s.slugs for s in inner] == [("city",)]
+    assert len(outer) == 2
+
+
+def test_collect_is_local_to_the_thread() -> None:
+    operations = []
+    errors = []
+
+    def read_in_thread():
+        try:
+            with instrument(READ) as operation:
+                operations.append(operation)
+        except Exception as err:  # noqa: BLE001
+            errors.append(err)
+
+    with collect() as stats:
+        thread = threading.Thread(target=read_in_thread)
+        thread.start()
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    assert operations == [instrument(READ)]
+    assert not operations[0]
+    assert not stats.operations
+
+
+def test_subscribe(patient) -> None:
+    seen: list[OperationStats] = []
+    subscribe(seen.append)
+    try:
+        patient.eav.age  # noqa: B018
+    finally:
+        unsubscribe(seen.append)
+
+    patient.eav.city  # noqa: B018
+    assert [s.slugs for s in seen] == [("age",)]
+
+    # Unsubscribing twice is harmless.
+    unsubscribe(seen.append)
+
+
+def test_operation_stats_str() -> None:
+    stats = OperationStats(
+        operation=READ,
+        slugs=("age", "city"),
+        content_type=None,
+        queries=2,
+        rows=1,
+        elapsed=0.0015,
+    )
+    assert str(stats) == "eav read - [age, city]: 2 queries, 1 rows, 1.50ms"
+
+
+def test_logging_subscriber(patient, caplog) -> None:
+    subscriber = LoggingSubscriber(level=logging.INFO)
+    subscribe(subscriber)
+    try:
+        with caplog.at_level(logging.INFO, logger=instrumentation.logger.name):
+            patient.eav.age  # noqa: B018
+    finally:
+        unsubscribe(subscriber)
+
+    (record,) = caplog.records
+    assert record.getMessage().startswith("eav read test_project.patient [age]")
+    assert record.eav_operation.queries == 2
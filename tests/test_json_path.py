@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Q
+
+from eav.logic.json_path import json_path_condition, split_json_path
+from eav.models import Attribute, Value
+from test_project.models import Doctor
+
+META = {
+    "a": {"vendor": {"id": 5, "name": "Acme"}, "tags": ["x"], "active": True},
+    "b": {"vendor": {"id": 7, "name": "Bolt"}, "tags": ["y"], "active": False},
+    "c": {"vendor": {"name": "Cog"}, "tags": []},
+}
+
+
+def names(queryset):
+    return sorted(queryset.values_list("name", flat=True))
+
+
+@pytest.fixture
+def doctors(db):
+    Attribute.objects.create(name="meta", datatype=Attribute.TYPE_JSON)
+    for name, meta in META.items():
+        Doctor.objects.create(name=name, eav__meta=meta)
+
+
+def test_split_json_path() -> None:
+    assert split_json_path(["vendor", "id"]) == (("vendor", "id"), "exact")
+    assert split_json_path(["vendor", "id", "gte"]) == (("vendor", "id"), "gte")
+    assert split_json_path(["has_key"]) == ((), "has_key")
+    assert split_json_path([]) == ((), "exact")
+
+
+def test_key_paths(doctors) -> None:
+    doctors = Doctor.objects.all()
+
+    assert names(doctors.filter(eav__meta__vendor__id=5)) == ["a"]
+    assert names(doctors.filter(eav__meta__vendor__id__gt=5)) == ["b"]
+    assert names(doctors.filter(eav__meta__vendor__id__in=[5, 7])) == ["a", "b"]
+    assert names(doctors.filter(eav__meta__vendor__name__startswith="C")) == ["c"]
+    assert names(doctors.filter(eav__meta__vendor__id__isnull=True)) == ["c"]
+    assert names(doctors.filter(eav__meta__vendor__has_key="id")) == ["a", "b"]
+    assert names(doctors.filter(eav__meta__active=True)) == ["a"]
+    assert names(doctors.filter(eav__meta__tags__0="y")) == ["b"]
+    assert names(doctors.filter(eav__meta__tags=["x"])) == ["a"]
+    assert names(doctors.exclude(eav__meta__vendor__id=5)) == ["b", "c"]
+    assert names(doctors.filter(Q(eav__meta__vendor__id=5) | Q(name="c"))) == [
+        "a",
+        "c",
+    ]
+
+
+def test_compiled_sql(doctors) -> None:
+    sql = str(
+        Value.objects.filter(
+            json_path_condition(("vendor", "id"), "gt", 5, "sqlite"),
+        ).query,
+    )
+    assert """JSON_EXTRACT("eav_value"."value_json", '$."vendor"."id"') > 5""" in sql
+
+    assert json_path_condition(("vendor", "id"), "exact", 5, "postgresql") == Q(
+        value_json__contains={"vendor": {"id": 5}},
+    )
+    assert json_path_condition(("tags",), "exact", ["x"], "postgresql") == Q(
+        value_json__tags__exact=["x"],
+    )
+    assert json_path_condition(("vendor", "id"), "lt", 5, "mysql") == Q(
+        value_json__vendor__id__lt=5,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command() -> None:
+    Attribute.objects.create(name="meta", datatype=Attribute.TYPE_JSON)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+
+    def run(*args):
+        out = StringIO()
+        call_command("eav_json_index", *args, stdout=out)
+        return out.getvalue()
+
+    created = run("meta", "--key", "vendor__id")
+    assert created.startswith("Created eav_json_")
+    assert run("meta", "--key", "vendor__id").startswith("Skipped")
+    try:
+        attribute = Attribute.objects.get(slug="meta")
+        plan = Value.objects.filter(
+            json_path_condition(("vendor", "id"), "gt", 5, "sqlite"),
+            attribute_id=attribute.pk,
+        ).explain()
+        assert created.split()[1].rstrip(".") in plan
+    finally:
+        assert run("meta", "--key", "vendor__id", "--drop").startswith("Dropped")
+
+    with pytest.raises(CommandError, match="need PostgreSQL"):
+        run("meta")
+    with pytest.raises(CommandError, match="not a json attribute"):
+        run("age", "--key", "x")
+    with pytest.raises(CommandError, match="No attribute"):
+        run("nope")
+    assert connection.vendor == "sqlite"
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from eav.forms import BaseDynamicEntityForm
+from eav.models import Attribute, EnumGroup, EnumValue, Value
+from eav.models.enum_group import MAX_ORDINALS
+from test_project.models import Doctor
+
+COLORS = ("red", "green", "blue", "black")
+
+
+def names(queryset):
+    return sorted(queryset.values_list("name", flat=True))
+
+
+@pytest.fixture
+def colors(db):
+    group = EnumGroup.objects.create(name="Colors")
+    for color in COLORS:
+        group.values.add(EnumValue.objects.create(value=color))
+    Attribute.objects.create(
+        name="colors",
+        datatype=Attribute.TYPE_MULTI_ENUM,
+        enum_group=group,
+    )
+    return group
+
+
+@pytest.fixture
+def doctors(colors):
+    Doctor.objects.create(name="a", eav__colors=["red", "green"])
+    Doctor.objects.create(name="b", eav__colors=["green", "blue"])
+    Doctor.objects.create(name="c", eav__colors=[])
+    Doctor.objects.create(name="d")
+
+
+def test_encode_decode(colors) -> None:
+    red, green, blue, _ = colors.values.order_by("pk")
+    assert colors.encode([blue, "red"]) == 0b11
+    assert colors.encode(["green"]) == 0b100
+    # Ordinals are assigned once, in order of first use.
+    colors.refresh_from_db()
+    assert colors.encode(["red", "blue", "green"]) == 0b111
+    assert colors.decode(0b101) == [red, green]
+    assert colors.decode(0) == []
+
+    with pytest.raises(ValidationError, match="purple"):
+        colors.encode(["red", "purple"])
+
+
+def test_max_ordinals(colors) -> None:
+    colors.ordinals = {str(pk): pk + MAX_ORDINALS for pk in range(-MAX_ORDINALS, 0)}
+    colors.save()
+    with pytest.raises(ValidationError, match="more than 63"):
+        colors.encode(["red"])
+
+
+def test_values(doctors, colors) -> None:
+    doctor = Doctor.objects.get(name="a")
+    assert [v.value for v in doctor.eav.colors] == ["red", "green"]
+    assert Doctor.objects.get(name="c").eav.colors == []
+    assert Doctor.objects.get(name="d").eav.colors is None
+    assert Value.objects.get(entity_uuid=doctor.pk).value_multi == 0b11
+
+    doctor.eav.colors = [colors.values.get(value="black")]
+    doctor.save()
+    assert [v.value for v in Doctor.objects.get(name="a").eav.colors] == ["black"]
+
+    doctor.eav.colors = ["purple"]
+    with pytest.raises(ValidationError, match="purple"):
+        doctor.save()
+    doctor.eav.colors = "red"
+    with pytest.raises(ValidationError, match="list of choices"):
+        doctor.save()
+
+
+def test_lookups(doctors, colors) -> None:
+    doctors = Doctor.objects.all()
+    green = colors.values.get(value="green")
+
+    assert names(doctors.filter(eav__colors__has="red")) == ["a"]
+    assert names(doctors.filter(eav__colors__has=green)) == ["a", "b"]
+    assert names(doctors.filter(eav__colors__has_all=["green", "blue"])) == ["b"]
+    assert names(doctors.filter(eav__colors__has_any=["red", "blue"])) == ["a", "b"]
+    assert names(doctors.filter(eav__colors=["green", "red"])) == ["a"]
+    assert names(doctors.filter(eav__colors=[])) == ["c"]
+    assert names(doctors.filter(eav__colors__isnull=True)) == []
+    assert names(doctors.exclude(eav__colors__has="green")) == ["c", "d"]
+    assert names(doctors.filter(Q(eav__colors__has="red") | Q(name="c"))) == [
+        "a",
+        "c",
+    ]
+
+    # Members never stored, or not in the group, match nothing.
+    assert names(doctors.filter(eav__colors__has="black")) == []
+    assert names(doctors.filter(eav__colors__has_all=["red", "purple"])) == []
+    assert names(doctors.filter(eav__colors__has_any=["red", "black"])) == ["a"]
+    assert names(doctors.filter(eav__colors__has_any=["black"])) == []
+    assert "&" in str(doctors.filter(eav__colors__has="red").query)
+
+
+def test_form(doctors, colors) -> None:
+    red, green, blue, _ = colors.values.order_by("pk")
+    doctor = Doctor.objects.get(name="a")
+
+    class Form(BaseDynamicEntityForm):
+        class Meta:
+            model = Doctor
+            fields = "__all__"
+
+    form = Form(instance=doctor)
+    assert form.fields["colors"].initial == [red.pk, green.pk]
+    assert len(form.fields["colors"].choices) == len(COLORS)
+
+    form = Form(
+        {"name": "a", "colors": [str(blue.pk)]},
+        instance=doctor,
+    )
+    assert form.is_valid(), form.errors
+    form.save()
+    assert Doctor.objects.get(name="a").eav.colors == [blue]
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.utils import NotSupportedError
+from django.test.utils import CaptureQueriesContext
+
+from eav.models import Attribute
+from eav.unit_of_work import unit_of_work
+from test_project.models import Doctor
+
+META = {"a": 1, "b": {"c": 2}}
+
+
+@pytest.fixture
+def attributes(db):
+    Attribute.objects.create(name="meta", datatype=Attribute.TYPE_JSON)
+    Attribute.objects.create(name="tags", datatype=Attribute.TYPE_CSV)
+    Doctor.objects.create(name="a", eav__meta=META, eav__tags="x;a;x;x;b;x")
+    Doctor.objects.create(name="b")
+
+
+@pytest.fixture(params=[True, False], ids=["sql", "python"])
+def in_sql(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr("eav.logic.mutations.JSON_VENDORS", frozenset())
+    return request.param
+
+
+def doctor(name):
+    return Doctor.objects.get(name=name)
+
+
+def updates(queries):
+    return [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+
+
+def test_json(attributes, in_sql) -> None:
+    with CaptureQueriesContext(connection) as queries:
+        doctor("a").eav.json_merge("meta", {"b": 3, "d": [1]})
+    assert doctor("a").eav.meta == {"a": 1, "b": 3, "d": [1]}
+    assert len(updates(queries)) == 1
+    assert ("JSON_SET" in updates(queries)[0]) is in_sql
+
+    doctor("a").eav.json_remove_key("meta", "a")
+    assert doctor("a").eav.meta == {"b": 3, "d": [1]}
+
+    # Merging creates missing values, removing keys doesn't.
+    doctor("b").eav.json_remove_key("meta", "a")
+    assert doctor("b").eav.meta is None
+    doctor("b").eav.json_merge("meta", {"x": None})
+    assert doctor("b").eav.meta == {"x": None}
+
+
+def test_unit_of_work_sees_mutations(attributes, in_sql) -> None:
+    with unit_of_work():
+        entity = doctor("a").eav
+        assert entity.meta == META
+        assert entity.tags == ["x", "a", "x", "x", "b", "x"]
+
+        entity.json_merge("meta", {"a": 2})
+        entity.csv_remove("tags", "x")
+        assert entity.meta == {"a": 2, "b": {"c": 2}}
+        assert doctor("a").eav.tags == ["a", "b"]
+
+
+def test_quoted_keys(attributes) -> None:
+    doctor("a").eav.json_merge("meta", {'say "hi"': 1})
+    doctor("a").eav.json_remove_key("meta", "a")
+    assert doctor("a").eav.meta == {"b": {"c": 2}, 'say "hi"': 1}
+
+
+def test_csv(attributes, settings) -> None:
+    settings.EAV2_CSV_ITEMS = True
+    doctor("a").eav.csv_remove("tags", "x")
+    assert doctor("a").eav.tags == ["a", "b"]
+    doctor("a").eav.csv_append("tags", "y")
+    assert doctor("a").eav.tags == ["a", "b", "y"]
+
+    doctor("b").eav.csv_remove("tags", "y")
+    doctor("b").eav.csv_append("tags", "y")
+    assert doctor("b").eav.tags == ["y"]
+    doctor("b").eav.csv_remove("tags", "y")
+    assert doctor("b").eav.tags == [""]
+
+    assert Doctor.objects.filter(eav__tags__has="y").count() == 1
+
+
+def test_queryset(attributes, in_sql) -> None:
+    doctors = Doctor.objects.all()
+    assert doctors.json_merge_eav("meta", {"v": 2}) == 2
+    assert [d.eav.meta["v"] for d in doctors] == [2, 2]
+    assert doctors.json_remove_key_eav("meta", "v") == 2
+    assert doctor("b").eav.meta == {}
+
+    assert doctors.csv_append_eav("tags", "z") == 2
+    assert doctors.filter(name="a").csv_remove_eav("tags", "x") == 1
+    assert [d.eav.tags for d in doctors.order_by("name")] == [
+        ["a", "b", "z"],
+        ["z"],
+    ]
+
+
+def test_queryset_filters_with_a_subquery(attributes, in_sql) -> None:
+    with CaptureQueriesContext(connection) as queries:
+        Doctor.objects.filter(name="a").json_merge_eav("meta", {"v": 2})
+
+    # The entities without a value are found, and the values of the others
+    # changed, with the filter of the queryset as a subquery.
+    missing = queries[1]["sql"]
+    assert "NOT EXISTS" in missing
+    assert '"name" = ' in missing
+    assert ('"name" = ' in updates(queries)[0]) is in_sql
+    assert doctor("a").eav.meta["v"] == 2
+
+
+def test_errors(attributes) -> None:
+    with pytest.raises(NotSupportedError, match='"tags" is not an uncompressed json'):
+        doctor("a").eav.json_merge("tags", {})
+    with pytest.raises(ValidationError, match="CSV items"):
+        doctor("a").eav.csv_append("tags", "a;b")
+
+    Attribute.objects.create(
+        name="notes",
+        datatype=Attribute.TYPE_JSON,
+        compression="zlib",
+    )
+    with pytest.raises(NotSupportedError, match='"notes" is not an uncompressed'):
+        Doctor.objects.all().json_merge_eav("notes", {})
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+import eav
+from eav.exceptions import NPlusOneError, NPlusOneWarning
+from eav.middleware import NPlusOneMiddleware
+from eav.models import Attribute
+from eav.nplusone import NPlusOneDetector, detect_n_plus_one, record_load
+from eav.unit_of_work import unit_of_work
+from test_project.models import Patient
+
+
+@pytest.fixture
+def patients(db):
+    eav.register(Patient)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="city", datatype=Attribute.TYPE_TEXT)
+    for i in range(6):
+        Patient.objects.create(name=f"patient {i}", eav__age=i)
+    yield Patient.objects.order_by("pk")
+    eav.unregister(Patient)
+
+
+def read_all(patients):
+    return [(p.eav.age, p.eav.city) for p in patients]
+
+
+def test_warns(patients) -> None:
+    detecting = detect_n_plus_one(threshold=3)
+    with pytest.warns(NPlusOneWarning) as record, detecting as detector:
+        read_all(patients)
+
+    (warning,) = record
+    message = str(warning.message)
+    assert message.startswith(
+        "EAV values of 3 Patient instances were loaded one at a time "
+        + "(attributes 'age', 'city'). Load them up front with "
+        + "Patient.objects.prefetch_eav('age', 'city').",
+    )
+    # The stack of the offending access is included.
+    assert "read_all" in message
+    assert detector.reports == [message.split("\n", maxsplit=1)[0]]
+
+
+def test_unit_of_work(patients) -> None:
+    detecting = detect_n_plus_one(threshold=3, action="raise")
+    with pytest.raises(NPlusOneError), unit_of_work(), detecting:
+        read_all(patients)
+
+
+def test_raises(patients) -> None:
+    detecting = detect_n_plus_one(threshold=2, action="raise")
+    match = r"objects.prefetch_eav\('age', 'city'\)"
+    with pytest.raises(NPlusOneError, match=match), detecting:
+        read_all(patients[:2])
+
+
+@override_settings(EAV2_N_PLUS_ONE="raise", EAV2_N_PLUS_ONE_THRESHOLD=6)
+def test_settings(patients) -> None:
+    detector = NPlusOneDetector()
+    assert detector.threshold == 6
+    assert detector.action == "raise"
+
+    with pytest.raises(NPlusOneError), detect_n_plus_one():
+        read_all(patients)
+
+
+@override_settings(EAV2_N_PLUS_ONE="ignore")
+def test_invalid_action_setting() -> None:
+    with pytest.raises(ImproperlyConfigured):
+        NPlusOneDetector()
+
+
+def test_below_threshold(patients) -> None:
+    with detect_n_plus_one(action="raise") as detector:
+        # Reading one entity repeatedly is not an N+1.
+        patient = patients.first()
+        for _ in range(10):
+            patient.eav.age  # noqa: B018
+        read_all(patients[:4])
+
+    assert not detector.reports
+
+
+def test_prefetched_reads_are_not_reported(patients) -> None:
+    with detect_n_plus_one(threshold=2, action="raise") as detector:
+        read_all(patients.prefetch_eav())
+
+    assert not detector.reports
+
+
+def test_inactive_outside_block(patients) -> None:
+    read_all(patients)
+    entities = [patient.eav for patient in patients]
+    errors = []
+
+    def load_in_thread():
+        # Recorded loads only, the test transaction locks the tables.
+        try:
+            for entity in entities:
+                record_load(entity, "age")
+        except Exception as err:  # noqa: BLE001
+            errors.append(err)
+
+    with detect_n_plus_one(threshold=2, action="raise") as detector:
+        thread = threading.Thread(target=load_in_thread)
+        thread.start()
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    assert not detector.reports
+
+
+@override_settings(DEBUG=True, EAV2_N_PLUS_ONE_THRESHOLD=2)
+def test_middleware(patients) -> None:
+    def view(request):
+        return HttpResponse(str(read_all(patients)))
+
+    middleware = NPlusOneMiddleware(view)
+
+    with pytest.warns(NPlusOneWarning):
+        response = middleware(RequestFactory().get("/"))
+    assert response.status_code == 200
+
+
+def test_middleware_not_used_without_debug() -> None:
+    with pytest.raises(MiddlewareNotUsed):
+        NPlusOneMiddleware(lambda request: HttpResponse())
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Q
+
+from eav.models import Attribute, AttributeStatistics, Value
+from eav.planner import EXISTS, IN, JOIN, analyze, choose_strategy
+from eav.queryset import _plan_kwargs, estimate_selectivity
+from eav.schema import SchemaCache
+from test_project.models import Doctor
+
+
+def run(*args) -> str:
+    out = StringIO()
+    call_command("eav_analyze", *args, stdout=out)
+    return out.getvalue()
+
+
+def names(queryset):
+    return sorted(queryset.values_list("name", flat=True))
+
+
+@pytest.fixture
+def doctors(db):
+    Attribute.objects.create(name="country", datatype=Attribute.TYPE_TEXT)
+    Attribute.objects.create(name="sku", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="unused", datatype=Attribute.TYPE_FLOAT)
+    countries = ["US"] * 36 + ["NO"] * 3 + ["SE"]
+    for sku, country in enumerate(countries):
+        Doctor.objects.create(name=f"d{sku:02}", eav__country=country, eav__sku=sku)
+
+
+@pytest.fixture
+def analyzed(doctors):
+    return run("test_project.Doctor", "--top", "2")
+
+
+def test_command(doctors) -> None:
+    output = run("test_project.Doctor", "--top", "2", "-v", "2")
+
+    assert "Analyzed 3 attribute statistics of 1 models." in output
+    assert "country (test_project.doctor): 40 rows, 3 distinct, 0% null" in output
+
+    country = AttributeStatistics.objects.get(attribute__slug="country")
+    assert (country.entity_count, country.row_count) == (40, 40)
+    assert country.most_common == [["US", 36], ["NO", 3]]
+    assert country.estimate_rows("exact", "US") == 36
+    # The values that aren't among the most common share the other rows.
+    assert country.estimate_rows("exact", "DK") == 1
+    assert country.estimate_rows("in", ["US", "NO"]) == 39
+    assert country.estimate_rows("isnull", value=False) == 40
+    assert country.estimate_rows("startswith", "U") == pytest.approx(40 / 3)
+
+    # Analyzing again updates the statistics.
+    Value.objects.filter(attribute__slug="sku", value_int=0).update(value_int=None)
+    assert len(analyze()) == 3
+    sku = AttributeStatistics.objects.get(attribute__slug="sku")
+    assert sku.null_ratio == pytest.approx(1 / 40)
+    assert sku.estimate_rows("isnull", value=True) == pytest.approx(1)
+
+
+def test_other_processes_see_new_statistics(
+    doctors,
+    settings,
+    django_capture_on_commit_callbacks,
+) -> None:
+    settings.EAV2_SCHEMA_CACHE = "default"
+    other_process = SchemaCache()
+    other_process.check()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        run("test_project.Doctor")
+
+    assert other_process.check()
+
+
+def test_command_errors(db) -> None:
+    with pytest.raises(CommandError, match="No installed app"):
+        run("nope.Model")
+    with pytest.raises(CommandError, match="is not registered with eav"):
+        run("test_project.Patient")
+    with pytest.raises(CommandError, match="--top"):
+        run("--top", "-1")
+
+
+def test_strategies(analyzed) -> None:
+    assert choose_strategy(None) == JOIN
+    assert choose_strategy(0.9) == EXISTS
+
+    rare = Doctor.objects.filter(eav__sku=5)
+    assert names(rare) == ["d05"]
+    assert "INNER JOIN" not in str(rare.query)
+    assert choose_strategy(estimate_selectivity(Doctor, ("eav__sku", 5))) == IN
+
+    common = Doctor.objects.filter(eav__country="US")
+    assert len(names(common)) == 36
+    assert "EXISTS" in str(common.query)
+
+    some = Doctor.objects.filter(eav__country="NO")
+    assert names(some) == ["d36", "d37", "d38"]
+    assert "INNER JOIN" in str(some.query)
+
+    assert names(Doctor.objects.exclude(eav__country="US", eav__sku=1)) == [
+        f"d{i:02}" for i in range(40) if i != 1
+    ]
+
+
+def test_most_selective_first(analyzed) -> None:
+    lookups = {"name__startswith": "d", "eav__country": "US", "eav__sku__in": [1, 2]}
+    planned = [key for key, _, _ in _plan_kwargs(Doctor, lookups)]
+
+    assert planned == ["eav__sku__in", "eav__country", "name__startswith"]
+    assert names(Doctor.objects.filter(**lookups)) == ["d01", "d02"]
+
+
+def test_estimates(analyzed, django_assert_num_queries) -> None:
+    doctors = Doctor.objects.all()
+    either = Q(eav__country="NO") | Q(eav__country="SE")
+
+    def estimates():
+        return [
+            doctors.estimate_eav_count(),
+            doctors.filter(eav__country="US").estimate_eav_count(),
+            doctors.filter(eav__country="US")
+            .exclude(eav__country="SE")
+            .estimate_eav_count(),
+            doctors.filter(either, name="x").estimate_eav_count(),
+            doctors.filter(~either).estimate_eav_count(),
+            doctors.filter(eav__sku__gt=10).estimate_eav_count(),
+        ]
+
+    assert estimates() == [None, 36, 35, 4, 36, 13]
+    # Once the lookups are compiled, estimating doesn't query.
+    with django_assert_num_queries(0):
+        estimates()
+
+    # Estimates need statistics for every alternative.
+    assert estimate_selectivity(Doctor, Q(eav__sku=1) | Q(name="x")) is None
+    assert estimate_selectivity(Doctor, Q(name="x")) is None
+    assert estimate_selectivity(Doctor, Q(eav__unused=1)) == 0
+
+
+def test_multiple_lookups_without_statistics(doctors) -> None:
+    """Lookups combined with a join match on the entity primary key type."""
+    assert names(Doctor.objects.filter(eav__country="NO", eav__sku=37)) == ["d37"]
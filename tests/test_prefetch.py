@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import pytest
+
+import eav
+from eav.instrumentation import PREFETCH, collect
+from eav.models import Attribute, EnumGroup, EnumValue
+from eav.queryset import prefetch_eav
+from test_project.models import Doctor, ExampleModel, M2MModel, Patient
+
+
+@pytest.fixture
+def patients(db):
+    eav.register(Patient)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="city", datatype=Attribute.TYPE_TEXT)
+    Patient.objects.create(name="Anne", eav__age=3, eav__city="Oslo")
+    Patient.objects.create(name="Bob", eav__age=5)
+    Patient.objects.create(name="Carl")
+    yield
+    eav.unregister(Patient)
+
+
+def test_prefetch_all_attributes(patients, django_assert_num_queries) -> None:
+    with django_assert_num_queries(3):
+        loaded = list(Patient.objects.prefetch_eav().order_by("name"))
+        assert [(p.eav.age, p.eav.city) for p in loaded] == [
+            (3, "Oslo"),
+            (5, None),
+            (None, None),
+        ]
+
+
+def test_prefetch_some_attributes(patients, django_assert_num_queries) -> None:
+    anne = Patient.objects.prefetch_eav("city").get(name="Anne")
+
+    with django_assert_num_queries(0):
+        assert anne.eav.city == "Oslo"
+
+    # Attributes that were not prefetched are still loaded on access.
+    with django_assert_num_queries(2):
+        assert anne.eav.age == 3
+
+
+def test_prefetch_survives_chaining(patients, django_assert_num_queries) -> None:
+    queryset = Patient.objects.prefetch_eav("age").filter(eav__age__gte=3)
+
+    with django_assert_num_queries(3):
+        assert sorted(p.eav.age for p in queryset.exclude(name="Bob")) == [3]
+
+
+def test_prefetch_unknown_attribute(patients) -> None:
+    anne = Patient.objects.prefetch_eav("nope").get(name="Anne")
+
+    with pytest.raises(AttributeError):
+        anne.eav.nope  # noqa: B018
+
+
+def test_prefetch_enum_and_uuid_entities(db, django_assert_num_queries) -> None:
+    group = EnumGroup.objects.create(name="Yes / No")
+    yes = EnumValue.objects.create(value="yes")
+    group.values.add(yes)
+    Attribute.objects.create(
+        name="on call",
+        slug="on_call",
+        datatype=Attribute.TYPE_ENUM,
+        enum_group=group,
+    )
+    Doctor.objects.create(name="Who", eav__on_call=yes)
+
+    with django_assert_num_queries(3):
+        (doctor,) = Doctor.objects.prefetch_eav()
+        assert doctor.eav.on_call == yes
+
+
+def test_prefetch_ignores_values_querysets(patients) -> None:
+    names = Patient.objects.prefetch_eav().values_list("name", flat=True)
+    assert sorted(names) == ["Anne", "Bob", "Carl"]
+
+
+def test_save_drops_prefetched_values(patients) -> None:
+    anne = Patient.objects.prefetch_eav().get(name="Anne")
+    anne.eav.age = 4
+    anne.save()
+
+    del anne.eav.age
+    assert anne.eav.age == 4
+    assert not anne.eav.get_object_attributes()
+
+
+def test_prefetched_values_pass_validation(patients) -> None:
+    anne = Patient.objects.prefetch_eav().get(name="Anne")
+    anne.eav.validate_attributes()
+
+
+def test_prefetch_eav_function(patients, django_assert_num_queries) -> None:
+    loaded = list(Patient.objects.all())
+
+    prefetch_eav([])
+    with collect() as stats:
+        prefetch_eav([*loaded, Patient(name="unsaved")], "age")
+
+    (prefetch,) = stats.filter(PREFETCH)
+    assert prefetch.slugs == ("age",)
+    assert prefetch.rows == 2
+    with django_assert_num_queries(0):
+        assert sorted(p.eav.age or 0 for p in loaded) == [0, 3, 5]
+
+
+def test_prefetch_objects_in_bulk(db, django_assert_num_queries) -> None:
+    Attribute.objects.create(name="related", datatype=Attribute.TYPE_OBJECT)
+    examples = [ExampleModel.objects.create(name=f"e{i}") for i in range(3)]
+    other = M2MModel.objects.create(name="m")
+    gone = ExampleModel.objects.create(name="gone")
+    for i, target in enumerate([*examples, other, gone]):
+        Doctor.objects.create(name=f"d{i}", eav__related=target)
+    Doctor.objects.create(name="d5")
+    gone.delete()
+
+    # Doctors, attributes, values, then one in_bulk() per content type.
+    with django_assert_num_queries(5):
+        doctors = list(Doctor.objects.prefetch_eav().order_by("name"))
+        assert [d.eav.related for d in doctors] == [*examples, other, None, None]
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from copy import deepcopy
+from functools import reduce
+from operator import or_
+
 import pytest
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.db.models import Q
@@ -8,8 +12,9 @@ from django.test import TestCase
 
 import eav
 from eav.models import Attribute, EnumGroup, EnumValue, Value
+from eav.queryset import expand_q_filters, rewrite_q_expr
 from eav.registry import EavConfig
-from test_project.models import Encounter, ExampleModel, Patient
+from test_project.models import Doctor, Encounter, ExampleModel, Patient
 
 
 class Queries(TestCase):
@@ -381,6 +386,15 @@ class Queries(TestCase):
         eav.register(Patient, config_cls=CustomConfig)
         self.assert_order_by_results(eav_attr="data")
 
+    def test_order_by_uuid_entities(self):
+        """Ordering works for entities with UUID primary keys."""
+        Doctor.objects.create(name="Zed", eav__age=1)
+        Doctor.objects.create(name="Amy", eav__age=7)
+        Doctor.objects.create(name="Cal", eav__age=3)
+
+        ordered = Doctor.objects.order_by("eav__age").values_list("name", flat=True)
+        assert list(ordered) == ["Zed", "Cal", "Amy"]
+
     def test_fk_filter(self):
         e = ExampleModel.objects.create(name="test1")
         p = Patient.objects.get_or_create(name="Beth", example=e)[0]
@@ -500,27 +514,53 @@ class Queries(TestCase):
 
     def test_q_object_not_mutated_by_filter(self) -> None:
         """
-        Q objects passed to filter() must not be mutated.
+        Q objects passed to filter() must not be mutated, so that they can be
+        reused in another query.
+        """
+        self.init_data()
+        q = Q(eav__fever=self.yes) | (Q(eav__age__gte=3) & Q(eav__city="Nice"))
+        original = deepcopy(q)
 
-        expand_q_filters() rewrites Q children in-place. If the original Q
-        object is mutated, reusing it in a second query will operate on the
-        already-expanded (internal) form and may produce incorrect results or
-        errors.
+        first = set(Patient.objects.filter(q).values_list("name", flat=True))
 
-        This test documents the current behaviour (mutation occurs) so that
-        any future fix is captured as a regression guard.
-        """
+        assert q == original
+        assert set(Patient.objects.filter(q).values_list("name", flat=True)) == first
+
+    def test_filter_with_large_q_tree(self) -> None:
+        """Generated trees with many EAV leaves merge into one subquery per level."""
         self.init_data()
-        q = Q(eav__fever=self.yes)
-        original_children = list(q.children)  # [('eav__fever', <EnumValue>)]
+        ages = reduce(or_, [Q(eav__age=age) for age in range(3, 300)])
+        cities = reduce(or_, [Q(eav__city=f"City {i}") for i in range(300)])
+        q = ages & (cities | Q(eav__city="Nice") | Q(eav__city="Bamako"))
 
-        Patient.objects.filter(q)
+        p = Patient.objects.filter(q)
+        assert set(p.values_list("name", flat=True)) == {"Bob", "Daniel"}
+
+        rewritten = rewrite_q_expr(Patient, expand_q_filters(q, Patient))
+        assert [child.children[0][0] for child in rewritten.children] == [
+            "pk__in",
+            "pk__in",
+        ]
+
+    def test_filter_with_pk_in_and_eav_leaves(self) -> None:
+        """``pk__in`` leaves are merged as primary keys, not value ids."""
+        self.init_data()
+        pks = list(
+            Patient.objects.filter(name__in=["Anne", "Bob"]).values_list(
+                "pk",
+                flat=True,
+            ),
+        )
+        p = Patient.objects.filter(
+            Q(pk__in=pks) & Q(eav__age=3) & Q(eav__fever=self.no),
+        )
+        assert list(p.values_list("name", flat=True)) == ["Anne"]
 
-        # Document current (broken) behaviour: children are mutated.
-        # When this is fixed, change the assertion to assertEqual.
-        assert q.children != original_children, (
-            "Q mutation is fixed - update this test to assert no mutation"
+        values = Value.objects.filter(attribute__slug="age", value_int=15)
+        p = Patient.objects.filter(
+            Q(eav_values__in=values[:5]) & Q(eav__fever=self.yes),
         )
+        assert list(p.values_list("name", flat=True)) == ["Cyrill"]
 
     def test_negated_eav_field_workaround_chained_exclude(self) -> None:
         """
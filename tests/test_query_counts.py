@@ -0,0 +1,199 @@
+"""
+Query-count budgets for the core :class:`~eav.models.Entity` operations.
+
+Every test runs against schemas of 1, 10 and 100 attributes (and as many
+entities), and pins the exact number of queries the operation may execute.
+An operation whose query count grows with the number of attributes or
+entities therefore fails for the larger schemas. A failing budget lists the
+SQL that was executed, to compare with the statements noted next to it.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+
+import eav
+from eav.forms import BaseDynamicEntityForm
+from eav.models import Attribute, Value
+from test_project.models import Patient
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+ATTRIBUTE_COUNTS = (1, 10, 100)
+
+DATATYPES = (
+    Attribute.TYPE_INT,
+    Attribute.TYPE_TEXT,
+    Attribute.TYPE_FLOAT,
+    Attribute.TYPE_BOOLEAN,
+)
+
+SAMPLES = {
+    Attribute.TYPE_INT: 1,
+    Attribute.TYPE_TEXT: "one",
+    Attribute.TYPE_FLOAT: 1.0,
+    Attribute.TYPE_BOOLEAN: True,
+}
+
+
+@contextmanager
+def budget(expected: int) -> Iterator[None]:
+    """Assert that the block executes *expected* queries, listing them if not."""
+    with CaptureQueriesContext(connection) as context:
+        yield
+    executed = [query["sql"] for query in context.captured_queries]
+    assert len(executed) == expected, (
+        f"{len(executed)} queries executed, budget {expected}:\n" + "\n".join(executed)
+    )
+
+
+class PatientDynamicForm(BaseDynamicEntityForm):
+    class Meta:
+        model = Patient
+        fields = ("name",)
+
+
+@pytest.fixture(params=ATTRIBUTE_COUNTS, ids=lambda n: f"{n}-attributes")
+def schema(request, db) -> Iterator[list[Attribute]]:
+    """
+    Create *n* attributes and *n* patients. The first patient has a value for
+    every attribute, the others only for ``attr_0``.
+    """
+    eav.register(Patient)
+
+    count = request.param
+    attributes = Attribute.objects.bulk_create(
+        [
+            Attribute(
+                name=f"attr {i}",
+                slug=f"attr_{i}",
+                datatype=DATATYPES[i % len(DATATYPES)],
+            )
+            for i in range(count)
+        ],
+    )
+
+    patients = Patient.objects.bulk_create(
+        [Patient(name=f"patient {i}") for i in range(count)],
+    )
+    ct = ContentType.objects.get_for_model(Patient)
+    Value.objects.bulk_create(
+        [
+            Value(
+                entity_ct=ct,
+                entity_id=patient.pk,
+                attribute=attribute,
+                **{f"value_{attribute.datatype}": SAMPLES[attribute.datatype]},
+            )
+            for index, patient in enumerate(patients)
+            for attribute in (attributes if index == 0 else attributes[:1])
+        ],
+    )
+    yield attributes
+    eav.unregister(Patient)
+
+
+@pytest.fixture
+def patient(schema) -> Patient:
+    """A freshly loaded patient that has a value for every attribute."""
+    return Patient.objects.order_by("pk").first()
+
+
+def test_getattr(patient) -> None:
+    with budget(2):
+        assert patient.eav.attr_0 == 1
+
+
+def test_save_one_changed_attribute(patient) -> None:
+    patient.eav.attr_0 = 2
+
+    # The 6 statements of an unchanged save, then Value.save(): 3 for
+    # full_clean() (the attribute and content type exist, the value is
+    # unique), 3 for its check constraint (SAVEPOINT, SELECT, RELEASE) and
+    # the UPDATE of the value.
+    with budget(13):
+        patient.save()
+
+
+def test_save_unchanged(patient) -> None:
+    # validate_attributes(): the values, the attributes and their slugs; the
+    # UPDATE of the patient; Entity.save(): the attributes and the values.
+    with budget(6):
+        patient.save()
+
+
+def test_create(schema) -> None:
+    # validate_attributes() (3), the INSERT of the patient, Entity.save()
+    # loading the attributes and the values (2), save_value() looking up the
+    # stored value, then creating an empty value (3 for full_clean(), 3 for
+    # the check constraint, the INSERT) and saving it again with the new
+    # value (the same 6, the UPDATE).
+    with budget(21):
+        Patient.objects.create(name="new", eav__attr_0=5)
+
+
+def test_get_or_create_existing(patient) -> None:
+    with budget(2):
+        _, created = Patient.objects.get_or_create(name=patient.name, eav__attr_0=1)
+    assert not created
+
+
+def test_get_or_create_new(schema) -> None:
+    # Compiling the lookup on attr_0, the SELECT finding nothing and the 21
+    # statements of test_create.
+    with budget(23):
+        _, created = Patient.objects.get_or_create(name="new", eav__attr_0=5)
+    assert created
+
+
+def test_filter(schema) -> None:
+    with budget(2):
+        assert len(Patient.objects.filter(eav__attr_0=1)) == len(schema)
+
+
+def test_filter_with_regular_field(schema) -> None:
+    with budget(2):
+        list(Patient.objects.filter(eav__attr_0=1, name__startswith="patient"))
+
+
+def test_filter_q_expression(schema) -> None:
+    with budget(3):
+        list(Patient.objects.filter(Q(eav__attr_0=1) | Q(eav__attr_0__gte=5)))
+
+
+def test_order_by(schema) -> None:
+    with budget(3):
+        assert len(Patient.objects.order_by("eav__attr_0")) == len(schema)
+
+
+def test_prefetch_eav(schema) -> None:
+    with budget(3):
+        patients = Patient.objects.prefetch_eav()
+        assert sum(p.eav.attr_0 for p in patients) == len(schema)
+
+
+def test_form_build(patient) -> None:
+    with budget(2):
+        form = PatientDynamicForm(instance=patient)
+    assert "attr_0" in form.fields
+
+
+def test_form_save_unchanged(patient, schema) -> None:
+    data = {"name": patient.name}
+    for attribute in schema:
+        data[attribute.slug] = SAMPLES[attribute.datatype]
+
+    form = PatientDynamicForm(data, instance=patient)
+    assert form.is_valid(), form.errors
+
+    # The attributes of the form, and the 6 statements of an unchanged save.
+    with budget(7):
+        form.save()
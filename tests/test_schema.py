@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import pytest
+from django.core.cache import cache
+from django.core.signals import request_started
+
+from eav.identity import identity_map
+from eav.models import Attribute, EnumGroup, EnumValue, Value
+from eav.schema import SCHEMA_KEY, VERSION_KEY, SchemaCache, schema_cache
+from test_project.models import Doctor
+
+
+def restart(process: SchemaCache) -> None:
+    """Forget the local state, as a new process would."""
+    process._version = None
+    process._schema = None
+    identity_map.clear()
+
+
+@pytest.fixture
+def schema(db, settings, django_capture_on_commit_callbacks):
+    settings.EAV2_SCHEMA_CACHE = "default"
+    cache.clear()
+    with django_capture_on_commit_callbacks(execute=True):
+        group = EnumGroup.objects.create(name="Yes / No")
+        yes = EnumValue.objects.create(value="yes")
+        group.values.add(yes)
+        Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+        Attribute.objects.create(
+            name="fever",
+            datatype=Attribute.TYPE_ENUM,
+            enum_group=group,
+        )
+    for age in range(3):
+        Doctor.objects.create(name=str(age), eav__age=age, eav__fever=yes)
+    restart(schema_cache)
+    yield
+    restart(schema_cache)
+
+
+def test_processes_share_the_schema(schema, django_assert_num_queries) -> None:
+    with django_assert_num_queries(3):
+        loaded = schema_cache.get()
+    assert schema_cache.get() is loaded
+
+    fever = loaded.get(Attribute, Attribute.objects.get(slug="fever").pk)
+    assert fever.enum_group.name == "Yes / No"
+
+    # Another process loads the attributes and enum values from the cache.
+    restart(schema_cache)
+    with django_assert_num_queries(1):
+        read = {(v.attribute.slug, str(v.value)) for v in Value.objects.all()}
+    assert read == {("age", "0"), ("age", "1"), ("age", "2"), ("fever", "yes")}
+
+
+def test_commit_sets_new_version(
+    schema,
+    django_capture_on_commit_callbacks,
+    django_assert_num_queries,
+) -> None:
+    other = SchemaCache(alias="default")
+    other.get()
+    version = cache.get(VERSION_KEY)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        age = Attribute.objects.get(slug="age")
+        age.name = "years"
+        age.save()
+
+    assert cache.get(VERSION_KEY) != version
+    assert other.check()
+    assert not other.check()
+    # The first process to need the new version loads and publishes it.
+    assert other.get().get(Attribute, age.pk).name == "years"
+    with django_assert_num_queries(0):
+        assert SchemaCache("default").get().get(Attribute, age.pk).name == "years"
+
+
+def test_m2m_change_sets_new_version(
+    schema,
+    django_capture_on_commit_callbacks,
+) -> None:
+    version = schema_cache.version()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        EnumGroup.objects.get().values.add(EnumValue.objects.create(value="no"))
+
+    assert schema_cache.version() != version
+
+
+def test_uncommitted_changes_not_published(
+    schema,
+    django_capture_on_commit_callbacks,
+) -> None:
+    version = schema_cache.version()
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        Attribute.objects.create(name="city", datatype=Attribute.TYPE_TEXT)
+        local = schema_cache.get()
+
+    # This process sees its change, the others don't until it is committed.
+    assert len(local.instances[Attribute]) == 3
+    assert cache.get(SCHEMA_KEY.format(version=version)) is None
+    assert schema_cache.version() == version
+
+    callbacks[0]()
+    assert schema_cache.version() != version
+    assert len(schema_cache.get().instances[Attribute]) == 3
+    assert cache.get(SCHEMA_KEY.format(version=schema_cache.version()))
+
+
+def test_request_checks_version(schema) -> None:
+    schema_cache.get()
+    identity_map.add(Attribute.objects.get(slug="age"))
+
+    request_started.send(sender=None)
+    assert len(identity_map) == 1
+
+    cache.set(VERSION_KEY, "changed elsewhere")
+    request_started.send(sender=None)
+    assert not identity_map
+    assert schema_cache._schema is None
+
+
+def test_disabled(db) -> None:
+    disabled = SchemaCache()
+
+    assert not disabled.enabled
+    assert disabled.get() is None
+    assert not disabled.check()
+    disabled.bump()
+    disabled.changed("default")
+    assert disabled._version is None
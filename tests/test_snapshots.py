@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import pytest
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+from eav.models import Attribute, Value
+from eav.snapshots import EntityCache
+from test_project.models import Doctor
+
+
+# Snapshots are cached once the transactions they are taken in are committed.
+@pytest.fixture
+def doctors(transactional_db, settings):
+    settings.EAV2_ENTITY_CACHE = "default"
+    cache.clear()
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="city", datatype=Attribute.TYPE_TEXT)
+    Doctor.objects.create(name="Anne", eav__age=30, eav__city="Oslo")
+    Doctor.objects.create(name="Bob", eav__age=40)
+
+
+def age(name):
+    return Doctor.objects.get(name=name).eav.age
+
+
+def test_reads_served_from_cache(doctors, django_assert_num_queries) -> None:
+    anne = Doctor.objects.get(name="Anne")
+    with django_assert_num_queries(2):
+        assert anne.eav.age == 30
+        assert anne.eav.city == "Oslo"
+
+    anne = Doctor.objects.get(name="Anne")
+    with django_assert_num_queries(0):
+        assert (anne.eav.age, anne.eav.city) == (30, "Oslo")
+
+    with pytest.raises(AttributeError):
+        anne.eav.nope  # noqa: B018
+
+
+def test_writes_invalidate(doctors) -> None:
+    assert (age("Anne"), age("Bob")) == (30, 40)
+
+    anne = Doctor.objects.get(name="Anne")
+    anne.eav.age = 31
+    anne.save()
+    assert age("Anne") == 31
+
+    Attribute.objects.get(slug="age").save_value(anne, 32)
+    assert age("Anne") == 32
+
+    Value.objects.filter(attribute__slug="age").update(value_int=1)
+    assert (age("Anne"), age("Bob")) == (1, 1)
+
+    values = list(Value.objects.filter(attribute__slug="age"))
+    for value in values:
+        value.value_int = 2
+    Value.objects.bulk_update(values, ["value_int"])
+    assert (age("Anne"), age("Bob")) == (2, 2)
+
+    Value.objects.filter(attribute__slug="age", value_int=2).first().delete()
+    Value.objects.filter(attribute__slug="age").delete()
+    assert (age("Anne"), age("Bob")) == (None, None)
+
+    bob = Doctor.objects.get(name="Bob")
+    attribute = Attribute.objects.get(slug="age")
+    Value.objects.bulk_create(
+        [
+            Value(
+                entity_ct=bob.eav.ct,
+                entity_uuid=bob.pk,
+                attribute=attribute,
+                value_int=5,
+            ),
+        ],
+    )
+    assert age("Bob") == 5
+
+
+def test_schema_change_invalidates_all(doctors) -> None:
+    assert age("Anne") == 30
+
+    Attribute.objects.create(name="height", datatype=Attribute.TYPE_FLOAT)
+    anne = Doctor.objects.get(name="Anne")
+    assert "height" in anne.eav.get_snapshot().slugs
+
+
+def test_prefetch_uses_cache(doctors, django_assert_num_queries) -> None:
+    with django_assert_num_queries(3):
+        loaded = list(Doctor.objects.prefetch_eav().order_by("name"))
+        assert [d.eav.age for d in loaded] == [30, 40]
+
+    with django_assert_num_queries(1):
+        loaded = list(Doctor.objects.prefetch_eav().order_by("name"))
+        assert [(d.eav.age, d.eav.city) for d in loaded] == [(30, "Oslo"), (40, None)]
+
+    # Only the invalidated entity is loaded from the database.
+    Value.objects.filter(attribute__slug="age", value_int=40).update(value_int=41)
+    with django_assert_num_queries(3):
+        loaded = list(Doctor.objects.prefetch_eav().order_by("name"))
+        assert [d.eav.age for d in loaded] == [30, 41]
+
+    # Prefetching some attributes doesn't use the cache.
+    with django_assert_num_queries(3):
+        assert Doctor.objects.prefetch_eav("age").get(name="Anne").eav.age == 30
+
+
+def test_invalidated_again_on_commit(doctors) -> None:
+    anne = Doctor.objects.get(name="Anne")
+    snapshots = EntityCache("default")
+    ct_id = anne.eav.ct.pk
+    stale = anne.eav.get_snapshot()
+    with transaction.atomic():
+        anne.eav.age = 33
+        anne.save()
+        assert age("Anne") == 33
+        # Another process could cache the old values before the commit.
+        keys = snapshots._keys(snapshots._generation(cache), ct_id, [anne.pk])
+        cache.set_many(dict.fromkeys(keys, stale))
+        assert snapshots.get_many(ct_id, [anne.pk])
+    # The old values are dropped, the committed ones cached.
+    assert snapshots.get_many(ct_id, [anne.pk])[anne.pk].values["age"] == 33
+
+
+def test_rolled_back_values_not_cached(doctors) -> None:
+    assert age("Anne") == 30
+
+    def write_and_roll_back():
+        with transaction.atomic():
+            anne = Doctor.objects.get(name="Anne")
+            anne.eav.age = 33
+            anne.save()
+            assert age("Anne") == 33
+            list(Doctor.objects.prefetch_eav())
+            raise DatabaseError
+
+    with pytest.raises(DatabaseError):
+        write_and_roll_back()
+    assert age("Anne") == 30
+    assert [d.eav.age for d in Doctor.objects.prefetch_eav().order_by("name")] == [
+        30,
+        40,
+    ]
+
+
+def test_disabled(db) -> None:
+    disabled = EntityCache()
+    assert not disabled.enabled
+    disabled.invalidate(1, [1])
+    disabled.invalidate_rows([(1, 1, None)])
+    disabled.clear()
+
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    doctor = Doctor.objects.create(name="Who", eav__age=3)
+    assert doctor.eav.get_snapshot() is None
+    assert Doctor(name="New").eav.get_snapshot() is None
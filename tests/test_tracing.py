@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+
+import pytest
+from django.db.models import Q
+from django.test import override_settings
+from django.utils.module_loading import import_string
+
+import eav
+from eav import tracing
+from eav.models import Attribute
+from eav.planner import analyze
+from eav.tracing import (
+    CONTENT_TYPE,
+    FILTER_SPAN,
+    SAVE_SPAN,
+    SAVE_VALUE_SPAN,
+    SLUGS,
+    STRATEGY,
+    VALIDATE_SPAN,
+    InMemoryTracer,
+    NoOpTracer,
+    OpenTelemetryTracer,
+    Tracer,
+    get_tracer,
+    set_tracer,
+)
+from test_project.models import Patient
+
+#: Instance used by ``test_tracer_setting``.
+TRACER = InMemoryTracer()
+
+
+@pytest.fixture
+def tracer():
+    tracer = InMemoryTracer()
+    set_tracer(tracer)
+    yield tracer
+    set_tracer(None)
+
+
+@pytest.fixture
+def patient(db):
+    eav.register(Patient)
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="city", datatype=Attribute.TYPE_TEXT)
+    patient = Patient.objects.create(name="Anne", eav__age=3, eav__city="Oslo")
+    yield Patient.objects.get(pk=patient.pk)
+    eav.unregister(Patient)
+
+
+def test_default_tracer_is_a_no_op() -> None:
+    tracer = get_tracer()
+    assert isinstance(tracer, NoOpTracer)
+
+    with tracer.start_span(FILTER_SPAN, {SLUGS: ("age",)}) as span:
+        assert not span
+        span.set_attributes({STRATEGY: "subquery"})
+
+
+def test_tracer_interface() -> None:
+    # Tracers must implement start_span().
+    with pytest.raises(TypeError, match="start_span"):
+        Tracer()
+
+
+def test_tracer_setting() -> None:
+    with override_settings(EAV2_TRACER="eav.tracing.InMemoryTracer"):
+        set_tracer(None)
+        assert isinstance(get_tracer(), InMemoryTracer)
+        assert get_tracer() is get_tracer()
+
+    with override_settings(EAV2_TRACER="tests.test_tracing.TRACER"):
+        set_tracer(None)
+        assert get_tracer() is import_string("tests.test_tracing.TRACER")
+
+    set_tracer(None)
+    assert isinstance(get_tracer(), NoOpTracer)
+
+
+def test_save_spans(patient, tracer) -> None:
+    patient.eav.age = 4
+    patient.eav.city = None
+    patient.save()
+
+    (validate,) = tracer.find(VALIDATE_SPAN)
+    assert validate.attributes == {
+        CONTENT_TYPE: "test_project.patient",
+        SLUGS: ("age",),
+    }
+    assert validate.parent is None
+
+    (save,) = tracer.find(SAVE_SPAN)
+    assert save.attributes == {
+        CONTENT_TYPE: "test_project.patient",
+        SLUGS: ("age", "city"),
+    }
+    assert save.duration >= 0
+
+    values = tracer.find(SAVE_VALUE_SPAN)
+    assert [(s.attributes[SLUGS], s.attributes[STRATEGY]) for s in values] == [
+        (("age",), "update"),
+        (("city",), "delete"),
+    ]
+    assert all(s.parent is save for s in values)
+
+
+def test_save_value_strategies(patient, tracer) -> None:
+    age = Attribute.objects.get(slug="age")
+    weight = Attribute.objects.create(name="weight", datatype=Attribute.TYPE_FLOAT)
+
+    age.save_value(patient, 3)
+    weight.save_value(patient, None)
+    weight.save_value(patient, 70.5)
+
+    assert [s.attributes[STRATEGY] for s in tracer.spans] == [
+        "unchanged",
+        "unchanged",
+        "create",
+    ]
+
+
+def test_filter_spans(patient, tracer) -> None:
+    assert list(Patient.objects.filter(eav__age=3, name="Anne")) == [patient]
+    assert list(Patient.objects.filter(Q(eav__city="Oslo") | Q(eav__age=1))) == [
+        patient,
+    ]
+
+    kwargs_span, q_span = (s for s in tracer.find(FILTER_SPAN) if s.parent is None)
+    assert kwargs_span.attributes == {
+        CONTENT_TYPE: "test_project.patient",
+        SLUGS: ("age",),
+        STRATEGY: ("join",),
+    }
+    assert q_span.attributes[SLUGS] == ("city", "age")
+    assert q_span.attributes[STRATEGY] == ("q_rewrite",)
+
+
+def test_filter_span_reports_planned_strategies(patient, tracer) -> None:
+    for number in range(30):
+        Patient.objects.create(name=f"patient {number}", eav__age=1)
+    analyze([Patient])
+    tracer.spans.clear()
+
+    list(Patient.objects.filter(eav__city="Oslo", eav__age=1))
+
+    (span,) = (s for s in tracer.find(FILTER_SPAN) if s.parent is None)
+    assert span.attributes[STRATEGY] == ("in", "exists")
+
+
+def test_span_records_errors(patient, tracer) -> None:
+    patient.eav.age = "not a number"
+
+    with pytest.raises(Exception, match="age EAV field"):
+        patient.save()
+
+    (validate,) = tracer.find(VALIDATE_SPAN)
+    assert validate.error is not None
+    assert validate.end is not None
+
+
+class FakeOpenTelemetrySpan:
+    def __init__(self, attributes):
+        self.attributes = attributes
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class FakeOpenTelemetryTracer:
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes):
+        span = FakeOpenTelemetrySpan(attributes)
+        self.spans.append((name, span))
+        yield span
+
+
+def test_open_telemetry_adapter() -> None:
+    otel = FakeOpenTelemetryTracer()
+    tracer = OpenTelemetryTracer(otel)
+
+    with tracer.start_span(FILTER_SPAN, {SLUGS: ("age",)}) as span:
+        assert span
+        span.set_attribute(STRATEGY, "subquery")
+
+    ((name, recorded),) = otel.spans
+    assert name == FILTER_SPAN
+    assert recorded.attributes == {SLUGS: ("age",), STRATEGY: "subquery"}
+
+
+def test_open_telemetry_adapter_default_tracer() -> None:
+    pytest.importorskip("opentelemetry")
+
+    assert OpenTelemetryTracer().tracer is not None
+
+
+def test_module_start_span(tracer) -> None:
+    with tracing.start_span("custom", {"key": 1}) as span:
+        span.set_attribute("other", 2)
+
+    assert tracer.spans[0].attributes == {"key": 1, "other": 2}
+    tracer.clear()
+    assert not tracer.spans
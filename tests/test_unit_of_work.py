@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+
+from eav.middleware import UnitOfWorkMiddleware
+from eav.models import Attribute, Value
+from eav.unit_of_work import current_unit_of_work, unit_of_work
+from test_project.models import Doctor
+
+
+@pytest.fixture
+def doctors(db):
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="city", datatype=Attribute.TYPE_TEXT)
+    Doctor.objects.create(name="Anne", eav__age=30, eav__city="Oslo")
+    Doctor.objects.create(name="Bob", eav__age=40)
+
+
+def test_instances_share_values(doctors, django_assert_num_queries) -> None:
+    anne, bob = Doctor.objects.order_by("name")
+    with unit_of_work():
+        with django_assert_num_queries(2):
+            assert (anne.eav.age, anne.eav.city) == (30, "Oslo")
+
+        # The attributes are memoized, only the values of Bob are loaded.
+        with django_assert_num_queries(1):
+            assert bob.eav.age == 40
+
+        same_anne = Doctor.objects.get(name="Anne")
+        with django_assert_num_queries(0):
+            assert same_anne.eav.city == "Oslo"
+            with pytest.raises(AttributeError):
+                same_anne.eav.nope  # noqa: B018
+
+    with django_assert_num_queries(2):
+        assert anne.eav.age == 30
+
+
+def test_writes_are_seen(doctors) -> None:
+    with unit_of_work():
+        anne = Doctor.objects.get(name="Anne")
+        assert anne.eav.age == 30
+
+        other = Doctor.objects.get(name="Anne")
+        other.eav.age = 31
+        other.save()
+        assert anne.eav.age == 31
+
+        Attribute.objects.create(name="height", datatype=Attribute.TYPE_FLOAT)
+        assert anne.eav.height is None
+        assert "height" in anne.eav.get_all_attribute_slugs()
+
+
+def test_set_based_writes_are_seen(doctors) -> None:
+    with unit_of_work():
+        anne = Doctor.objects.get(name="Anne")
+        assert anne.eav.age == 30
+
+        Value.objects.filter(attribute__slug="age", value_int=30).update(value_int=32)
+        assert Doctor.objects.get(name="Anne").eav.age == 32
+
+        Value.objects.filter(attribute__slug="age").delete()
+        assert Doctor.objects.get(name="Anne").eav.age is None
+
+
+def test_nested_blocks_share_the_scope() -> None:
+    assert current_unit_of_work() is None
+    with unit_of_work() as outer, unit_of_work() as inner:
+        assert inner is outer
+    assert current_unit_of_work() is None
+
+
+def test_tasks_are_isolated() -> None:
+    async def scoped():
+        with unit_of_work() as scope:
+            await asyncio.sleep(0)
+            assert current_unit_of_work() is scope
+            return scope
+
+    async def run():
+        return await asyncio.gather(scoped(), scoped())
+
+    first, second = asyncio.run(run())
+    assert first is not second
+    assert current_unit_of_work() is None
+
+
+def test_middleware() -> None:
+    def view(request):
+        assert current_unit_of_work() is not None
+        return HttpResponse()
+
+    middleware = UnitOfWorkMiddleware(view)
+    assert middleware(RequestFactory().get("/")).status_code == 200
+    assert current_unit_of_work() is None
+
+
+def test_async_middleware() -> None:
+    async def view(request):
+        assert current_unit_of_work() is not None
+        return HttpResponse()
+
+    middleware = UnitOfWorkMiddleware(view)
+    response = asyncio.run(middleware(RequestFactory().get("/")))
+    assert response.status_code == 200
@@ -1,7 +1,8 @@
 import pytest
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 
 from eav.models import Attribute, Value
 from test_project.models import Doctor, Patient
@@ -317,3 +318,30 @@ class TestValueDatabaseConstraints:
             ],
         )
         assert len(values) == 1
+
+
+@pytest.mark.django_db
+def test_only_datatypes(doctor) -> None:
+    """Values load only the columns of the given datatypes, and save them."""
+    Attribute.objects.create(name="age", datatype=Attribute.TYPE_INT)
+    Attribute.objects.create(name="notes", datatype=Attribute.TYPE_JSON)
+    doctor.eav.age = 3
+    doctor.eav.notes = {"text": "x" * 1000}
+    doctor.save()
+
+    values = list(doctor.eav.get_values([Attribute.TYPE_INT]))
+    assert all(
+        {"value_json", "value_text", "value_csv"} <= value.get_deferred_fields()
+        for value in values
+    )
+    age = next(value for value in values if value.attribute.slug == "age")
+    with CaptureQueriesContext(connection) as ctx:
+        age.value = 4
+        age.save()
+    # Deferred columns are neither loaded nor written.
+    assert not any("value_json" in query["sql"] for query in ctx.captured_queries)
+
+    doctor.eav.age = 5
+    doctor.save()
+    doctor = Doctor.objects.get(pk=doctor.pk)
+    assert (doctor.eav.age, doctor.eav.notes) == (5, {"text": "x" * 1000})